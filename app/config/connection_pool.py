@@ -0,0 +1,197 @@
+import threading
+import time
+import logging
+from collections import deque
+import psycopg2
+from psycopg2 import OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+from app.utils.exceptions import PoolTimeoutException
+
+logger = logging.getLogger(__name__)
+
+
+class _PoolEntry:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """
+    thread safe psycopg2 pool
+    - conections are only validated (SELECT 1) after sitting idle a while
+    - conections older than max_lifetime get recycled on checkout/return
+    - getconn waits up to checkout_timeout then raises PoolTimeoutException
+    """
+
+    def __init__(self, min_size: int, max_size: int, max_lifetime: float,
+                 idle_validation: float, checkout_timeout: float, **connect_kwargs):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.idle_validation = idle_validation
+        self.checkout_timeout = checkout_timeout
+        self._connect_kwargs = connect_kwargs
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._in_use = {}
+        self._size = 0  # open conections incl. ones being opened
+        self._closed = False
+        # stats
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._validations = 0
+        self._discarded = 0
+
+    def open(self):
+        """open min_size conections up front"""
+        for _ in range(self.min_size):
+            entry = _PoolEntry(psycopg2.connect(**self._connect_kwargs))
+            with self._cond:
+                self._size += 1
+                self._idle.append(entry)
+
+    def _is_alive(self, conn) -> bool:
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except (OperationalError, psycopg2.InterfaceError):
+            return False
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _needs_replacing(self, entry: _PoolEntry, now: float) -> bool:
+        if entry.conn.closed:
+            return True
+        if now - entry.created_at > self.max_lifetime:
+            return True
+        if now - entry.last_used > self.idle_validation:
+            with self._cond:
+                self._validations += 1
+            if not self._is_alive(entry.conn):
+                logger.warning("Stale connection detected, reconnecting...")
+                return True
+        return False
+
+    def getconn(self):
+        """check out a conection, waiting up to checkout_timeout for one"""
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+        waited = False
+        entry = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeoutException("Connection pool is closed")
+                if self._idle:
+                    # LIFO so the warmest conection gets reused
+                    entry = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutException(
+                        f"No database connection available after {self.checkout_timeout}s"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+                self._wait_time += time.monotonic() - started
+
+        try:
+            if entry is not None and self._needs_replacing(entry, time.monotonic()):
+                self._close(entry.conn)
+                with self._cond:
+                    self._discarded += 1
+                entry = None
+            if entry is None:
+                entry = _PoolEntry(psycopg2.connect(**self._connect_kwargs))
+        except Exception:
+            # give the slot back so waiters can try to connect themselves
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._in_use[id(entry.conn)] = entry
+        return entry.conn
+
+    def putconn(self, conn, discard: bool = False):
+        """return a conection, closing it if broken, too old or discard is set"""
+        with self._cond:
+            entry = self._in_use.pop(id(conn), None)
+        if entry is None:
+            logger.warning("Returned connection does not belong to the pool")
+            self._close(conn)
+            return
+
+        if not discard and not conn.closed:
+            tx_status = conn.info.transaction_status
+            if tx_status == TRANSACTION_STATUS_UNKNOWN:
+                discard = True
+            elif tx_status != TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard = True
+        now = time.monotonic()
+        if discard or conn.closed or now - entry.created_at > self.max_lifetime:
+            self._close(conn)
+            with self._cond:
+                self._size -= 1
+                self._discarded += 1
+                self._cond.notify()
+            return
+
+        entry.last_used = now
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                self._close(conn)
+                return
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._close(entry.conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self._size,
+                "inUse": len(self._in_use),
+                "idle": len(self._idle),
+                "minSize": self.min_size,
+                "maxSize": self.max_size,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "waitTimeSeconds": round(self._wait_time, 3),
+                "timeouts": self._timeouts,
+                "validations": self._validations,
+                "discarded": self._discarded,
+            }
@@ -1,13 +1,116 @@
+import asyncio
+import threading
+import time
+import uuid
 import psycopg2
-from psycopg2 import pool, OperationalError
+from psycopg2 import OperationalError
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from app.config.settings import settings
+from app.config.connection_pool import ConnectionPool
+from app.utils.exceptions import PoolTimeoutException
+from app.utils.metrics import DB_CHECKOUT_TIMEOUTS, DB_CHECKOUT_WAIT, DB_OPERATION_LATENCY
 import logging
 
 logger = logging.getLogger(__name__)
 
+# rows per round trip for server side cursors
+STREAM_ITERSIZE = 2000
+
+
+class RowStream:
+    """
+    rows of one query read through a server side (named) cursor, itersize
+    at a time, so only one chunk is ever in memory. holds its conection
+    until exhausted or closed
+    """
+
+    def __init__(self, database: "Database", conn, cursor, itersize: int):
+        self._db = database
+        self._conn = conn
+        self._cursor = cursor
+        self._itersize = itersize
+        self._lock = threading.Lock()
+        self._closed = False
+        # whatever prepare(conn) returned when the stream was opened
+        self.prepared = None
+        # hands the stream slot back on the event loop, set by Database.stream
+        self._release_slot = None
+
+    def _fetch(self):
+        with self._lock:
+            if self._closed or self._cursor is None:
+                return []
+            return self._cursor.fetchmany(self._itersize)
+
+    def _execute(self, query, params):
+        with self._lock:
+            if self._closed:
+                raise psycopg2.InterfaceError("stream already closed")
+            if self._cursor is not None:
+                self._cursor.close()
+            self._cursor = self._conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+            self._cursor.itersize = self._itersize
+            self._cursor.execute(query, params)
+
+    def _close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            broken = False
+            try:
+                if self._cursor is not None:
+                    self._cursor.close()
+                self._conn.rollback()  # read only, nothing to commit
+            except Exception:
+                broken = True
+            self._db.return_connection(self._conn, discard=broken)
+            if self._release_slot is not None:
+                try:
+                    self._release_slot()
+                except RuntimeError:
+                    pass  # loop already closed on shutdown, nobody waits for the slot
+
+    async def execute(self, query, params=None):
+        """
+        run another query on the same conection and transaction, chunks()
+        then gives its rows. lets one download read several queries while
+        holding a single stream slot
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._db.executor, partial(self._execute, query, params))
+
+    async def chunks(self, close: bool = True):
+        """
+        async iterator over lists of rows, closes the stream when done unless
+        close is False (the caller then closes it, also on errors)
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                rows = await loop.run_in_executor(self._db.executor, self._fetch)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            # dont await here, the client may have gone and the task be cancelled
+            if close:
+                self.close()
+
+    def close(self):
+        if not self._closed and self._db.executor:
+            self._db.executor.submit(self._close)
+
+
 class Database:
     def __init__(self):
         self.connection_pool = None
+        self.executor = None
+        # streams keep their conection for the whole download, so only
+        # DB_STREAM_MAX_CONCURRENT of them at once or slow clients starve the pool
+        self._stream_slots = None
+        self._open_streams = 0
 
     def _get_connection_kwargs(self):
         """get conection params with keepalive setings"""
@@ -24,64 +127,171 @@ class Database:
     def initialize(self):
         try:
             kwargs = self._get_connection_kwargs()
-            self.connection_pool = psycopg2.pool.SimpleConnectionPool(
-                1, 20, **kwargs
+            self.connection_pool = ConnectionPool(
+                min_size=settings.DB_POOL_MIN_SIZE,
+                max_size=settings.DB_POOL_MAX_SIZE,
+                max_lifetime=settings.DB_POOL_MAX_LIFETIME_SECONDS,
+                idle_validation=settings.DB_POOL_IDLE_VALIDATION_SECONDS,
+                checkout_timeout=settings.DB_POOL_CHECKOUT_TIMEOUT_SECONDS,
+                **kwargs
             )
+            self.connection_pool.open()
+            # one worker per pooled conection so a thread never waits on the pool
+            self.executor = ThreadPoolExecutor(
+                max_workers=settings.DB_POOL_MAX_SIZE, thread_name_prefix="db"
+            )
+            self._stream_slots = asyncio.Semaphore(settings.DB_STREAM_MAX_CONCURRENT)
+            self._open_streams = 0
             logger.info("Database connection pool created successfully")
         except Exception as e:
             logger.error(f"Error creating connection pool: {e}")
             raise
 
-    def _test_connection(self, conn):
-        """test if the conection is still alive"""
-        try:
-            with conn.cursor() as cur:
-                cur.execute("SELECT 1")
-            return True
-        except (OperationalError, psycopg2.InterfaceError):
-            return False
-
     def get_connection(self):
-        """get conection from pool with helth check"""
+        """
+        get conection from pool, only health checked if it sat idle for a while
+        raises PoolTimeoutException if none frees up in time
+        """
         if not self.connection_pool:
             raise Exception("Connection pool not initialized")
-        
-        conn = self.connection_pool.getconn()
-        
-        # test if conection still works
-        if not self._test_connection(conn):
-            logger.warning("Stale connection detected, reconnecting...")
-            try:
-                conn.close()
-            except Exception:
-                pass
-            # put back dead conection and grab a fresh one
-            self.connection_pool.putconn(conn, close=True)
+        started = time.perf_counter()
+        try:
             conn = self.connection_pool.getconn()
-            
-            # check the new one actualy works
-            if not self._test_connection(conn):
-                raise Exception("Failed to establish database connection")
-        
+        except PoolTimeoutException:
+            DB_CHECKOUT_TIMEOUTS.inc()
+            raise
+        DB_CHECKOUT_WAIT.observe(time.perf_counter() - started)
         return conn
 
-    def return_connection(self, connection):
+    def return_connection(self, connection, discard: bool = False):
         """return conection to pool, close if broken"""
         if self.connection_pool and connection:
             try:
-                # check if conection usable before returning
-                if connection.closed:
-                    self.connection_pool.putconn(connection, close=True)
-                else:
-                    self.connection_pool.putconn(connection)
+                self.connection_pool.putconn(connection, discard=discard)
             except Exception as e:
                 logger.warning(f"Error returning connection to pool: {e}")
-                try:
-                    self.connection_pool.putconn(connection, close=True)
-                except Exception:
-                    pass
+
+    def _run_in_transaction(self, func, *args):
+        """check out a conection, run func in one transaction, give it back"""
+        conn = self.get_connection()
+        broken = False
+        # the functions passed to run are named after what they do, so they
+        # double as the statement name in the latency histogram
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = func(conn, *args)
+            conn.commit()
+            outcome = "ok"
+            return result
+        except (OperationalError, psycopg2.InterfaceError):
+            # conection level error, dont hand this one out again
+            broken = True
+            raise
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+            raise
+        finally:
+            DB_OPERATION_LATENCY.observe(time.perf_counter() - started, func.__name__, outcome)
+            self.return_connection(conn, discard=broken)
+
+    async def run(self, func, *args):
+        """
+        run func(conn, *args) on the db thread pool and await the result
+        psycopg2 is blocking so this keeps queries off the event loop,
+        commits if func returns and rolls back if it raises
+        """
+        if not self.executor:
+            raise Exception("Connection pool not initialized")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, partial(self._run_in_transaction, func, *args)
+        )
+
+    def _open_stream(self, prepare, query, params, itersize):
+        conn = self.get_connection()
+        try:
+            prepared = prepare(conn) if prepare is not None else None
+            cursor = None
+            if query is not None:
+                cursor = conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+                cursor.itersize = itersize
+                cursor.execute(query, params)
+            stream = RowStream(self, conn, cursor, itersize)
+            stream.prepared = prepared
+            return stream
+        except (OperationalError, psycopg2.InterfaceError):
+            self.return_connection(conn, discard=True)
+            raise
+        except Exception:
+            broken = False
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+            self.return_connection(conn, discard=broken)
+            raise
+
+    def _release_stream_slot(self):
+        self._open_streams -= 1
+        self._stream_slots.release()
+
+    async def _acquire_stream_slot(self):
+        """
+        wait (on the event loop, not a db thread) for one of the
+        DB_STREAM_MAX_CONCURRENT stream slots, PoolTimeoutException like a
+        pool checkout if none frees up in time
+        """
+        try:
+            await asyncio.wait_for(
+                self._stream_slots.acquire(), timeout=settings.DB_POOL_CHECKOUT_TIMEOUT_SECONDS
+            )
+        except asyncio.TimeoutError:
+            DB_CHECKOUT_TIMEOUTS.inc()
+            raise PoolTimeoutException(
+                f"No stream slot available after {settings.DB_POOL_CHECKOUT_TIMEOUT_SECONDS}s"
+            )
+        self._open_streams += 1
+
+    async def stream(self, query, params=None, prepare=None, itersize: int = STREAM_ITERSIZE) -> RowStream:
+        """
+        open a server side cursor for query and return a RowStream
+        prepare(conn) runs first in the same transaction, anything it raises
+        (ownership checks etc) comes out here before any row is sent and
+        what it returns is kept on stream.prepared. with query None nothing
+        is read until stream.execute()
+        at most DB_STREAM_MAX_CONCURRENT streams are open at once, the slot
+        is held until the stream is closed
+        """
+        if not self.executor:
+            raise Exception("Connection pool not initialized")
+        loop = asyncio.get_running_loop()
+        await self._acquire_stream_slot()
+        try:
+            stream = await loop.run_in_executor(
+                self.executor, partial(self._open_stream, prepare, query, params, itersize)
+            )
+        except BaseException:
+            self._release_stream_slot()
+            raise
+        stream._release_slot = partial(loop.call_soon_threadsafe, self._release_stream_slot)
+        return stream
+
+    def pool_stats(self) -> dict:
+        if not self.connection_pool:
+            return {}
+        stats = self.connection_pool.stats()
+        stats["openStreams"] = self._open_streams
+        stats["maxStreams"] = settings.DB_STREAM_MAX_CONCURRENT
+        return stats
 
     def close_all_connections(self):
+        if self.executor:
+            self.executor.shutdown(wait=True)
+            self.executor = None
         if self.connection_pool:
             self.connection_pool.closeall()
 
@@ -12,6 +12,25 @@ class Settings(BaseModel):
     JWT_EXPIRATION_HOURS: int = 24
     OPENWEATHERMAP_API_KEY: str
     PORT: int = 8002
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 20
+    DB_POOL_MAX_LIFETIME_SECONDS: int = 1800
+    DB_POOL_IDLE_VALIDATION_SECONDS: int = 30
+    DB_POOL_CHECKOUT_TIMEOUT_SECONDS: float = 5.0
+    DB_STREAM_MAX_CONCURRENT: int = 5
+    WEATHER_CACHE_TTL_SECONDS: int = 600
+    WEATHER_CACHE_MAX_ENTRIES: int = 1024
+    IMPORT_MAX_BYTES: int = 268435456
+    JWT_CACHE_TTL_SECONDS: int = 300
+    JWT_CACHE_MAX_ENTRIES: int = 10000
+    TRIP_CACHE_TTL_SECONDS: int = 300
+    TRIP_CACHE_MAX_ENTRIES: int = 10000
+    INGEST_BUFFER_ENABLED: bool = False
+    INGEST_BUFFER_MAX_POINTS: int = 100
+    INGEST_BUFFER_MAX_LATENCY_SECONDS: float = 2.0
+    INGEST_BUFFER_MAX_TOTAL_POINTS: int = 100000
+    COORDINATE_PACKING_ENABLED: bool = False
+    ENRICHMENT_RECOVERY_MAX_TRIPS: int = 1000
 
     class Config:
         case_sensitive = True
@@ -23,7 +42,26 @@ def get_settings() -> Settings:
         JWT_ALGORITHM=os.getenv("JWT_ALGORITHM", "HS256"),
         JWT_EXPIRATION_HOURS=int(os.getenv("JWT_EXPIRATION_HOURS", "24")),
         OPENWEATHERMAP_API_KEY=os.getenv("OPENWEATHERMAP_API_KEY", ""),
-        PORT=int(os.getenv("PORT", "8002"))
+        PORT=int(os.getenv("PORT", "8002")),
+        DB_POOL_MIN_SIZE=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+        DB_POOL_MAX_SIZE=int(os.getenv("DB_POOL_MAX_SIZE", "20")),
+        DB_POOL_MAX_LIFETIME_SECONDS=int(os.getenv("DB_POOL_MAX_LIFETIME_SECONDS", "1800")),
+        DB_POOL_IDLE_VALIDATION_SECONDS=int(os.getenv("DB_POOL_IDLE_VALIDATION_SECONDS", "30")),
+        DB_POOL_CHECKOUT_TIMEOUT_SECONDS=float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT_SECONDS", "5")),
+        DB_STREAM_MAX_CONCURRENT=int(os.getenv("DB_STREAM_MAX_CONCURRENT", "5")),
+        WEATHER_CACHE_TTL_SECONDS=int(os.getenv("WEATHER_CACHE_TTL_SECONDS", "600")),
+        WEATHER_CACHE_MAX_ENTRIES=int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "1024")),
+        IMPORT_MAX_BYTES=int(os.getenv("IMPORT_MAX_BYTES", "268435456")),
+        JWT_CACHE_TTL_SECONDS=int(os.getenv("JWT_CACHE_TTL_SECONDS", "300")),
+        JWT_CACHE_MAX_ENTRIES=int(os.getenv("JWT_CACHE_MAX_ENTRIES", "10000")),
+        TRIP_CACHE_TTL_SECONDS=int(os.getenv("TRIP_CACHE_TTL_SECONDS", "300")),
+        TRIP_CACHE_MAX_ENTRIES=int(os.getenv("TRIP_CACHE_MAX_ENTRIES", "10000")),
+        INGEST_BUFFER_ENABLED=os.getenv("INGEST_BUFFER_ENABLED", "false").lower() in ("1", "true", "yes"),
+        INGEST_BUFFER_MAX_POINTS=int(os.getenv("INGEST_BUFFER_MAX_POINTS", "100")),
+        INGEST_BUFFER_MAX_LATENCY_SECONDS=float(os.getenv("INGEST_BUFFER_MAX_LATENCY_SECONDS", "2")),
+        INGEST_BUFFER_MAX_TOTAL_POINTS=int(os.getenv("INGEST_BUFFER_MAX_TOTAL_POINTS", "100000")),
+        COORDINATE_PACKING_ENABLED=os.getenv("COORDINATE_PACKING_ENABLED", "false").lower() in ("1", "true", "yes"),
+        ENRICHMENT_RECOVERY_MAX_TRIPS=int(os.getenv("ENRICHMENT_RECOVERY_MAX_TRIPS", "1000"))
     )
 
 settings = get_settings()
@@ -2,8 +2,13 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import logging
-from app.routes import trips, health
+from app.routes import trips, health, heatmap
 from app.config.database import db
+from app.services.enrichment import enrichment_queue
+from app.services.ingest_buffer import ingest_buffer
+from app.config.settings import settings
+from app.services.weather_service import start_weather_client, close_weather_client
+from app.utils.metrics import MetricsMiddleware
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,14 +30,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# added last so it is outermost and times everything, including cors
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(trips.router)
 app.include_router(health.router)
+app.include_router(heatmap.router)
 
 @app.on_event("startup")
 async def startup_event():
     db.initialize()
+    await start_weather_client()
+    if settings.INGEST_BUFFER_ENABLED:
+        ingest_buffer.start()
+    # route/heatmap work queued before a restart or crash is not in memory anymore
+    enrichment_queue.recover(settings.ENRICHMENT_RECOVERY_MAX_TRIPS)
     logger.info("Trip Management Service started successfully")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    # buffered points first, they still need the db pool
+    await ingest_buffer.drain()
+    await enrichment_queue.drain()
+    await close_weather_client()
+    db.close_all_connections()
+    logger.info("Trip Management Service stopped")
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"Unhandled exception: {exc}")
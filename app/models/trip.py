@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 
 class TripStatus(str, Enum):
@@ -9,6 +9,34 @@ class TripStatus(str, Enum):
     FINISHED = "FINISHED"
     CANCELLED = "CANCELLED"
 
+class TripSort(str, Enum):
+    NEWEST = "newest"
+    OLDEST = "oldest"
+    LONGEST = "longest"
+
+class RouteFormat(str, Enum):
+    POLYLINE = "polyline"
+    BINARY = "binary"
+
+class StreamFormat(str, Enum):
+    NDJSON = "ndjson"
+    JSON = "json"
+
+class ExportFormat(str, Enum):
+    GPX = "gpx"
+    GEOJSON = "geojson"
+    CSV = "csv"
+
+class ImportFormat(str, Enum):
+    GPX = "gpx"
+    GEOJSON = "geojson"
+
+class StatsPeriod(str, Enum):
+    WEEK = "week"
+    MONTH = "month"
+    YEAR = "year"
+    ALL = "all"
+
 class TripCreate(BaseModel):
     startTime: datetime
 
@@ -59,6 +87,17 @@ class TripCompleteResponse(BaseModel):
     maxSpeed: float
     weather: Optional[WeatherData] = None
 
+class TripImportResponse(BaseModel):
+    tripId: str
+    status: str
+    pointCount: int
+    startTime: datetime
+    endTime: datetime
+    totalDistance: float
+    duration: int
+    averageSpeed: float
+    maxSpeed: float
+
 class TripSummary(BaseModel):
     tripId: str
     startTime: datetime
@@ -70,6 +109,32 @@ class TripSummary(BaseModel):
 class TripHistoryResponse(BaseModel):
     trips: List[TripSummary]
     total: int
+    nextCursor: Optional[str] = None
+
+class TripSearchResponse(BaseModel):
+    trips: List[TripSummary]
+
+class UserTripStats(BaseModel):
+    """Totals of the users completed trips for the current week/month/year or all time."""
+    period: str
+    periodStart: Optional[date] = None
+    tripCount: int
+    totalDistance: float
+    totalDuration: int
+    averageSpeed: float
+    maxSpeed: float
+
+class LiveTripStats(BaseModel):
+    """Running statistics for a trip, cheap to poll during a ride."""
+    tripId: str
+    status: str
+    pointCount: int
+    totalDistance: float
+    elapsedTime: int
+    currentSpeed: float
+    averageSpeed: float
+    maxSpeed: float
+    lastTimestamp: Optional[datetime] = None
 
 class CoordinateDetail(BaseModel):
     latitude: float
@@ -88,3 +153,15 @@ class TripDetail(BaseModel):
     maxSpeed: Optional[float]
     coordinates: List[CoordinateDetail]
     weather: Optional[WeatherData] = None
+
+class HeatmapCell(BaseModel):
+    geohash: str
+    latitude: float
+    longitude: float
+    tripCount: int
+    totalDistance: float
+    averageSpeed: float
+
+class HeatmapResponse(BaseModel):
+    precision: int
+    cells: List[HeatmapCell]
@@ -1,28 +1,49 @@
 from fastapi import APIRouter, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from datetime import datetime
 import logging
 from app.config.database import db
+from app.services.enrichment import enrichment_queue
+from app.services.weather_service import weather_cache
+from app.utils.geo_utils import timestamp_parse_stats
+from app.utils.security import token_cache
+from app.services.trip_cache import trip_cache
+from app.services.ingest_buffer import ingest_buffer
+from app.utils.metrics import CONTENT_TYPE, Gauge, render_metrics
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# point in time values, read when /metrics is scraped
+Gauge("db_pool_connections", "Open pooled connections", lambda: db.pool_stats().get("size", 0))
+Gauge("db_pool_connections_in_use", "Pooled connections checked out", lambda: db.pool_stats().get("inUse", 0))
+Gauge("db_streams_open", "Streamed downloads holding a pooled connection", lambda: db.pool_stats().get("openStreams", 0))
+Gauge("enrichment_pending_jobs", "Trips waiting for weather enrichment", lambda: len(enrichment_queue.pending()))
+Gauge("ingest_buffered_points", "Single points waiting in the write-behind buffer", lambda: ingest_buffer.stats()["bufferedPoints"])
+
+def _ping(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint."""
     try:
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        cursor.fetchone()
-        cursor.close()
-        db.return_connection(conn)
-        
+        await db.run(_ping)
+
         return {
             "message": "healthy",
             "service": "BBP Trip Management Service",
             "timestamp": datetime.utcnow().isoformat(),
-            "version": "1.0.0"
+            "version": "1.0.0",
+            "database": db.pool_stats(),
+            "pendingEnrichment": len(enrichment_queue.pending()),
+            "weatherCache": weather_cache.stats(),
+            "timestampParsing": timestamp_parse_stats(),
+            "tokenCache": token_cache.stats(),
+            "tripCache": trip_cache.stats(),
+            "ingestBuffer": ingest_buffer.stats()
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
@@ -32,6 +53,18 @@ async def health_check():
                 "message": "unhealthy",
                 "service": "BBP Trip Management Service",
                 "timestamp": datetime.utcnow().isoformat(),
-                "error": str(e)
+                "error": str(e),
+                "database": db.pool_stats()
             }
         )
+
+@router.get("/health/enrichment")
+async def enrichment_status():
+    """List trips still waiting for background weather enrichment."""
+    pending = enrichment_queue.pending()
+    return {"pending": len(pending), "jobs": pending}
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of the service metrics."""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
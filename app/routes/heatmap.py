@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+import logging
+from app.config.database import db
+from app.models.trip import HeatmapCell, HeatmapResponse
+from app.services.heatmap import fetch_heatmap, heatmap_precision
+from app.services.spatial_index import parse_bbox
+from app.utils.exceptions import PoolTimeoutException
+from app.utils.security import get_current_user
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("/heatmap", response_model=HeatmapResponse)
+async def get_heatmap(
+    bbox: str,
+    zoom: int = Query(12, ge=0, le=22),
+    limit: int = Query(2000, ge=1, le=10000),
+    user_id: str = Depends(get_current_user)
+):
+    """
+    Usage of path cells inside bbox (minLon,minLat,maxLon,maxLat) across all riders,
+    busiest first. zoom picks the geohash level, only the aggregate table is read.
+    """
+    try:
+        box = parse_bbox(bbox)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid bbox, expected minLon,minLat,maxLon,maxLat")
+    precision = heatmap_precision(zoom)
+    try:
+        results = await db.run(fetch_heatmap, box, precision, limit)
+        cells = [
+            HeatmapCell(
+                geohash=geohash, latitude=center_lat, longitude=center_lon, tripCount=trip_count,
+                totalDistance=round(distance, 1),
+                averageSpeed=round(distance / duration, 2) if duration > 0 else 0.0
+            )
+            for geohash, center_lat, center_lon, trip_count, distance, duration in results
+        ]
+        return HeatmapResponse(precision=precision, cells=cells)
+    except PoolTimeoutException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"Error fetching heatmap: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch heatmap")
@@ -1,27 +1,540 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+import json
+import tempfile
 import uuid
 from datetime import datetime
 import logging
+from psycopg2.extras import Json
 
 from app.models.trip import (
     TripCreate, TripResponse, CoordinateInput, CoordinateResponse,
     TripComplete, TripCompleteResponse, TripHistoryResponse, TripDetail,
     TripSummary, CoordinateDetail, WeatherData, BatchCoordinatesInput,
-    BatchCoordinatesResponse
+    BatchCoordinatesResponse, LiveTripStats, TripSort, RouteFormat,
+    StreamFormat, ExportFormat, ImportFormat, TripImportResponse, StatsPeriod,
+    UserTripStats, TripSearchResponse
 )
 from app.utils.security import get_current_user
-from app.utils.geo_utils import calculate_trip_statistics
-from app.services.weather_service import fetch_current_weather
+from app.utils.geo_utils import (
+    calculate_trip_statistics, TripStatsAccumulator, simplify_route, simplify_route_to_count
+)
+from app.services.enrichment import enrichment_queue
+from app.services.route_service import fetch_simplified_route, fetch_route_rows
+from app.utils.route_encoding import (
+    encode_route_polyline, encode_route_binary, POLYLINE_MEDIA_TYPE, BINARY_MEDIA_TYPE
+)
+from app.services.export_service import (
+    COORDINATES_STREAM_QUERY, EXPORT_COORDINATES_QUERY, EXPORT_WRITERS, export_filename,
+    export_trip_body, export_trips_zip
+)
+from app.services.import_service import (
+    IMPORT_CHUNK_SIZE, IMPORT_PARSERS, import_format_from_content_type
+)
+from app.services.trip_cache import trip_cache
+from app.services.ingest_buffer import ingest_buffer
+from app.services.live_stats import live_stats, build_live_snapshot, live_etag
+from app.services.user_stats import (
+    add_trip_to_daily_stats, fetch_user_stats, remove_trip_from_daily_stats
+)
+from app.services.heatmap import remove_trip_from_heatmap
+from app.services.spatial_index import index_trip, parse_bbox, search_trips_in_bbox
+from app.services.coordinate_store import (
+    advance_running_stats, insert_coordinate, insert_coordinates, pack_trip_coordinates,
+    reserve_sequence, save_trip_progress, to_db_row
+)
 from app.config.database import db
+from app.config.settings import settings
 from app.utils.exceptions import (
     TripNotFoundException, TripAlreadyCompletedException,
-    UnauthorizedTripAccessException, NoCoordinatesException
+    UnauthorizedTripAccessException, NoCoordinatesException, PoolTimeoutException,
+    LiveStatsUnavailableException, InvalidCursorException, ImportFormatException,
+    IngestBufferFullException
 )
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.metrics import BATCH_SIZE
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+
+# db work below runs on the db thread pool via db.run(), one transaction each.
+# the route handlers only await it and map exceptions to http errors
+
+def _check_cached_trip(trip_id: str, user_id: str, recording: bool = True) -> bool:
+    """
+    reject writes the trip cache already knows will fail, without a query
+    returns True if the cache knew the trip (and it passed)
+    """
+    cached = trip_cache.get(trip_id)
+    if cached is None:
+        return False
+    owner, trip_status = cached
+    if owner != user_id:
+        raise UnauthorizedTripAccessException("User does not own this trip")
+    if recording and trip_status != 'RECORDING':
+        raise TripAlreadyCompletedException("Trip already completed")
+    return True
+
+
+def _verify_recording_trip(conn, trip_id: str, user_id: str):
+    with conn.cursor() as cursor:
+        _check_recording_trip(cursor, trip_id, user_id)
+
+
+def _check_recording_trip(cursor, trip_id: str, user_id: str):
+    """make sure trip exists, belongs to user and is still recording"""
+    cursor.execute("""
+        SELECT user_id, status FROM trips WHERE trip_id = %s
+    """, (trip_id,))
+    result = cursor.fetchone()
+    if not result:
+        raise TripNotFoundException("Trip not found")
+    trip_user_id, trip_status = result
+    trip_cache.set(trip_id, trip_user_id, trip_status)
+    if trip_user_id != user_id:
+        raise UnauthorizedTripAccessException("User does not own this trip")
+    if trip_status != 'RECORDING':
+        raise TripAlreadyCompletedException("Trip already completed")
+
+
+def _reserve_recording_sequence(cursor, trip_id: str, user_id: str):
+    """
+    guarded sequence reservation, the lookup SELECT only runs when the guard
+    fails so the caller gets the right error (404/403/400)
+    """
+    reserved = reserve_sequence(cursor, trip_id, user_id)
+    if reserved is None:
+        _check_recording_trip(cursor, trip_id, user_id)
+        # trip changed between the two statements
+        raise TripAlreadyCompletedException("Trip already completed")
+    return reserved
+
+
+def _insert_trip(conn, trip_id: str, user_id: str, start_time: datetime):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO trips (trip_id, user_id, start_time, status, created_date, running_stats)
+            VALUES (%s, %s, %s, 'RECORDING', CURRENT_TIMESTAMP, %s)
+        """, (trip_id, user_id, start_time, Json(TripStatsAccumulator().to_state())))
+
+
+def _insert_coordinate(conn, trip_id: str, user_id: str, coordinate: CoordinateInput):
+    with conn.cursor() as cursor:
+        sequence_order, running_stats = _reserve_recording_sequence(cursor, trip_id, user_id)
+        row = to_db_row(
+            coordinate.latitude, coordinate.longitude, coordinate.timestamp, coordinate.elevation
+        )
+        coordinate_id = str(uuid.uuid4())
+        acc = advance_running_stats(running_stats, [row])
+        insert_coordinate(cursor, trip_id, row, sequence_order, coordinate_id, acc)
+        return coordinate_id, acc
+
+
+def _insert_coordinates_batch(conn, trip_id: str, user_id: str, coordinates: List[CoordinateInput]):
+    with conn.cursor() as cursor:
+        # lock the trip for the whole batch, checks ownership and status
+        # in the same statement
+        first_sequence, running_stats = _reserve_recording_sequence(cursor, trip_id, user_id)
+
+        # insert all the coords in one go (multi-row VALUES or COPY for big ones)
+        rows = [
+            to_db_row(coord.latitude, coord.longitude, coord.timestamp, coord.elevation)
+            for coord in coordinates
+        ]
+        added_count = insert_coordinates(cursor, trip_id, rows, first_sequence)
+        acc = advance_running_stats(running_stats, rows)
+        save_trip_progress(cursor, trip_id, first_sequence + added_count, acc)
+        return added_count, acc
+
+
+def _complete_trip(conn, trip_id: str, user_id: str, end_time: datetime):
+    """compute stats and mark trip completed, returns (stats, midpoint lat/lon)"""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT user_id, status, running_stats, start_time FROM trips WHERE trip_id = %s FOR UPDATE
+        """, (trip_id,))
+        result = cursor.fetchone()
+        if not result:
+            raise TripNotFoundException("Trip not found")
+        trip_user_id, trip_status, running_stats, start_time = result
+        trip_cache.set(trip_id, trip_user_id, trip_status)
+        if trip_user_id != user_id:
+            raise UnauthorizedTripAccessException("User does not own this trip")
+        if trip_status != 'RECORDING':
+            raise TripAlreadyCompletedException("Trip already completed")
+
+        acc = TripStatsAccumulator.from_state(running_stats) if running_stats else None
+        midpoint = None
+        if acc is not None and acc.in_order and acc.point_count > 0:
+            # stats were kept up to date during ingestion, no need to read every point.
+            # OFFSET instead of a sequence number so gaps or the numbering start dont matter
+            cursor.execute("""
+                SELECT latitude, longitude FROM trip_coordinates
+                WHERE trip_id = %s ORDER BY sequence_order OFFSET %s LIMIT 1
+            """, (trip_id, acc.point_count // 2))
+            midpoint = cursor.fetchone()
+        if midpoint is not None:
+            stats = acc.result()
+            mid_lat, mid_lon = midpoint
+        else:
+            # points arrived out of order, trip predates running stats or
+            # the state doesnt match the stored rows
+            cursor.execute("""
+                SELECT latitude, longitude, timestamp
+                FROM trip_coordinates WHERE trip_id = %s ORDER BY sequence_order
+            """, (trip_id,))
+            coordinates = cursor.fetchall()
+            if len(coordinates) < 1:
+                raise NoCoordinatesException("Trip has no coordinates")
+            stats = calculate_trip_statistics(coordinates)
+            mid_lat, mid_lon, mid_time = coordinates[len(coordinates) // 2]
+
+        cursor.execute("""
+            UPDATE trips
+            SET end_time = %s, status = 'COMPLETED', total_distance = %s,
+                duration = %s, average_speed = %s, max_speed = %s
+            WHERE trip_id = %s
+        """, (
+            end_time, stats['total_distance'], stats['duration'],
+            stats['average_speed'], stats['max_speed'], trip_id
+        ))
+        add_trip_to_daily_stats(cursor, user_id, start_time, stats)
+        index_trip(cursor, trip_id, user_id)
+        if settings.COORDINATE_PACKING_ENABLED:
+            pack_trip_coordinates(cursor, trip_id, start_time)
+        return stats, (float(mid_lat), float(mid_lon))
+
+
+def _import_trip(conn, trip_id: str, user_id: str, points) -> dict:
+    """
+    create a completed trip from parsed file points in one transaction
+    points are COPYed in IMPORT_CHUNK_SIZE chunks and fed to the stats
+    accumulator in the same pass, so the file is never held in memory
+    """
+    acc = TripStatsAccumulator()
+    # 1-based like live uploads (trips.next_sequence starts at 1)
+    next_sequence = 1
+    chunk = []
+    start_time = end_time = None
+    with conn.cursor() as cursor:
+        for lat, lon, ts, ele in points:
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                raise ImportFormatException(f"Coordinate out of range: {lat}, {lon}")
+            row = to_db_row(lat, lon, ts, ele)
+            if start_time is None:
+                # trip row has to exist before the first COPY
+                cursor.execute("""
+                    INSERT INTO trips (trip_id, user_id, start_time, status, created_date)
+                    VALUES (%s, %s, %s, 'RECORDING', CURRENT_TIMESTAMP)
+                """, (trip_id, user_id, row[2]))
+                start_time = end_time = row[2]
+            start_time = min(start_time, row[2])
+            end_time = max(end_time, row[2])
+            acc.add(row[0], row[1], row[2])
+            chunk.append(row)
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                next_sequence += insert_coordinates(cursor, trip_id, chunk, next_sequence)
+                chunk = []
+        next_sequence += insert_coordinates(cursor, trip_id, chunk, next_sequence)
+        count = next_sequence - 1
+        if count < 1:
+            raise NoCoordinatesException("File has no timed points")
+
+        if acc.in_order:
+            stats = acc.result()
+        else:
+            # file points are not in time order, same fallback as complete_trip
+            cursor.execute("""
+                SELECT latitude, longitude, timestamp
+                FROM trip_coordinates WHERE trip_id = %s ORDER BY sequence_order
+            """, (trip_id,))
+            stats = calculate_trip_statistics(cursor.fetchall())
+
+        cursor.execute("""
+            UPDATE trips
+            SET start_time = %s, end_time = %s, status = 'COMPLETED', total_distance = %s,
+                duration = %s, average_speed = %s, max_speed = %s,
+                next_sequence = %s, running_stats = %s
+            WHERE trip_id = %s
+        """, (
+            start_time, end_time, stats['total_distance'], stats['duration'],
+            stats['average_speed'], stats['max_speed'], next_sequence, Json(acc.to_state()), trip_id
+        ))
+        add_trip_to_daily_stats(cursor, user_id, start_time, stats)
+        index_trip(cursor, trip_id, user_id)
+        if settings.COORDINATE_PACKING_ENABLED:
+            pack_trip_coordinates(cursor, trip_id, start_time)
+        return {"point_count": count, "start_time": start_time, "end_time": end_time, **stats}
+
+
+def _delete_trip(conn, trip_id: str, user_id: str):
+    with conn.cursor() as cursor:
+        # Verify trip exists and belongs to user, locked so a concurrent
+        # complete cant slip in between and leave the daily rollup off
+        cursor.execute("""
+            SELECT user_id, status, start_time, total_distance, duration, max_speed
+            FROM trips WHERE trip_id = %s FOR UPDATE
+        """, (trip_id,))
+        result = cursor.fetchone()
+
+        if not result:
+            raise TripNotFoundException("Trip not found")
+
+        if result[0] != user_id:
+            raise UnauthorizedTripAccessException("User does not own this trip")
+
+        if result[1] == 'COMPLETED':
+            remove_trip_from_daily_stats(cursor, trip_id, user_id, *result[2:])
+
+        # Delete associated weather data first (foreign key constraint)
+        cursor.execute("""
+            DELETE FROM trip_weather WHERE trip_id = %s
+        """, (trip_id,))
+
+        # Take it out of the heatmap while its simplified route is still there
+        remove_trip_from_heatmap(cursor, trip_id)
+
+        # Delete spatial index cells
+        cursor.execute("""
+            DELETE FROM trip_grid_cells WHERE trip_id = %s
+        """, (trip_id,))
+
+        # Delete precomputed simplified routes
+        cursor.execute("""
+            DELETE FROM trip_route_simplified WHERE trip_id = %s
+        """, (trip_id,))
+
+        # Delete associated coordinates (foreign key constraint)
+        cursor.execute("""
+            DELETE FROM trip_coordinates WHERE trip_id = %s
+        """, (trip_id,))
+        cursor.execute("""
+            DELETE FROM trip_coordinates_packed WHERE trip_id = %s AND start_time = %s
+        """, (trip_id, result[2]))
+
+        # Delete the trip itself
+        cursor.execute("""
+            DELETE FROM trips WHERE trip_id = %s
+        """, (trip_id,))
+
+
+def _fetch_live_state(conn, trip_id: str):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT user_id, status, running_stats FROM trips WHERE trip_id = %s
+        """, (trip_id,))
+        result = cursor.fetchone()
+        if not result:
+            raise TripNotFoundException("Trip not found")
+        return result
+
+
+# sort option -> (keyset column, direction)
+_HISTORY_SORTS = {
+    TripSort.NEWEST: ("start_time", "DESC"),
+    TripSort.OLDEST: ("start_time", "ASC"),
+    TripSort.LONGEST: ("total_distance", "DESC"),
+}
+
+
+def _fetch_trip_history(conn, user_id: str, sort: TripSort, limit: int, cursor_value,
+                        cursor_trip_id, from_date, to_date, min_distance):
+    """one page of completed trips plus the filtered total, keyset on (sort column, trip_id)"""
+    column, direction = _HISTORY_SORTS[sort]
+    filters = ["user_id = %s", "status = 'COMPLETED'"]
+    params = [user_id]
+    if from_date is not None:
+        filters.append("start_time >= %s")
+        params.append(from_date)
+    if to_date is not None:
+        filters.append("start_time < %s")
+        params.append(to_date)
+    if min_distance is not None:
+        filters.append("total_distance >= %s")
+        params.append(min_distance)
+    where = " AND ".join(filters)
+
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM trips WHERE {where}", params)
+        total = cursor.fetchone()[0]
+
+        page_filter = ""
+        page_params = list(params)
+        if cursor_trip_id is not None:
+            op = "<" if direction == "DESC" else ">"
+            page_filter = f" AND ({column}, trip_id) {op} (%s, %s)"
+            page_params += [cursor_value, cursor_trip_id]
+        cursor.execute(f"""
+            SELECT trip_id, start_time, end_time, total_distance, duration, average_speed
+            FROM trips WHERE {where}{page_filter}
+            ORDER BY {column} {direction}, trip_id {direction}
+            LIMIT %s
+        """, page_params + [limit + 1])
+        return cursor.fetchall(), total
+
+
+def _check_trip_owner(conn, trip_id: str, user_id: str):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT user_id FROM trips WHERE trip_id = %s", (trip_id,))
+        result = cursor.fetchone()
+        if not result:
+            raise TripNotFoundException("Trip not found")
+        if result[0] != user_id:
+            raise UnauthorizedTripAccessException("User does not own this trip")
+
+
+_EXPORT_TRIP_COLUMNS = """
+    trip_id, user_id, start_time, end_time, total_distance, duration, average_speed, max_speed
+"""
+
+
+def _export_trip_dict(row) -> dict:
+    return {
+        "trip_id": str(row[0]),
+        "start_time": row[2],
+        "end_time": row[3],
+        "total_distance": row[4],
+        "duration": row[5],
+        "average_speed": row[6],
+        "max_speed": row[7],
+    }
+
+
+def _fetch_export_trip(conn, trip_id: str, user_id: str) -> dict:
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT {_EXPORT_TRIP_COLUMNS} FROM trips WHERE trip_id = %s", (trip_id,))
+        result = cursor.fetchone()
+        if not result:
+            raise TripNotFoundException("Trip not found")
+        if result[1] != user_id:
+            raise UnauthorizedTripAccessException("User does not own this trip")
+        return _export_trip_dict(result)
+
+
+def _fetch_export_trips(conn, user_id: str) -> List[dict]:
+    with conn.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT {_EXPORT_TRIP_COLUMNS} FROM trips
+            WHERE user_id = %s ORDER BY start_time, trip_id
+        """, (user_id,))
+        return [_export_trip_dict(row) for row in cursor.fetchall()]
+
+
+def _coordinate_json(row) -> str:
+    # hand rolled since json.dumps per point dominates on long trips
+    elevation = "null" if row[3] is None else repr(row[3])
+    return (
+        f'{{"latitude":{row[0]!r},"longitude":{row[1]!r},'
+        f'"timestamp":"{row[2].isoformat()}","elevation":{elevation}}}'
+    )
+
+
+async def _ndjson_body(stream):
+    async for rows in stream.chunks():
+        yield "".join(_coordinate_json(row) + "\n" for row in rows)
+
+
+async def _json_array_body(trip_id: str, stream):
+    yield f'{{"tripId":"{trip_id}","coordinates":['
+    first = True
+    async for rows in stream.chunks():
+        chunk = ",".join(_coordinate_json(row) for row in rows)
+        yield chunk if first else "," + chunk
+        first = False
+    yield "]}"
+
+
+def _fetch_trip_detail(conn, trip_id: str, user_id: str, tolerance: Optional[float] = None,
+                       max_points: Optional[int] = None, compact: bool = False):
+    """
+    trip row, route and weather row. with compact the route comes back as
+    (lat, lon, epoch ms, elevation) tuples for the polyline/binary encoders
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT user_id, start_time, end_time, total_distance, duration, average_speed, max_speed
+            FROM trips WHERE trip_id = %s
+        """, (trip_id,))
+        trip_result = cursor.fetchone()
+        if not trip_result:
+            raise TripNotFoundException("Trip not found")
+        trip_user_id = trip_result[0]
+        if trip_user_id != user_id:
+            raise UnauthorizedTripAccessException("User does not own this trip")
+        coord_results = None
+        if compact:
+            coord_results = fetch_route_rows(cursor, trip_id, tolerance if max_points is None else None)
+            if max_points is not None:
+                coord_results = simplify_route_to_count(coord_results, max_points, tolerance or 1.0)
+        elif tolerance is not None and max_points is None:
+            # stored levels are precomputed on completion (or on first read)
+            coord_results = fetch_simplified_route(cursor, trip_id, tolerance)
+        if coord_results is None:
+            cursor.execute("""
+                SELECT latitude, longitude, timestamp, elevation
+                FROM trip_points(%s) ORDER BY sequence_order
+            """, (trip_id,))
+            coord_results = cursor.fetchall()
+            if max_points is not None:
+                coord_results = simplify_route_to_count(coord_results, max_points, tolerance or 1.0)
+            elif tolerance is not None:
+                coord_results = simplify_route(coord_results, tolerance)
+        cursor.execute("""
+            SELECT temperature, conditions, wind_speed, wind_direction
+            FROM trip_weather WHERE trip_id = %s
+        """, (trip_id,))
+        weather_result = cursor.fetchone()
+        return trip_result, coord_results, weather_result
+
+
+def _weather_from_row(weather_result) -> Optional[WeatherData]:
+    if not weather_result:
+        return None
+    return WeatherData(
+        temperature=float(weather_result[0]) if weather_result[0] else None,
+        conditions=weather_result[1],
+        windSpeed=float(weather_result[2]) if weather_result[2] else None,
+        windDirection=weather_result[3]
+    )
+
+
+def _negotiate_route_format(accept: Optional[str]) -> Optional[RouteFormat]:
+    """pick a compact route format from the Accept header, None means plain json"""
+    if not accept:
+        return None
+    if BINARY_MEDIA_TYPE in accept:
+        return RouteFormat.BINARY
+    if POLYLINE_MEDIA_TYPE in accept:
+        return RouteFormat.POLYLINE
+    return None
+
+
+def _route_response(trip_id: str, route_format: RouteFormat, route_rows: list, trip_result=None,
+                    weather_result=None) -> Response:
+    """encode route rows as polyline json (with trip info if given) or packed binary"""
+    if route_format == RouteFormat.BINARY:
+        return Response(
+            content=encode_route_binary(route_rows), media_type=BINARY_MEDIA_TYPE,
+            headers={"X-Point-Count": str(len(route_rows))}
+        )
+    body = {"tripId": trip_id, "route": encode_route_polyline(route_rows)}
+    if trip_result is not None:
+        weather_data = _weather_from_row(weather_result)
+        body.update({
+            "userId": str(trip_result[0]),
+            "startTime": trip_result[1].isoformat(),
+            "endTime": trip_result[2].isoformat() if trip_result[2] else None,
+            "totalDistance": float(trip_result[3]) if trip_result[3] else None,
+            "duration": trip_result[4],
+            "averageSpeed": float(trip_result[5]) if trip_result[5] else None,
+            "maxSpeed": float(trip_result[6]) if trip_result[6] else None,
+            "weather": weather_data.model_dump() if weather_data else None,
+        })
+    return Response(content=json.dumps(body), media_type=POLYLINE_MEDIA_TYPE)
+
+
 @router.post("/trips", response_model=TripResponse, status_code=status.HTTP_201_CREATED)
 async def create_trip(
     trip_data: TripCreate,
@@ -29,30 +542,84 @@ async def create_trip(
 ):
     """create new trip (start recoridng gps)"""
     trip_id = str(uuid.uuid4())
-    conn = db.get_connection()
     try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO trips (trip_id, user_id, start_time, status, created_date)
-            VALUES (%s, %s, %s, 'RECORDING', CURRENT_TIMESTAMP)
-        """, (trip_id, user_id, trip_data.startTime))
-        conn.commit()
-        cursor.close()
+        await db.run(_insert_trip, trip_id, user_id, trip_data.startTime)
+        trip_cache.set(trip_id, user_id, "RECORDING")
         return TripResponse(
             tripId=trip_id,
             userId=user_id,
             startTime=trip_data.startTime,
             status="RECORDING"
         )
+    except PoolTimeoutException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, please retry")
     except Exception as e:
-        conn.rollback()
         logger.error(f"Error creating trip: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create trip"
         )
+
+async def _spool_upload(request: Request, max_bytes: int):
+    """copy the request body to a temp file so parsing can stream from disk"""
+    spool = tempfile.NamedTemporaryFile(prefix="trip-import-")
+    size = 0
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Import file too large"
+                )
+            spool.write(chunk)
+        spool.flush()
+        return spool
+    except BaseException:
+        spool.close()
+        raise
+
+
+@router.post("/trips/import", response_model=TripImportResponse, status_code=status.HTTP_201_CREATED)
+async def import_trip(
+    request: Request,
+    user_id: str = Depends(get_current_user),
+    format: Optional[ImportFormat] = None
+):
+    """
+    create a completed trip from an uploaded gpx or geojson file, sent as the
+    raw request body. format is taken from Content-Type unless given
+    """
+    import_format = format.value if format else import_format_from_content_type(request.headers.get("content-type"))
+    if import_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send application/gpx+xml or application/geo+json, or pass format"
+        )
+    spool = await _spool_upload(request, settings.IMPORT_MAX_BYTES)
+    try:
+        trip_id = str(uuid.uuid4())
+        points = IMPORT_PARSERS[import_format](spool.name)
+        result = await db.run(_import_trip, trip_id, user_id, points)
+        trip_cache.set(trip_id, user_id, "COMPLETED")
+        enrichment_queue.schedule(trip_id)
+        return TripImportResponse(
+            tripId=trip_id, status="COMPLETED", pointCount=result['point_count'],
+            startTime=result['start_time'], endTime=result['end_time'],
+            totalDistance=result['total_distance'], duration=result['duration'],
+            averageSpeed=result['average_speed'], maxSpeed=result['max_speed']
+        )
+    except ImportFormatException as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except NoCoordinatesException:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File has no timed points")
+    except PoolTimeoutException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"Error importing trip: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to import trip")
     finally:
-        db.return_connection(conn)
+        spool.close()
+
 
 @router.post("/trips/{trip_id}/coordinates", response_model=CoordinateResponse, status_code=status.HTTP_201_CREATED)
 async def add_coordinate(
@@ -60,37 +627,25 @@ async def add_coordinate(
     coordinate: CoordinateInput,
     user_id: str = Depends(get_current_user)
 ):
-    """add gps coordniate to active trip"""
-    conn = db.get_connection()
+    """
+    add gps coordniate to active trip
+    with INGEST_BUFFER_ENABLED the point is acked here and written in bulk
+    by the ingest buffer shortly after
+    """
     try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT user_id, status FROM trips WHERE trip_id = %s
-        """, (trip_id,))
-        result = cursor.fetchone()
-        if not result:
-            raise TripNotFoundException("Trip not found")
-        trip_user_id, trip_status = result
-        if trip_user_id != user_id:
-            raise UnauthorizedTripAccessException("User does not own this trip")
-        if trip_status != 'RECORDING':
-            raise TripAlreadyCompletedException("Trip already completed")
-        cursor.execute("""
-            SELECT COALESCE(MAX(sequence_order), 0) + 1
-            FROM trip_coordinates WHERE trip_id = %s
-        """, (trip_id,))
-        sequence_order = cursor.fetchone()[0]
-        coordinate_id = str(uuid.uuid4())
-        cursor.execute("""
-            INSERT INTO trip_coordinates
-            (coordinate_id, trip_id, latitude, longitude, timestamp, elevation, sequence_order)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        """, (
-            coordinate_id, trip_id, coordinate.latitude, coordinate.longitude,
-            coordinate.timestamp, coordinate.elevation, sequence_order
-        ))
-        conn.commit()
-        cursor.close()
+        if settings.INGEST_BUFFER_ENABLED:
+            if not _check_cached_trip(trip_id, user_id):
+                await db.run(_verify_recording_trip, trip_id, user_id)
+            row = to_db_row(
+                coordinate.latitude, coordinate.longitude, coordinate.timestamp, coordinate.elevation
+            )
+            coordinate_id = str(uuid.uuid4())
+            await ingest_buffer.add(trip_id, user_id, row, coordinate_id)
+            return CoordinateResponse(coordinateId=coordinate_id, message="Coordinate added")
+        _check_cached_trip(trip_id, user_id)
+        coordinate_id, acc = await db.run(_insert_coordinate, trip_id, user_id, coordinate)
+        if acc is not None:
+            live_stats.update(trip_id, user_id, "RECORDING", acc)
         return CoordinateResponse(coordinateId=coordinate_id, message="Coordinate added")
     except TripNotFoundException:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found")
@@ -98,12 +653,11 @@ async def add_coordinate(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User does not own this trip")
     except TripAlreadyCompletedException:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Trip already completed")
+    except (PoolTimeoutException, IngestBufferFullException):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, please retry")
     except Exception as e:
-        conn.rollback()
         logger.error(f"Error adding coordinate: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to add coordinate")
-    finally:
-        db.return_connection(conn)
 
 
 @router.post("/trips/{trip_id}/coordinates/batch", response_model=BatchCoordinatesResponse, status_code=status.HTTP_201_CREATED)
@@ -113,71 +667,33 @@ async def add_coordinates_batch(
     user_id: str = Depends(get_current_user)
 ):
     """add multiple gps coords in one request (way more eficient)"""
-    conn = db.get_connection()
+    BATCH_SIZE.observe(len(batch.coordinates))
     try:
-        cursor = conn.cursor()
-        
-        # check trip ownership and status first
-        cursor.execute("""
-            SELECT user_id, status FROM trips WHERE trip_id = %s
-        """, (trip_id,))
-        result = cursor.fetchone()
-        
-        if not result:
-            raise TripNotFoundException("Trip not found")
-        
-        trip_user_id, trip_status = result
-        
-        if trip_user_id != user_id:
-            raise UnauthorizedTripAccessException("User does not own this trip")
-        
-        if trip_status != 'RECORDING':
-            raise TripAlreadyCompletedException("Trip already completed")
-        
-        # get max sequence order so we know where to start
-        cursor.execute("""
-            SELECT COALESCE(MAX(sequence_order), 0) FROM trip_coordinates WHERE trip_id = %s
-        """, (trip_id,))
-        current_max = cursor.fetchone()[0]
-        
-        # insert all the coords in batch
-        added_count = 0
-        for i, coord in enumerate(batch.coordinates):
-            coordinate_id = str(uuid.uuid4())
-            sequence_order = current_max + i + 1
-            
-            cursor.execute("""
-                INSERT INTO trip_coordinates
-                (coordinate_id, trip_id, latitude, longitude, timestamp, elevation, sequence_order)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                coordinate_id, trip_id, coord.latitude, coord.longitude,
-                coord.timestamp, coord.elevation, sequence_order
-            ))
-            added_count += 1
-        
-        conn.commit()
-        cursor.close()
-        
+        _check_cached_trip(trip_id, user_id)
+        # buffered single points came first, keep them ahead of this batch
+        await ingest_buffer.flush_trip(trip_id)
+        added_count, acc = await db.run(_insert_coordinates_batch, trip_id, user_id, batch.coordinates)
+        if acc is not None:
+            live_stats.update(trip_id, user_id, "RECORDING", acc)
+
         logger.info(f"Added {added_count} coordinates to trip {trip_id}")
-        
+
         return BatchCoordinatesResponse(
             addedCount=added_count,
             message=f"Successfully added {added_count} coordinates"
         )
-        
+
     except TripNotFoundException:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found")
     except UnauthorizedTripAccessException:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User does not own this trip")
     except TripAlreadyCompletedException:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Trip already completed")
+    except PoolTimeoutException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, please retry")
     except Exception as e:
-        conn.rollback()
         logger.error(f"Error adding batch coordinates: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to add coordinates")
-    finally:
-        db.return_connection(conn)
 
 
 @router.put("/trips/{trip_id}/complete", response_model=TripCompleteResponse)
@@ -186,64 +702,23 @@ async def complete_trip(
     trip_complete: TripComplete,
     user_id: str = Depends(get_current_user)
 ):
-    """mark trip as done and calc final stats"""
-    conn = db.get_connection()
+    """
+    mark trip as done and calc final stats
+    weather is fetched in the background after commit, see GET /health/enrichment
+    """
     try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT user_id, status FROM trips WHERE trip_id = %s
-        """, (trip_id,))
-        result = cursor.fetchone()
-        if not result:
-            raise TripNotFoundException("Trip not found")
-        trip_user_id, trip_status = result
-        if trip_user_id != user_id:
-            raise UnauthorizedTripAccessException("User does not own this trip")
-        if trip_status != 'RECORDING':
-            raise TripAlreadyCompletedException("Trip already completed")
-        cursor.execute("""
-            SELECT latitude, longitude, timestamp
-            FROM trip_coordinates WHERE trip_id = %s ORDER BY sequence_order
-        """, (trip_id,))
-        coordinates = cursor.fetchall()
-        if len(coordinates) < 1:
-            raise NoCoordinatesException("Trip has no coordinates")
-        stats = calculate_trip_statistics(coordinates)
-        cursor.execute("""
-            UPDATE trips
-            SET end_time = %s, status = 'COMPLETED', total_distance = %s,
-                duration = %s, average_speed = %s, max_speed = %s
-            WHERE trip_id = %s
-        """, (
-            trip_complete.endTime, stats['total_distance'], stats['duration'],
-            stats['average_speed'], stats['max_speed'], trip_id
-        ))
-        weather_data = None
-        if coordinates:
-            mid_idx = len(coordinates) // 2
-            mid_lat, mid_lon, mid_time = coordinates[mid_idx]
-            try:
-                weather_result = await fetch_current_weather(mid_lat, mid_lon)
-                if weather_result:
-                    weather_id = str(uuid.uuid4())
-                    cursor.execute("""
-                        INSERT INTO trip_weather
-                        (weather_id, trip_id, temperature, conditions, wind_speed, wind_direction, humidity)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    """, (
-                        weather_id, trip_id, weather_result.get('temperature'),
-                        weather_result.get('conditions'), weather_result.get('wind_speed'),
-                        weather_result.get('wind_direction'), weather_result.get('humidity')
-                    ))
-                    weather_data = WeatherData(**weather_result)
-            except Exception as e:
-                logger.warning(f"Weather service error (non-blocking): {e}")
-        conn.commit()
-        cursor.close()
+        _check_cached_trip(trip_id, user_id)
+        await ingest_buffer.flush_trip(trip_id)
+        stats, (mid_lat, mid_lon) = await db.run(
+            _complete_trip, trip_id, user_id, trip_complete.endTime
+        )
+        trip_cache.set(trip_id, user_id, "COMPLETED")
+        live_stats.discard(trip_id)
+        enrichment_queue.schedule(trip_id, mid_lat, mid_lon)
         return TripCompleteResponse(
             tripId=trip_id, status="COMPLETED", totalDistance=stats['total_distance'],
             duration=stats['duration'], averageSpeed=stats['average_speed'],
-            maxSpeed=stats['max_speed'], weather=weather_data
+            maxSpeed=stats['max_speed'], weather=None
         )
     except TripNotFoundException:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found")
@@ -253,12 +728,11 @@ async def complete_trip(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Trip already completed")
     except NoCoordinatesException:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Trip has no coordinates")
+    except PoolTimeoutException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, please retry")
     except Exception as e:
-        conn.rollback()
         logger.error(f"Error completing trip: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to complete trip")
-    finally:
-        db.return_connection(conn)
 
 
 @router.delete("/trips/{trip_id}", status_code=status.HTTP_200_OK)
@@ -267,68 +741,56 @@ async def delete_trip(
     user_id: str = Depends(get_current_user)
 ):
     """Delete a trip and all its associated data (coordinates, weather)."""
-    conn = db.get_connection()
     try:
-        cursor = conn.cursor()
-        
-        # Verify trip exists and belongs to user
-        cursor.execute("""
-            SELECT user_id FROM trips WHERE trip_id = %s
-        """, (trip_id,))
-        result = cursor.fetchone()
-        
-        if not result:
-            raise TripNotFoundException("Trip not found")
-        
-        if result[0] != user_id:
-            raise UnauthorizedTripAccessException("User does not own this trip")
-        
-        # Delete associated weather data first (foreign key constraint)
-        cursor.execute("""
-            DELETE FROM trip_weather WHERE trip_id = %s
-        """, (trip_id,))
-        
-        # Delete associated coordinates (foreign key constraint)
-        cursor.execute("""
-            DELETE FROM trip_coordinates WHERE trip_id = %s
-        """, (trip_id,))
-        
-        # Delete the trip itself
-        cursor.execute("""
-            DELETE FROM trips WHERE trip_id = %s
-        """, (trip_id,))
-        
-        conn.commit()
-        cursor.close()
-        
+        _check_cached_trip(trip_id, user_id, recording=False)
+        await db.run(_delete_trip, trip_id, user_id)
+        ingest_buffer.discard(trip_id)
+        trip_cache.discard(trip_id)
+        live_stats.discard(trip_id)
+
         logger.info(f"Trip {trip_id} deleted by user {user_id}")
-        
+
         return {"message": "Trip deleted successfully", "tripId": trip_id}
-        
+
     except TripNotFoundException:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found")
     except UnauthorizedTripAccessException:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User does not own this trip")
+    except PoolTimeoutException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, please retry")
     except Exception as e:
-        conn.rollback()
         logger.error(f"Error deleting trip: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to delete trip")
-    finally:
-        db.return_connection(conn)
 
 
 @router.get("/trips", response_model=TripHistoryResponse)
-async def get_trip_history(user_id: str = Depends(get_current_user)):
-    """Retrieve trip history for authenticated user."""
-    conn = db.get_connection()
+async def get_trip_history(
+    user_id: str = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    sort: TripSort = TripSort.NEWEST,
+    fromDate: Optional[datetime] = None,
+    toDate: Optional[datetime] = None,
+    minDistance: Optional[float] = Query(None, ge=0)
+):
+    """
+    Retrieve trip history for authenticated user, one page at a time.
+    Pass nextCursor from the previous page as cursor to continue.
+    """
     try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT trip_id, start_time, end_time, total_distance, duration, average_speed
-            FROM trips WHERE user_id = %s AND status = 'COMPLETED' ORDER BY start_time DESC
-        """, (user_id,))
-        results = cursor.fetchall()
-        cursor.close()
+        cursor_value, cursor_trip_id = None, None
+        if cursor:
+            cursor_value, cursor_trip_id = decode_cursor(cursor, sort.value)
+        results, total = await db.run(
+            _fetch_trip_history, user_id, sort, limit, cursor_value, cursor_trip_id,
+            fromDate, toDate, minDistance
+        )
+        next_cursor = None
+        if len(results) > limit:
+            results = results[:limit]
+            last = results[-1]
+            key_value = last[3] if sort == TripSort.LONGEST else last[1]
+            next_cursor = encode_cursor(sort.value, key_value, last[0])
         trips = []
         for row in results:
             trips.append(TripSummary(
@@ -336,54 +798,132 @@ async def get_trip_history(user_id: str = Depends(get_current_user)):
                 totalDistance=float(row[3]) if row[3] else None, duration=row[4],
                 averageSpeed=float(row[5]) if row[5] else None
             ))
-        return TripHistoryResponse(trips=trips, total=len(trips))
+        return TripHistoryResponse(trips=trips, total=total, nextCursor=next_cursor)
+    except InvalidCursorException:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    except PoolTimeoutException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, please retry")
     except Exception as e:
         logger.error(f"Error fetching trip history: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch trip history")
-    finally:
-        db.return_connection(conn)
+
+@router.get("/trips/export")
+async def export_all_trips(
+    user_id: str = Depends(get_current_user),
+    format: ExportFormat = ExportFormat.GPX
+):
+    """
+    All of the users trips as a zip with one file per trip, built while it
+    streams so the archive is never held in memory
+    """
+    try:
+        # one stream for the whole zip, taken before the response starts so a
+        # busy pool is a 503 and not a cut off archive
+        stream = await db.stream(None, prepare=lambda conn: _fetch_export_trips(conn, user_id))
+    except PoolTimeoutException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"Error exporting trips: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to export trips")
+
+    filename = f"trips-{format.value}-{datetime.utcnow():%Y%m%d}.zip"
+    return StreamingResponse(
+        export_trips_zip(stream.prepared, EXPORT_WRITERS[format.value], stream),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/trips/stats", response_model=UserTripStats)
+async def get_user_stats(
+    user_id: str = Depends(get_current_user),
+    period: StatsPeriod = StatsPeriod.ALL
+):
+    """
+    Totals of the users completed trips for the current week, month, year
+    or all time, read from the per day rollup not the trips themselves
+    """
+    try:
+        period_start, (trip_count, distance, duration, max_speed) = await db.run(
+            fetch_user_stats, user_id, None if period == StatsPeriod.ALL else period.value
+        )
+        distance, duration = float(distance), int(duration)
+        return UserTripStats(
+            period=period.value, periodStart=period_start, tripCount=trip_count,
+            totalDistance=round(distance, 2), totalDuration=duration,
+            averageSpeed=round(distance / duration, 2) if duration > 0 else 0.0,
+            maxSpeed=float(max_speed)
+        )
+    except PoolTimeoutException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"Error fetching trip stats: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch trip stats")
+
+
+@router.get("/trips/search", response_model=TripSearchResponse)
+async def search_trips(
+    bbox: str,
+    user_id: str = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=200),
+    fromDate: Optional[datetime] = None,
+    toDate: Optional[datetime] = None
+):
+    """
+    Completed trips of the user with a point inside bbox (minLon,minLat,maxLon,maxLat),
+    newest first. Uses the grid cell index so only nearby trips get their points checked.
+    """
+    try:
+        box = parse_bbox(bbox)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid bbox, expected minLon,minLat,maxLon,maxLat")
+    try:
+        results = await db.run(search_trips_in_bbox, user_id, box, limit, fromDate, toDate)
+        trips = [
+            TripSummary(
+                tripId=str(row[0]), startTime=row[1], endTime=row[2],
+                totalDistance=float(row[3]) if row[3] else None, duration=row[4],
+                averageSpeed=float(row[5]) if row[5] else None
+            )
+            for row in results
+        ]
+        return TripSearchResponse(trips=trips)
+    except PoolTimeoutException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"Error searching trips: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to search trips")
+
 
 @router.get("/trips/{trip_id}", response_model=TripDetail)
-async def get_trip_detail(trip_id: str, user_id: str = Depends(get_current_user)):
-    """Retrieve detailed trip information including route coordinates."""
-    conn = db.get_connection()
+async def get_trip_detail(
+    trip_id: str,
+    user_id: str = Depends(get_current_user),
+    tolerance: Optional[float] = Query(None, gt=0),
+    maxPoints: Optional[int] = Query(None, ge=2),
+    accept: Optional[str] = Header(None)
+):
+    """
+    Retrieve detailed trip information including route coordinates.
+    tolerance (meters) and/or maxPoints return a Douglas-Peucker simplified route,
+    tolerance 5, 20 and 100 are precomputed and served straight from storage.
+    Accept application/vnd.bbp.polyline+json or application/vnd.bbp.route+binary
+    for a compact route instead of coordinate objects.
+    """
     try:
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT user_id, start_time, end_time, total_distance, duration, average_speed, max_speed
-            FROM trips WHERE trip_id = %s
-        """, (trip_id,))
-        trip_result = cursor.fetchone()
-        if not trip_result:
-            raise TripNotFoundException("Trip not found")
-        trip_user_id = trip_result[0]
-        if trip_user_id != user_id:
-            raise UnauthorizedTripAccessException("User does not own this trip")
-        cursor.execute("""
-            SELECT latitude, longitude, timestamp, elevation
-            FROM trip_coordinates WHERE trip_id = %s ORDER BY sequence_order
-        """, (trip_id,))
-        coord_results = cursor.fetchall()
+        route_format = _negotiate_route_format(accept)
+        trip_result, coord_results, weather_result = await db.run(
+            _fetch_trip_detail, trip_id, user_id, tolerance, maxPoints, route_format is not None
+        )
+        if route_format is not None:
+            return _route_response(trip_id, route_format, coord_results, trip_result, weather_result)
         coordinates = [
             CoordinateDetail(
                 latitude=float(row[0]), longitude=float(row[1]),
                 timestamp=row[2], elevation=float(row[3]) if row[3] else None
             ) for row in coord_results
         ]
-        cursor.execute("""
-            SELECT temperature, conditions, wind_speed, wind_direction
-            FROM trip_weather WHERE trip_id = %s
-        """, (trip_id,))
-        weather_result = cursor.fetchone()
-        weather_data = None
-        if weather_result:
-            weather_data = WeatherData(
-                temperature=float(weather_result[0]) if weather_result[0] else None,
-                conditions=weather_result[1],
-                windSpeed=float(weather_result[2]) if weather_result[2] else None,
-                windDirection=weather_result[3]
-            )
-        cursor.close()
+        weather_data = _weather_from_row(weather_result)
         return TripDetail(
             tripId=trip_id, userId=str(trip_result[0]), startTime=trip_result[1],
             endTime=trip_result[2], totalDistance=float(trip_result[3]) if trip_result[3] else None,
@@ -395,8 +935,144 @@ async def get_trip_detail(trip_id: str, user_id: str = Depends(get_current_user)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found")
     except UnauthorizedTripAccessException:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User does not own this trip")
+    except PoolTimeoutException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, please retry")
     except Exception as e:
         logger.error(f"Error fetching trip detail: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch trip detail")
-    finally:
-        db.return_connection(conn)
+
+
+@router.get("/trips/{trip_id}/route")
+async def get_trip_route(
+    trip_id: str,
+    user_id: str = Depends(get_current_user),
+    format: Optional[RouteFormat] = None,
+    tolerance: Optional[float] = Query(None, gt=0),
+    accept: Optional[str] = Header(None)
+):
+    """
+    Route only, as an encoded polyline (default) or packed binary.
+    format wins over the Accept header, tolerance works like on GET /trips/{trip_id}.
+    """
+    try:
+        route_format = format or _negotiate_route_format(accept) or RouteFormat.POLYLINE
+        trip_result, route_rows, weather_result = await db.run(
+            _fetch_trip_detail, trip_id, user_id, tolerance, None, True
+        )
+        return _route_response(trip_id, route_format, route_rows)
+    except TripNotFoundException:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found")
+    except UnauthorizedTripAccessException:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User does not own this trip")
+    except PoolTimeoutException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"Error fetching trip route: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch trip route")
+
+
+@router.get("/trips/{trip_id}/coordinates")
+async def stream_trip_coordinates(
+    trip_id: str,
+    user_id: str = Depends(get_current_user),
+    format: StreamFormat = StreamFormat.NDJSON
+):
+    """
+    Full route streamed from a server side cursor, memory stays flat no matter
+    how long the trip is. ndjson is one coordinate per line, json is a
+    chunked {"tripId", "coordinates": [...]} document.
+    """
+    try:
+        stream = await db.stream(
+            COORDINATES_STREAM_QUERY, (trip_id,),
+            prepare=lambda conn: _check_trip_owner(conn, trip_id, user_id)
+        )
+    except TripNotFoundException:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found")
+    except UnauthorizedTripAccessException:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User does not own this trip")
+    except PoolTimeoutException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"Error streaming trip coordinates: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch trip coordinates")
+    if format == StreamFormat.JSON:
+        return StreamingResponse(_json_array_body(trip_id, stream), media_type="application/json")
+    return StreamingResponse(_ndjson_body(stream), media_type="application/x-ndjson")
+
+
+@router.get("/trips/{trip_id}/export")
+async def export_trip(
+    trip_id: str,
+    user_id: str = Depends(get_current_user),
+    format: ExportFormat = ExportFormat.GPX
+):
+    """Trip as a gpx, geojson or csv download, streamed from a server side cursor"""
+    try:
+        stream = await db.stream(
+            EXPORT_COORDINATES_QUERY, (trip_id,),
+            prepare=lambda conn: _fetch_export_trip(conn, trip_id, user_id)
+        )
+    except TripNotFoundException:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found")
+    except UnauthorizedTripAccessException:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User does not own this trip")
+    except PoolTimeoutException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"Error exporting trip: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to export trip")
+    trip = stream.prepared
+    writer = EXPORT_WRITERS[format.value]()
+    return StreamingResponse(
+        export_trip_body(writer, trip, stream),
+        media_type=writer.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(trip, writer.extension)}"'}
+    )
+
+
+@router.get("/trips/{trip_id}/live", response_model=LiveTripStats)
+async def get_trip_live_stats(
+    trip_id: str,
+    response: Response,
+    user_id: str = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    running stats for a trip (distance, elapsed time, speeds, point count)
+    served from memory during a ride, send If-None-Match to get a 304
+    """
+    try:
+        cached = live_stats.get(trip_id)
+        if cached is not None:
+            trip_user_id, snapshot = cached
+            if trip_user_id != user_id:
+                raise UnauthorizedTripAccessException("User does not own this trip")
+        else:
+            trip_user_id, trip_status, running_stats = await db.run(_fetch_live_state, trip_id)
+            if trip_user_id != user_id:
+                raise UnauthorizedTripAccessException("User does not own this trip")
+            if running_stats is None:
+                raise LiveStatsUnavailableException("Trip predates live statistics")
+            acc = TripStatsAccumulator.from_state(running_stats)
+            if trip_status == 'RECORDING':
+                live_stats.update(trip_id, trip_user_id, trip_status, acc)
+            snapshot = build_live_snapshot(trip_id, trip_status, acc)
+
+        etag = live_etag(snapshot)
+        if if_none_match == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "no-cache"
+        return LiveTripStats(**snapshot)
+    except TripNotFoundException:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trip not found")
+    except LiveStatsUnavailableException:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Live statistics not available for this trip")
+    except UnauthorizedTripAccessException:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="User does not own this trip")
+    except PoolTimeoutException:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database busy, please retry")
+    except Exception as e:
+        logger.error(f"Error fetching live trip stats: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to fetch live trip stats")
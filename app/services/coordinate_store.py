@@ -0,0 +1,236 @@
+import io
+import logging
+from datetime import datetime, timezone
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable, List, Optional, Tuple
+from psycopg2.extras import execute_values, Json
+from app.utils.geo_utils import TripStatsAccumulator
+
+logger = logging.getLogger(__name__)
+
+# above this many rows COPY beats a multi-row INSERT
+COPY_THRESHOLD = 1000
+
+# (latitude, longitude, timestamp, elevation)
+CoordinateRow = Tuple[float, float, object, Optional[float]]
+
+
+_COORDINATE_PLACES = Decimal("1E-8")
+
+
+def _to_db_coordinate(value: float) -> float:
+    """round like NUMERIC(10/11, 8) does so running stats see the stored value"""
+    return float(Decimal(repr(float(value))).quantize(_COORDINATE_PLACES, rounding=ROUND_HALF_UP))
+
+
+def _to_db_timestamp(ts: datetime) -> datetime:
+    """timestamp columns have no zone, store aware times as naive utc"""
+    if ts.tzinfo is not None:
+        return ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def to_db_row(latitude: float, longitude: float, timestamp: datetime, elevation: Optional[float]) -> CoordinateRow:
+    """normalize an incoming point to exactly what trip_coordinates will hold"""
+    return (
+        _to_db_coordinate(latitude), _to_db_coordinate(longitude),
+        _to_db_timestamp(timestamp), elevation
+    )
+
+
+def reserve_sequence(cursor, trip_id: str, user_id: str) -> Optional[Tuple[int, Optional[dict]]]:
+    """
+    lock a recording trip for a coordinate write, returns its next free
+    sequence number plus the trips running_stats state
+    the row lock (FOR UPDATE) is held until commit so parallel uploads for the
+    same trip queue up here and get disjoint, contiguous ranges without a
+    MAX() scan. the caller moves the counter on with save_trip_progress, in
+    the same UPDATE as the new running stats
+    ownership and status are checked in the same statement, None means the
+    trip is missing, not the users or not recording anymore
+    """
+    cursor.execute("""
+        SELECT next_sequence, running_stats FROM trips
+        WHERE trip_id = %s AND user_id = %s AND status = 'RECORDING'
+        FOR UPDATE
+    """, (trip_id, user_id))
+    result = cursor.fetchone()
+    if result is None:
+        return None
+    first_sequence, running_stats = result
+    return first_sequence, running_stats
+
+
+def advance_running_stats(state: Optional[dict], rows: List[CoordinateRow]) -> Optional[TripStatsAccumulator]:
+    """
+    feed newly inserted rows into a running_stats state
+    trips created before running stats existed have no state, those are
+    left alone and get a full recompute on completion
+    """
+    if state is None:
+        return None
+    acc = TripStatsAccumulator.from_state(state)
+    for lat, lon, ts, _ in rows:
+        acc.add(lat, lon, ts)
+    return acc
+
+
+# the one write to the trips row per coordinate upload
+_PROGRESS_UPDATE = "UPDATE trips SET next_sequence = %s, running_stats = %s WHERE trip_id = %s"
+
+
+def _progress_params(trip_id: str, next_sequence: int, acc: Optional[TripStatsAccumulator]) -> tuple:
+    return next_sequence, Json(acc.to_state()) if acc is not None else None, trip_id
+
+
+def save_trip_progress(cursor, trip_id: str, next_sequence: int, acc: Optional[TripStatsAccumulator]):
+    """move the sequence counter past the new rows and store the running stats, one UPDATE"""
+    cursor.execute(_PROGRESS_UPDATE, _progress_params(trip_id, next_sequence, acc))
+
+
+def insert_coordinate(cursor, trip_id: str, row: CoordinateRow, sequence_order: int, coordinate_id: str,
+                      acc: Optional[TripStatsAccumulator]):
+    """single point write, the INSERT and the save_trip_progress UPDATE in one statement"""
+    cursor.execute(f"""
+        WITH progress AS ({_PROGRESS_UPDATE})
+        INSERT INTO trip_coordinates
+        (coordinate_id, trip_id, latitude, longitude, timestamp, elevation, sequence_order)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """, _progress_params(trip_id, sequence_order + 1, acc) + (coordinate_id, trip_id) + row + (sequence_order,))
+
+
+def _copy_value(value) -> str:
+    """format one value for COPY text format"""
+    if value is None:
+        return "\\N"
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _copy_coordinates(cursor, trip_id: str, rows: List[CoordinateRow], first_sequence: int,
+                      coordinate_ids: Optional[List[str]] = None):
+    """stream all rows to postgres with one COPY FROM STDIN"""
+    buffer = io.StringIO()
+    for i, (lat, lon, ts, elevation) in enumerate(rows):
+        values = (
+            trip_id, _copy_value(lat), _copy_value(lon), _copy_value(ts),
+            _copy_value(elevation), str(first_sequence + i)
+        )
+        if coordinate_ids is not None:
+            values = (coordinate_ids[i],) + values
+        buffer.write("\t".join(values))
+        buffer.write("\n")
+    buffer.seek(0)
+    id_column = "coordinate_id, " if coordinate_ids is not None else ""
+    cursor.copy_expert(f"""
+        COPY trip_coordinates
+        ({id_column}trip_id, latitude, longitude, timestamp, elevation, sequence_order)
+        FROM STDIN
+    """, buffer)
+
+
+def _insert_values(cursor, trip_id: str, rows: List[CoordinateRow], first_sequence: int,
+                   coordinate_ids: Optional[List[str]] = None):
+    """one multi-row INSERT ... VALUES for the whole batch"""
+    values = [
+        (trip_id, lat, lon, ts, elevation, first_sequence + i)
+        for i, (lat, lon, ts, elevation) in enumerate(rows)
+    ]
+    id_column = ""
+    if coordinate_ids is not None:
+        values = [(coordinate_ids[i],) + value for i, value in enumerate(values)]
+        id_column = "coordinate_id, "
+    execute_values(cursor, f"""
+        INSERT INTO trip_coordinates
+        ({id_column}trip_id, latitude, longitude, timestamp, elevation, sequence_order)
+        VALUES %s
+    """, values, page_size=max(len(values), 1))
+
+
+def insert_coordinates(cursor, trip_id: str, rows: Iterable[CoordinateRow], first_sequence: int,
+                       coordinate_ids: Optional[List[str]] = None) -> int:
+    """
+    bulk insert coordinate rows for a trip in a constant number of round trips
+    sequence numbers are first_sequence, first_sequence + 1, ...
+    coordinate_id comes from the column default so we dont build a uuid per row,
+    unless coordinate_ids are given (write-behind already handed them out)
+    returns number of rows inserted
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    if len(rows) >= COPY_THRESHOLD:
+        _copy_coordinates(cursor, trip_id, rows, first_sequence, coordinate_ids)
+    else:
+        _insert_values(cursor, trip_id, rows, first_sequence, coordinate_ids)
+    return len(rows)
+
+
+# packed layout, see trip_coordinates_packed in init_trips_tables.sql. lat/lon
+# as 1e-8 degree ints and time as microseconds since 2000 (any fixed origin
+# works, only the deltas are stored). a trip with a jump too big for an int
+# delta just stays as rows
+_PACK_QUERY = """
+    INSERT INTO trip_coordinates_packed
+    (trip_id, start_time, point_count, lat_base, lon_base, time_base,
+     lat_deltas, lon_deltas, time_deltas, elevations)
+    SELECT %(trip_id)s, %(start_time)s, n, lat_base, lon_base, time_base,
+           lat_deltas::integer[], lon_deltas::integer[], time_deltas, elevations
+    FROM (
+        SELECT COUNT(*) AS n,
+               MIN(lat) FILTER (WHERE rn = 1) AS lat_base, MIN(lon) FILTER (WHERE rn = 1) AS lon_base,
+               MIN(timestamp) FILTER (WHERE rn = 1) AS time_base,
+               array_agg(lat - COALESCE(prev_lat, lat) ORDER BY rn) AS lat_deltas,
+               array_agg(lon - COALESCE(prev_lon, lon) ORDER BY rn) AS lon_deltas,
+               array_agg(us - COALESCE(prev_us, us) ORDER BY rn) AS time_deltas,
+               CASE WHEN bool_or(elevation IS NOT NULL)
+                    THEN array_agg((elevation * 100)::integer ORDER BY rn) END AS elevations,
+               MAX(GREATEST(abs(lat - COALESCE(prev_lat, lat)), abs(lon - COALESCE(prev_lon, lon)))) AS max_delta
+        FROM (
+            SELECT (latitude * 100000000)::bigint AS lat, (longitude * 100000000)::bigint AS lon,
+                   timestamp, elevation,
+                   (EXTRACT(EPOCH FROM timestamp - '2000-01-01') * 1000000)::bigint AS us,
+                   lag((latitude * 100000000)::bigint) OVER o AS prev_lat,
+                   lag((longitude * 100000000)::bigint) OVER o AS prev_lon,
+                   lag((EXTRACT(EPOCH FROM timestamp - '2000-01-01') * 1000000)::bigint) OVER o AS prev_us,
+                   row_number() OVER o AS rn
+            FROM trip_coordinates WHERE trip_id = %(trip_id)s
+            WINDOW o AS (ORDER BY sequence_order)
+        ) r
+    ) a
+    WHERE n > 0 AND max_delta < 2147483648
+    RETURNING point_count
+"""
+
+
+def pack_trip_coordinates(cursor, trip_id: str, start_time: datetime) -> bool:
+    """
+    move a completed trips points from trip_coordinates into one packed row
+    start_time has to be the trips, it picks the partition
+    False if it stays as rows (no points or a delta that doesnt fit)
+    """
+    cursor.execute(_PACK_QUERY, {"trip_id": trip_id, "start_time": start_time})
+    if cursor.fetchone() is None:
+        return False
+    cursor.execute("DELETE FROM trip_coordinates WHERE trip_id = %s", (trip_id,))
+    return True
+
+
+def unpack_trip_coordinates(cursor, trip_id: str, start_time: datetime) -> bool:
+    """back to one row per point, coordinate ids are new ones. False if it wasnt packed"""
+    cursor.execute("""
+        SELECT 1 FROM trip_coordinates_packed WHERE trip_id = %s AND start_time = %s
+    """, (trip_id, start_time))
+    if cursor.fetchone() is None:
+        return False
+    cursor.execute("""
+        INSERT INTO trip_coordinates
+        (trip_id, latitude, longitude, timestamp, elevation, sequence_order)
+        SELECT %s, latitude, longitude, timestamp, elevation, sequence_order
+        FROM trip_points(%s)
+    """, (trip_id, trip_id))
+    cursor.execute("""
+        DELETE FROM trip_coordinates_packed WHERE trip_id = %s AND start_time = %s
+    """, (trip_id, start_time))
+    return True
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+from app.config.database import db
+from app.services.weather_service import fetch_current_weather
+from app.services.route_service import precompute_simplified_routes
+from app.services.heatmap import add_trip_to_heatmap
+
+logger = logging.getLogger(__name__)
+
+
+def _save_trip_weather(conn, trip_id: str, weather: dict):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO trip_weather
+            (weather_id, trip_id, temperature, conditions, wind_speed, wind_direction, humidity)
+            SELECT %s, trip_id, %s, %s, %s, %s, %s FROM trips WHERE trip_id = %s
+            ON CONFLICT (trip_id) DO NOTHING
+        """, (
+            str(uuid.uuid4()), weather.get('temperature'), weather.get('conditions'),
+            weather.get('wind_speed'), weather.get('wind_direction'),
+            weather.get('humidity'), trip_id
+        ))
+
+
+def _process_completed_route(conn, trip_id: str):
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT latitude, longitude, timestamp, elevation
+            FROM trip_points(%s) ORDER BY sequence_order
+        """, (trip_id,))
+        coordinates = cursor.fetchall()
+        if coordinates:
+            precompute_simplified_routes(cursor, trip_id, coordinates)
+            add_trip_to_heatmap(cursor, trip_id)
+
+
+def _fetch_unprocessed_trips(conn, limit: int) -> List[str]:
+    """completed trips whose route work never committed, newest first"""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT trip_id FROM trips
+            WHERE NOT heatmap_applied AND status = 'COMPLETED'
+            ORDER BY end_time DESC NULLS LAST LIMIT %s
+        """, (limit,))
+        return [str(row[0]) for row in cursor.fetchall()]
+
+
+class EnrichmentQueue:
+    """
+    in-process queue for work that runs after a trip is completed
+    (simplified routes, heatmap, weather lookup) so complete_trip can commit and
+    respond right away
+
+    the queue itself is lost with the process, trips.heatmap_applied is the
+    durable record: it only turns true in the transaction that stores the
+    routes and counts the trip, so recover() on startup finds whatever a
+    crash or a dropped job left behind
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, dict] = {}
+        self._tasks = set()
+
+    def schedule(self, trip_id: str, latitude: Optional[float] = None, longitude: Optional[float] = None):
+        """
+        queue enrichment for a completed trip, must be called from the event loop
+        without a position only the route work runs (imported rides are old,
+        current weather would be wrong for them)
+        """
+        self._pending[trip_id] = {
+            "tripId": trip_id,
+            "queuedAt": datetime.utcnow().isoformat(),
+            "latitude": latitude,
+            "longitude": longitude,
+        }
+        task = asyncio.create_task(self._enrich(trip_id, latitude, longitude))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _enrich(self, trip_id: str, latitude: Optional[float], longitude: Optional[float]):
+        try:
+            await db.run(_process_completed_route, trip_id)
+        except Exception as e:
+            logger.warning(f"Route processing failed for trip {trip_id}: {e}")
+        try:
+            if latitude is None or longitude is None:
+                return
+            weather = await fetch_current_weather(latitude, longitude)
+            if weather:
+                # trip may have been deleted meanwhile, the insert is a no-op then
+                await db.run(_save_trip_weather, trip_id, weather)
+        except Exception as e:
+            logger.warning(f"Weather enrichment failed for trip {trip_id}: {e}")
+        finally:
+            self._pending.pop(trip_id, None)
+
+    async def _recover(self, limit: int):
+        try:
+            trip_ids = await db.run(_fetch_unprocessed_trips, limit)
+        except Exception as e:
+            logger.warning(f"Could not look up unprocessed trips: {e}")
+            return
+        if not trip_ids:
+            return
+        logger.info(f"Recovering route processing for {len(trip_ids)} completed trips")
+        if len(trip_ids) >= limit:
+            logger.warning(f"More than {limit} completed trips are unprocessed, run database.backfill_heatmap")
+        # one at a time so a long backlog doesnt crowd out requests, and no
+        # weather for these, it would be the weather of now and not of the ride
+        for trip_id in trip_ids:
+            if trip_id in self._pending:
+                continue
+            self._pending[trip_id] = {"tripId": trip_id, "queuedAt": datetime.utcnow().isoformat(),
+                                      "latitude": None, "longitude": None}
+            try:
+                # claiming the trip in the heatmap makes this a no-op if another worker got to it
+                await db.run(_process_completed_route, trip_id)
+            except Exception as e:
+                logger.warning(f"Route processing failed for trip {trip_id}: {e}")
+            finally:
+                self._pending.pop(trip_id, None)
+
+    def recover(self, limit: int):
+        """
+        requeue the route work of completed trips that never got it, call
+        from the event loop on startup. past limit trips it is a job for
+        database.backfill_heatmap
+        """
+        if limit <= 0:
+            return
+        task = asyncio.create_task(self._recover(limit))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def pending(self) -> List[dict]:
+        return list(self._pending.values())
+
+    async def drain(self, timeout: float = 15.0):
+        """wait for queued jobs on shutdown so we dont lose them mid-flight"""
+        if not self._tasks:
+            return
+        done, not_done = await asyncio.wait(list(self._tasks), timeout=timeout)
+        for task in not_done:
+            task.cancel()
+        if not_done:
+            logger.warning(f"Dropped {len(not_done)} enrichment jobs on shutdown")
+
+
+enrichment_queue = EnrichmentQueue()
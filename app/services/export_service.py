@@ -0,0 +1,208 @@
+import json
+import zipfile
+from datetime import datetime
+from typing import Optional
+from xml.sax.saxutils import escape
+
+# server side cursor query for the ndjson/json streaming endpoint
+COORDINATES_STREAM_QUERY = """
+    SELECT latitude::float8, longitude::float8, timestamp, elevation::float8
+    FROM trip_points(%s) ORDER BY sequence_order
+"""
+
+# exports take the values as text straight from postgres, formatting floats
+# and datetimes in python was more than half the export time. numeric and
+# to_char always give a decimal point here so _trim can drop trailing zeros
+EXPORT_COORDINATES_QUERY = """
+    SELECT latitude::text, longitude::text,
+           to_char(timestamp, 'YYYY-MM-DD"T"HH24:MI:SS.US'), elevation::text
+    FROM trip_points(%s) ORDER BY sequence_order
+"""
+
+
+def _trim(value: str) -> str:
+    return value.rstrip("0").rstrip(".")
+
+
+def _iso_utc(value: Optional[datetime]) -> Optional[str]:
+    # timestamps are stored as naive utc
+    return value.isoformat() + "Z" if value else None
+
+
+class GpxWriter:
+    """gpx 1.1, one track with one segment per trip"""
+
+    media_type = "application/gpx+xml"
+    extension = "gpx"
+
+    def header(self, trip: dict) -> str:
+        name = escape(f"Trip {trip['trip_id']}")
+        start = _iso_utc(trip["start_time"])
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<gpx version="1.1" creator="BBP trip management service" '
+            'xmlns="http://www.topografix.com/GPX/1/1">\n'
+            f'<metadata><name>{name}</name><time>{start}</time></metadata>\n'
+            f'<trk><name>{name}</name><trkseg>\n'
+        )
+
+    def rows(self, rows) -> str:
+        parts = []
+        for lat, lon, ts, ele in rows:
+            ele_tag = "" if ele is None else f"<ele>{_trim(ele)}</ele>"
+            parts.append(f'<trkpt lat="{_trim(lat)}" lon="{_trim(lon)}">{ele_tag}<time>{_trim(ts)}Z</time></trkpt>\n')
+        return "".join(parts)
+
+    def footer(self) -> str:
+        return "</trkseg></trk>\n</gpx>\n"
+
+
+class GeoJsonWriter:
+    """
+    FeatureCollection with one LineString, positions are [lon, lat, ele].
+    geojson has no place for per point times so they are left out, use gpx
+    or csv when timing matters
+    """
+
+    media_type = "application/geo+json"
+    extension = "geojson"
+
+    def __init__(self):
+        self._first = True
+
+    def header(self, trip: dict) -> str:
+        properties = {
+            "tripId": str(trip["trip_id"]),
+            "startTime": _iso_utc(trip["start_time"]),
+            "endTime": _iso_utc(trip["end_time"]),
+            "totalDistance": float(trip["total_distance"]) if trip["total_distance"] is not None else None,
+            "duration": trip["duration"],
+            "averageSpeed": float(trip["average_speed"]) if trip["average_speed"] is not None else None,
+            "maxSpeed": float(trip["max_speed"]) if trip["max_speed"] is not None else None,
+        }
+        return (
+            '{"type":"FeatureCollection","features":[{"type":"Feature",'
+            f'"properties":{json.dumps(properties)},'
+            '"geometry":{"type":"LineString","coordinates":['
+        )
+
+    def rows(self, rows) -> str:
+        if not rows:
+            return ""
+        chunk = ",".join(
+            f"[{_trim(lon)},{_trim(lat)}]" if ele is None else f"[{_trim(lon)},{_trim(lat)},{_trim(ele)}]"
+            for lat, lon, _, ele in rows
+        )
+        if self._first:
+            self._first = False
+            return chunk
+        return "," + chunk
+
+    def footer(self) -> str:
+        return "]}}]}\n"
+
+
+class CsvWriter:
+    media_type = "text/csv"
+    extension = "csv"
+
+    def __init__(self):
+        self._sequence = 0
+        self._trip_id = ""
+
+    def header(self, trip: dict) -> str:
+        self._trip_id = str(trip["trip_id"])
+        return "trip_id,sequence,latitude,longitude,timestamp,elevation\n"
+
+    def rows(self, rows) -> str:
+        parts = []
+        for lat, lon, ts, ele in rows:
+            parts.append(
+                f"{self._trip_id},{self._sequence},{_trim(lat)},{_trim(lon)},{_trim(ts)}Z,"
+                f"{'' if ele is None else _trim(ele)}\n"
+            )
+            self._sequence += 1
+        return "".join(parts)
+
+    def footer(self) -> str:
+        return ""
+
+
+EXPORT_WRITERS = {
+    "gpx": GpxWriter,
+    "geojson": GeoJsonWriter,
+    "csv": CsvWriter,
+}
+
+
+def export_filename(trip: dict, extension: str) -> str:
+    return f"trip-{trip['start_time']:%Y%m%d-%H%M%S}-{trip['trip_id']}.{extension}"
+
+
+async def export_trip_body(writer, trip: dict, stream):
+    """yields one trip export chunk by chunk as rows come off the cursor"""
+    try:
+        yield writer.header(trip)
+        async for rows in stream.chunks():
+            yield writer.rows(rows)
+        yield writer.footer()
+    finally:
+        stream.close()
+
+
+class _ZipOutput:
+    """write-only file object for ZipFile, collects bytes until taken"""
+
+    def __init__(self):
+        self._parts = []
+        self._offset = 0
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+async def export_trips_zip(trips, writer_cls, stream):
+    """
+    streams a zip with one file per trip. ZipFile sees an unseekable output
+    so it writes data descriptors after each entry instead of seeking back,
+    which means nothing but the current chunk is ever buffered
+    stream is an open RowStream, each trips coordinates are read through it
+    in turn so the whole zip holds one conection (and stream slot) from the
+    first byte to the last. it is closed at the end
+    """
+    output = _ZipOutput()
+    try:
+        with zipfile.ZipFile(output, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for trip in trips:
+                writer = writer_cls()
+                info = zipfile.ZipInfo(
+                    export_filename(trip, writer.extension),
+                    date_time=trip["start_time"].timetuple()[:6]
+                )
+                info.compress_type = zipfile.ZIP_DEFLATED
+                await stream.execute(EXPORT_COORDINATES_QUERY, (trip["trip_id"],))
+                with archive.open(info, "w", force_zip64=True) as entry:
+                    entry.write(writer.header(trip).encode())
+                    async for rows in stream.chunks(close=False):
+                        entry.write(writer.rows(rows).encode())
+                        data = output.take()
+                        if data:
+                            yield data
+                    entry.write(writer.footer().encode())
+                yield output.take()
+        yield output.take()
+    finally:
+        stream.close()
@@ -0,0 +1,148 @@
+import math
+from datetime import datetime
+from typing import Dict, List, Sequence
+from psycopg2.extras import execute_values
+from app.services.route_service import fetch_simplified_route
+from app.utils.geo_utils import calculate_haversine_distance
+from app.utils.geohash import encode_geohash, geohash_center
+
+# usage heatmap: every completed trips street level simplified route is cut
+# into pieces of at most HEATMAP_STEP_M, each piece counted in the geohash
+# cell its middle falls in. heatmap_cells keeps, per cell and for every
+# level in HEATMAP_PRECISIONS, how many trips passed and the distance/time
+# ridden inside it, GET /heatmap only ever reads those rows
+HEATMAP_PRECISIONS = (4, 5, 6, 7)  # ~39km, ~4.9km, ~1.2km, ~150m cells
+HEATMAP_TOLERANCE_M = 5  # one of ROUTE_SIMPLIFICATION_LEVELS
+HEATMAP_STEP_M = 50.0
+
+
+def heatmap_precision(zoom: int) -> int:
+    """geohash level to show at a web map zoom"""
+    if zoom <= 8:
+        return 4
+    if zoom <= 10:
+        return 5
+    if zoom <= 13:
+        return 6
+    return 7
+
+
+def _as_datetime(ts) -> datetime:
+    return ts if isinstance(ts, datetime) else datetime.fromisoformat(ts)
+
+
+def route_cell_usage(points: Sequence[tuple]) -> Dict[str, List[float]]:
+    """
+    finest level geohash -> [meters, seconds] of the route inside it
+    points are (lat, lon, timestamp, ...) in route order, timestamp a
+    datetime or iso string. pure so it can run in a worker process
+    """
+    precision = HEATMAP_PRECISIONS[-1]
+    usage: Dict[str, List[float]] = {}
+    prev = None
+    for point in points:
+        lat, lon, ts = float(point[0]), float(point[1]), _as_datetime(point[2])
+        if prev is not None:
+            prev_lat, prev_lon, prev_ts = prev
+            # a simplified segment can span minutes of riding, time is spread
+            # over its pieces like the distance
+            seconds = max((ts - prev_ts).total_seconds(), 0.0)
+            distance = calculate_haversine_distance(prev_lat, prev_lon, lat, lon)
+            pieces = max(1, math.ceil(distance / HEATMAP_STEP_M))
+            piece_distance, piece_seconds = distance / pieces, seconds / pieces
+            for i in range(pieces):
+                f = (i + 0.5) / pieces
+                cell = encode_geohash(
+                    prev_lat + (lat - prev_lat) * f, prev_lon + (lon - prev_lon) * f, precision
+                )
+                entry = usage.get(cell)
+                if entry is None:
+                    entry = usage[cell] = [0.0, 0.0]
+                entry[0] += piece_distance
+                entry[1] += piece_seconds
+        prev = (lat, lon, ts)
+    return usage
+
+
+def _cell_rows(usage: Dict[str, List[float]], sign: int) -> List[tuple]:
+    """one row per cell and level, a trip counts once in every cell it touched"""
+    levels: Dict[str, List[float]] = {}
+    for cell, (distance, seconds) in usage.items():
+        for precision in HEATMAP_PRECISIONS:
+            entry = levels.get(cell[:precision])
+            if entry is None:
+                entry = levels[cell[:precision]] = [0.0, 0.0]
+            entry[0] += distance
+            entry[1] += seconds
+    rows = []
+    # sorted so concurrent writers lock cells in the same order
+    for geohash in sorted(levels, key=lambda g: (len(g), g)):
+        distance, seconds = levels[geohash]
+        center_lat, center_lon = geohash_center(geohash)
+        rows.append((len(geohash), geohash, center_lat, center_lon, sign, sign * distance, sign * seconds))
+    return rows
+
+
+def apply_cell_usage(cursor, usage: Dict[str, List[float]], sign: int = 1):
+    """add (sign 1) or take back (sign -1) one trips usage"""
+    rows = _cell_rows(usage, sign)
+    if not rows:
+        return
+    execute_values(cursor, """
+        INSERT INTO heatmap_cells
+        (precision, geohash, center_lat, center_lon, trip_count, total_distance, total_duration)
+        VALUES %s
+        ON CONFLICT (precision, geohash) DO UPDATE SET
+            trip_count = heatmap_cells.trip_count + EXCLUDED.trip_count,
+            total_distance = heatmap_cells.total_distance + EXCLUDED.total_distance,
+            total_duration = heatmap_cells.total_duration + EXCLUDED.total_duration
+    """, rows, page_size=1000)
+    if sign < 0:
+        cursor.execute("""
+            DELETE FROM heatmap_cells WHERE trip_count <= 0 AND geohash = ANY(%s)
+        """, ([row[1] for row in rows],))
+
+
+def claim_trip_for_heatmap(cursor, trip_id: str) -> bool:
+    """mark a completed trip as counted, False if it already is (or is gone)"""
+    cursor.execute("""
+        UPDATE trips SET heatmap_applied = TRUE
+        WHERE trip_id = %s AND status = 'COMPLETED' AND NOT heatmap_applied
+        RETURNING trip_id
+    """, (trip_id,))
+    return cursor.fetchone() is not None
+
+
+def add_trip_to_heatmap(cursor, trip_id: str) -> bool:
+    """count a trip once its simplified routes are stored"""
+    if not claim_trip_for_heatmap(cursor, trip_id):
+        return False
+    points = fetch_simplified_route(cursor, trip_id, HEATMAP_TOLERANCE_M)
+    if points:
+        apply_cell_usage(cursor, route_cell_usage(points))
+    return True
+
+
+def remove_trip_from_heatmap(cursor, trip_id: str):
+    """take a trip being deleted back out, needs its simplified route still there"""
+    cursor.execute("SELECT heatmap_applied FROM trips WHERE trip_id = %s", (trip_id,))
+    result = cursor.fetchone()
+    if not result or not result[0]:
+        return
+    points = fetch_simplified_route(cursor, trip_id, HEATMAP_TOLERANCE_M)
+    if points:
+        apply_cell_usage(cursor, route_cell_usage(points), sign=-1)
+
+
+def fetch_heatmap(conn, bbox, precision: int, limit: int) -> List[tuple]:
+    """busiest cells of one level whose center is inside bbox"""
+    min_lon, min_lat, max_lon, max_lat = bbox
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT geohash, center_lat, center_lon, trip_count, total_distance, total_duration
+            FROM heatmap_cells
+            WHERE precision = %s AND center_lat BETWEEN %s AND %s AND center_lon BETWEEN %s AND %s
+            ORDER BY trip_count DESC, geohash
+            LIMIT %s
+        """, (precision, min_lat, max_lat, min_lon, max_lon, limit))
+        return cursor.fetchall()
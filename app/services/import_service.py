@@ -0,0 +1,198 @@
+import json
+import logging
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from typing import Iterator, Optional, Tuple
+from app.utils.geo_utils import parse_timestamp
+from app.utils.exceptions import ImportFormatException
+
+try:
+    import ijson
+except ImportError:  # geojson then falls back to json.load (whole file in memory)
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+# points handed to the db per COPY
+IMPORT_CHUNK_SIZE = 5000
+
+GPX_CONTENT_TYPES = ("application/gpx+xml", "application/xml", "text/xml")
+GEOJSON_CONTENT_TYPES = ("application/geo+json", "application/json")
+
+# (latitude, longitude, timestamp, elevation) as found in the file
+ImportedPoint = Tuple[float, float, datetime, Optional[float]]
+
+
+def import_format_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    if not content_type:
+        return None
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    if media_type in GPX_CONTENT_TYPES:
+        return "gpx"
+    if media_type in GEOJSON_CONTENT_TYPES:
+        return "geojson"
+    return None
+
+
+def _point_time(value) -> datetime:
+    """iso strings mostly, some exporters write epoch seconds or ms"""
+    if isinstance(value, str):
+        return parse_timestamp(value)
+    value = float(value)
+    if value > 1e11:
+        value /= 1000
+    return datetime.fromtimestamp(value, tz=timezone.utc)
+
+
+def _local_name(tag: str, names: dict) -> str:
+    # a file only has a handful of distinct tags, skip the split per element
+    name = names.get(tag)
+    if name is None:
+        name = names[tag] = tag.rsplit("}", 1)[-1]
+    return name
+
+
+def iter_gpx_points(path: str) -> Iterator[ImportedPoint]:
+    """
+    track points (or route points) of a gpx file via iterparse, each point
+    is removed from its parent once read so memory stays flat on big files
+    points without a time are skiped since stats need them
+    """
+    parents = []
+    names = {}
+    try:
+        for event, elem in ET.iterparse(path, events=("start", "end")):
+            if event == "start":
+                parents.append(elem)
+                continue
+            parents.pop()
+            if _local_name(elem.tag, names) not in ("trkpt", "rtept"):
+                continue
+            ele = None
+            ts = None
+            for child in elem:
+                name = _local_name(child.tag, names)
+                if name == "ele" and child.text:
+                    ele = float(child.text)
+                elif name == "time" and child.text:
+                    ts = child.text.strip()
+            if ts is not None:
+                yield float(elem.get("lat")), float(elem.get("lon")), _point_time(ts), ele
+            elem.clear()
+            if parents:
+                parents[-1].remove(elem)
+    except ET.ParseError as e:
+        raise ImportFormatException(f"Invalid GPX file: {e}")
+    except (TypeError, ValueError) as e:
+        raise ImportFormatException(f"Invalid GPX point: {e}")
+
+
+_TIME_LIST_PREFIX = re.compile(r"(^|\.)properties\.(coordTimes|times)(\.item)+$")
+_TIME_VALUE_PREFIX = re.compile(r"(^|\.)properties\.(time|timestamp)$")
+_COORDINATES_PREFIX = re.compile(r"(^|\.)geometry\.coordinates(\.item)*$")
+
+
+def _prefix_matcher(pattern):
+    # prefixes repeat for every point, so only run the regex once per prefix
+    seen = {}
+
+    def matches(prefix: str) -> bool:
+        result = seen.get(prefix)
+        if result is None:
+            result = seen[prefix] = pattern.search(prefix) is not None
+        return result
+    return matches
+
+
+def _event_positions(path: str) -> Iterator[list]:
+    """every position under geometry.coordinates in document order"""
+    in_coordinates = _prefix_matcher(_COORDINATES_PREFIX)
+    with open(path, "rb") as f:
+        position = None
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if not in_coordinates(prefix):
+                continue
+            if event == "start_array":
+                position = []
+            elif event == "number" and position is not None:
+                position.append(value)
+            elif event == "end_array":
+                if position:
+                    yield position
+                position = None
+
+
+def _event_times(path: str) -> Iterator[object]:
+    """per point times (coordTimes/times arrays or a single time on a Point) in document order"""
+    is_time = _prefix_matcher(re.compile(f"{_TIME_LIST_PREFIX.pattern}|{_TIME_VALUE_PREFIX.pattern}"))
+    with open(path, "rb") as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if event in ("string", "number") and is_time(prefix):
+                yield value
+
+
+def _flat_positions(coordinates) -> Iterator[list]:
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        yield coordinates
+        return
+    for item in coordinates or []:
+        yield from _flat_positions(item)
+
+
+def _flat_times(value) -> Iterator[object]:
+    if isinstance(value, list):
+        for item in value:
+            yield from _flat_times(item)
+    elif value is not None:
+        yield value
+
+
+def _loaded_positions_and_times(path: str) -> Tuple[list, list]:
+    with open(path, "rb") as f:
+        document = json.load(f)
+    features = document.get("features") if document.get("type") == "FeatureCollection" else [document]
+    positions, times = [], []
+    for feature in features or []:
+        properties = feature.get("properties") or {}
+        geometry = feature.get("geometry") or {}
+        positions.extend(_flat_positions(geometry.get("coordinates")))
+        for key in ("coordTimes", "times", "time", "timestamp"):
+            if key in properties:
+                times.extend(_flat_times(properties[key]))
+                break
+    return positions, times
+
+
+def iter_geojson_points(path: str) -> Iterator[ImportedPoint]:
+    """
+    points of a geojson Feature/FeatureCollection. LineString/MultiLineString
+    features need a parallel properties.coordTimes (or times) array, Point
+    features a properties.time. with ijson installed positions and times are
+    read by two streaming passes in lockstep, otherwise the file is loaded
+    """
+    try:
+        if ijson is not None:
+            positions, times = _event_positions(path), _event_times(path)
+        else:
+            positions, times = _loaded_positions_and_times(path)
+            positions, times = iter(positions), iter(times)
+        for position in positions:
+            ts = next(times, None)
+            if ts is None:
+                raise ImportFormatException("GeoJSON needs a time for every point (properties.coordTimes)")
+            if len(position) < 2:
+                raise ImportFormatException("Invalid GeoJSON position")
+            ele = position[2] if len(position) > 2 else None
+            yield position[1], position[0], _point_time(ts), ele
+    except ImportFormatException:
+        raise
+    except Exception as e:
+        # json / ijson errors and bad values
+        raise ImportFormatException(f"Invalid GeoJSON file: {e}")
+
+
+IMPORT_PARSERS = {
+    "gpx": iter_gpx_points,
+    "geojson": iter_geojson_points,
+}
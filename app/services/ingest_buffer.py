@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+from app.config.database import db
+from app.config.settings import settings
+from app.services.coordinate_store import (
+    CoordinateRow, advance_running_stats, insert_coordinates, reserve_sequence, save_trip_progress
+)
+from app.services.live_stats import live_stats
+from app.services.trip_cache import trip_cache
+from app.utils.exceptions import IngestBufferFullException, TripAlreadyCompletedException
+
+logger = logging.getLogger(__name__)
+
+
+def _write_buffered_points(conn, trip_id: str, user_id: str, rows: List[CoordinateRow],
+                           coordinate_ids: List[str]):
+    """one transaction for a whole buffered run of points"""
+    with conn.cursor() as cursor:
+        reserved = reserve_sequence(cursor, trip_id, user_id)
+        if reserved is None:
+            # completed or deleted (maybe by another worker) since we accepted the points
+            raise TripAlreadyCompletedException("Trip is not recording anymore")
+        first_sequence, running_stats = reserved
+        insert_coordinates(cursor, trip_id, rows, first_sequence, coordinate_ids)
+        acc = advance_running_stats(running_stats, rows)
+        save_trip_progress(cursor, trip_id, first_sequence + len(rows), acc)
+        return acc
+
+
+class _PendingTrip:
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.rows: List[CoordinateRow] = []
+        self.coordinate_ids: List[str] = []
+        self.first_at: Optional[float] = None
+        # keeps flushes for one trip in order so sequence numbers follow arrival
+        self.lock = asyncio.Lock()
+        # flush_trip calls holding or waiting on lock. the entry (and so the
+        # lock) stays in IngestBuffer._trips until the last of them is done,
+        # a fresh lock next to a running flush would let two write at once
+        self.flushers = 0
+
+
+class IngestBuffer:
+    """
+    write-behind buffer for single coordinate uploads. points are acked once
+    validated and written per trip in bulk when max_points pile up or the
+    oldest one has waited max_latency seconds, complete_trip flushes first.
+
+    buffered points live in this process only, so with more than one worker
+    a trips uploads and its completion must reach the same worker (sticky
+    routing) or points still buffered elsewhere are dropped on flush
+    """
+
+    def __init__(self, max_points: int, max_latency: float, max_total: int):
+        self.max_points = max_points
+        self.max_latency = max_latency
+        self.max_total = max_total
+        self._trips: Dict[str, _PendingTrip] = {}
+        self._total = 0
+        self._tasks = set()
+        self._flusher: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.flushed_points = 0
+        self.dropped_points = 0
+
+    def start(self):
+        """start the background flusher, call from the event loop on startup"""
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._run())
+
+    async def _run(self):
+        interval = max(self.max_latency / 4, 0.05)
+        while True:
+            await asyncio.sleep(interval)
+            deadline = time.monotonic() - self.max_latency
+            for trip_id, pending in list(self._trips.items()):
+                if pending.lock.locked():
+                    continue
+                if pending.first_at is not None and pending.first_at <= deadline:
+                    self._schedule_flush(trip_id)
+
+    def _schedule_flush(self, trip_id: str):
+        task = asyncio.create_task(self.flush_trip(trip_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            # flush_trip already put the rows back with first_at set, so the
+            # flusher retries them once max_latency has passed
+            logger.error(f"Background flush failed, {self._total} points stay buffered: {error}")
+
+    async def add(self, trip_id: str, user_id: str, row: CoordinateRow, coordinate_id: str):
+        """
+        queue one validated point, must be called from the event loop
+        raises IngestBufferFullException if the buffer is still full after a flush
+        """
+        if self._total >= self.max_total:
+            # buffer is full, make this request wait for a flush (backpressure)
+            await self.flush_all()
+            if self._total >= self.max_total:
+                # flushes are failing (db down), turn the point away instead of
+                # acking it into a buffer that only grows
+                raise IngestBufferFullException(f"{self._total} points buffered and flushes are failing")
+        pending = self._trips.get(trip_id)
+        if pending is None:
+            pending = self._trips[trip_id] = _PendingTrip(user_id)
+        if pending.first_at is None:
+            pending.first_at = time.monotonic()
+        pending.rows.append(row)
+        pending.coordinate_ids.append(coordinate_id)
+        self._total += 1
+        if len(pending.rows) >= self.max_points:
+            self._schedule_flush(trip_id)
+
+    async def flush_trip(self, trip_id: str):
+        """write everything buffered for a trip, returns once it is committed"""
+        pending = self._trips.get(trip_id)
+        if pending is None:
+            return
+        pending.flushers += 1
+        try:
+            async with pending.lock:
+                await self._flush_pending(trip_id, pending)
+        finally:
+            pending.flushers -= 1
+            if not pending.flushers and not pending.rows and self._trips.get(trip_id) is pending:
+                del self._trips[trip_id]
+
+    async def _flush_pending(self, trip_id: str, pending: _PendingTrip):
+        """the write itself, caller holds pending.lock"""
+        if not pending.rows:
+            return
+        rows, coordinate_ids = pending.rows, pending.coordinate_ids
+        pending.rows, pending.coordinate_ids, pending.first_at = [], [], None
+        self._total -= len(rows)
+        try:
+            acc = await db.run(_write_buffered_points, trip_id, pending.user_id, rows, coordinate_ids)
+        except TripAlreadyCompletedException:
+            self.dropped_points += len(rows)
+            # our cached RECORDING is stale, make the next upload look it up
+            trip_cache.discard(trip_id)
+            logger.warning(f"Dropped {len(rows)} buffered points for trip {trip_id}, trip is not recording")
+        except Exception as e:
+            # nothing was written, put them back in front for the next flush
+            pending.rows = rows + pending.rows
+            pending.coordinate_ids = coordinate_ids + pending.coordinate_ids
+            pending.first_at = pending.first_at or time.monotonic()
+            self._total += len(rows)
+            logger.warning(f"Flushing {len(rows)} buffered points for trip {trip_id} failed: {e}")
+            raise
+        else:
+            self.flushes += 1
+            self.flushed_points += len(rows)
+            if acc is not None:
+                live_stats.update(trip_id, pending.user_id, "RECORDING", acc)
+
+    async def flush_all(self):
+        results = await asyncio.gather(
+            *(self.flush_trip(trip_id) for trip_id in list(self._trips)), return_exceptions=True
+        )
+        return [r for r in results if isinstance(r, Exception)]
+
+    def discard(self, trip_id: str):
+        """drop buffered points of a deleted trip"""
+        pending = self._trips.get(trip_id)
+        if pending is None:
+            return
+        self._total -= len(pending.rows)
+        pending.rows, pending.coordinate_ids, pending.first_at = [], [], None
+        if not pending.flushers:
+            # else the last flush removes it, keeping its lock in place till then
+            del self._trips[trip_id]
+
+    async def drain(self, timeout: float = 15.0):
+        """stop the flusher and write out whatever is buffered, for shutdown"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        if self._tasks:
+            await asyncio.wait(list(self._tasks), timeout=timeout)
+        try:
+            errors = await asyncio.wait_for(self.flush_all(), timeout=timeout)
+        except asyncio.TimeoutError:
+            errors = ["timeout"]
+        if errors or self._total:
+            logger.warning(f"Lost {self._total} buffered points on shutdown")
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.INGEST_BUFFER_ENABLED,
+            "bufferedPoints": self._total,
+            "bufferedTrips": len(self._trips),
+            "flushes": self.flushes,
+            "flushedPoints": self.flushed_points,
+            "droppedPoints": self.dropped_points,
+        }
+
+
+ingest_buffer = IngestBuffer(
+    settings.INGEST_BUFFER_MAX_POINTS,
+    settings.INGEST_BUFFER_MAX_LATENCY_SECONDS,
+    settings.INGEST_BUFFER_MAX_TOTAL_POINTS,
+)
@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from app.utils.geo_utils import TripStatsAccumulator
+
+# entries go stale after this so a poll that lands on another worker than
+# the uploads still catches up quickly (single worker is always fresh)
+LIVE_STATS_TTL_SECONDS = 5
+LIVE_STATS_MAX_TRIPS = 10000
+
+
+class LiveStatsRegistry:
+    """in-memory running stats per active trip, served by GET /trips/{id}/live"""
+
+    def __init__(self, ttl_seconds: float = LIVE_STATS_TTL_SECONDS, max_trips: int = LIVE_STATS_MAX_TRIPS):
+        self.ttl_seconds = ttl_seconds
+        self.max_trips = max_trips
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, trip_id: str, user_id: str, status: str, acc: TripStatsAccumulator):
+        snapshot = build_live_snapshot(trip_id, status, acc)
+        with self._lock:
+            self._entries[trip_id] = (time.monotonic() + self.ttl_seconds, user_id, snapshot)
+            self._entries.move_to_end(trip_id)
+            while len(self._entries) > self.max_trips:
+                self._entries.popitem(last=False)
+
+    def get(self, trip_id: str) -> Optional[tuple]:
+        """returns (user_id, snapshot) or None if missing/expired"""
+        with self._lock:
+            entry = self._entries.get(trip_id)
+            if entry is None:
+                return None
+            expires_at, user_id, snapshot = entry
+            if expires_at < time.monotonic():
+                del self._entries[trip_id]
+                return None
+            return user_id, snapshot
+
+    def discard(self, trip_id: str):
+        with self._lock:
+            self._entries.pop(trip_id, None)
+
+
+def build_live_snapshot(trip_id: str, status: str, acc: TripStatsAccumulator) -> dict:
+    stats = acc.result()
+    current_speed = acc.recent_speeds[-1] if acc.recent_speeds else 0.0
+    return {
+        "tripId": trip_id,
+        "status": status,
+        "pointCount": acc.point_count,
+        "totalDistance": stats["total_distance"],
+        "elapsedTime": stats["duration"],
+        "currentSpeed": round(current_speed, 2),
+        "averageSpeed": stats["average_speed"],
+        "maxSpeed": stats["max_speed"],
+        "lastTimestamp": acc.last_ts,
+    }
+
+
+def live_etag(snapshot: dict) -> str:
+    # point count only grows and status only moves forward so this is enough
+    return f'"{snapshot["tripId"]}-{snapshot["pointCount"]}-{snapshot["status"]}"'
+
+
+live_stats = LiveStatsRegistry()
@@ -0,0 +1,107 @@
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional
+from psycopg2.extras import Json
+from app.utils.geo_utils import simplify_route
+
+logger = logging.getLogger(__name__)
+
+# douglas-peucker tolerances (meters) precomputed for every completed trip,
+# roughly city / neighbourhood / street zoom on the map
+ROUTE_SIMPLIFICATION_LEVELS = (100, 20, 5)
+
+
+def _route_point(row) -> list:
+    lat, lon, ts, elevation = row
+    return [
+        float(lat), float(lon), ts.isoformat(),
+        float(elevation) if elevation is not None else None
+    ]
+
+
+def precompute_simplified_routes(cursor, trip_id: str, coordinates: List[tuple]) -> dict:
+    """
+    store a simplified copy of the route for every level in ROUTE_SIMPLIFICATION_LEVELS
+    coordinates are (lat, lon, timestamp, elevation) rows in route order
+    returns {tolerance: stored points}
+    """
+    levels = {}
+    for tolerance in ROUTE_SIMPLIFICATION_LEVELS:
+        points = [_route_point(r) for r in simplify_route(coordinates, tolerance)]
+        cursor.execute("""
+            INSERT INTO trip_route_simplified (trip_id, tolerance_m, point_count, points)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (trip_id, tolerance_m)
+            DO UPDATE SET point_count = EXCLUDED.point_count, points = EXCLUDED.points
+        """, (trip_id, tolerance, len(points), Json(points)))
+        levels[tolerance] = points
+    return levels
+
+
+def _store_missing_levels(cursor, trip_id: str) -> Optional[dict]:
+    """
+    levels of a completed trip the enrichment queue never got to (it lives in
+    process, a restart between completion and processing loses the job).
+    computed and stored on first read, None for trips still recording
+    """
+    cursor.execute("""
+        SELECT 1 FROM trips WHERE trip_id = %s AND status = 'COMPLETED'
+    """, (trip_id,))
+    if cursor.fetchone() is None:
+        return None
+    cursor.execute("""
+        SELECT latitude, longitude, timestamp, elevation
+        FROM trip_points(%s) ORDER BY sequence_order
+    """, (trip_id,))
+    coordinates = cursor.fetchall()
+    if not coordinates:
+        return None
+    logger.info(f"Storing missing simplified routes for trip {trip_id}")
+    return precompute_simplified_routes(cursor, trip_id, coordinates)
+
+
+def fetch_simplified_route(cursor, trip_id: str, tolerance: float) -> Optional[List[tuple]]:
+    """
+    precomputed (lat, lon, iso timestamp, elevation) rows for a stored level,
+    None if tolerance isnt a stored level or the trip is still recording
+    """
+    if tolerance not in ROUTE_SIMPLIFICATION_LEVELS:
+        return None
+    cursor.execute("""
+        SELECT points FROM trip_route_simplified WHERE trip_id = %s AND tolerance_m = %s
+    """, (trip_id, int(tolerance)))
+    result = cursor.fetchone()
+    if result:
+        return [tuple(p) for p in result[0]]
+    levels = _store_missing_levels(cursor, trip_id)
+    if levels is None:
+        return None
+    return [tuple(p) for p in levels[int(tolerance)]]
+
+
+def _epoch_ms(ts: datetime) -> int:
+    # timestamp columns hold naive utc
+    return round(ts.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def fetch_route_rows(cursor, trip_id: str, tolerance: Optional[float] = None) -> List[tuple]:
+    """
+    route as plain (lat, lon, epoch ms, elevation) tuples for the compact encoders,
+    straight from the db with no per-point model objects
+    """
+    if tolerance is not None:
+        stored = fetch_simplified_route(cursor, trip_id, tolerance)
+        if stored is not None:
+            return [
+                (lat, lon, _epoch_ms(datetime.fromisoformat(ts)), elevation)
+                for lat, lon, ts, elevation in stored
+            ]
+    cursor.execute("""
+        SELECT latitude::float8, longitude::float8,
+               (EXTRACT(EPOCH FROM timestamp) * 1000)::bigint, elevation::float8
+        FROM trip_points(%s) ORDER BY sequence_order
+    """, (trip_id,))
+    rows = cursor.fetchall()
+    if tolerance is not None:
+        rows = simplify_route(rows, tolerance)
+    return rows
@@ -0,0 +1,101 @@
+from typing import List, Tuple
+
+# grid index for "trips that passed through an area". every completed trip
+# gets its bounding box on the trips row plus one trip_grid_cells row per
+# GRID_CELL_DEGREES cell one of its points fell in, a search then only
+# looks at the points of trips that touched a cell of the box.
+# the init script backfill uses the same cell size, keep them in sync
+GRID_CELL_DEGREES = 0.01  # ~1.1km of latitude
+
+# (min_lon, min_lat, max_lon, max_lat)
+BBox = Tuple[float, float, float, float]
+
+
+def parse_bbox(value: str) -> BBox:
+    """minLon,minLat,maxLon,maxLat like geojson/osm, raises ValueError"""
+    parts = [float(part) for part in value.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox needs 4 numbers")
+    min_lon, min_lat, max_lon, max_lat = parts
+    if not (-180 <= min_lon <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise ValueError("bbox out of range")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def index_trip(cursor, trip_id: str, user_id: str):
+    """store bbox and grid cells of a trip, run once its points are final"""
+    cursor.execute("""
+        UPDATE trips t SET min_lat = b.min_lat, min_lon = b.min_lon,
+                           max_lat = b.max_lat, max_lon = b.max_lon
+        FROM (
+            SELECT MIN(latitude) AS min_lat, MIN(longitude) AS min_lon,
+                   MAX(latitude) AS max_lat, MAX(longitude) AS max_lon
+            FROM trip_points(%s)
+        ) b
+        WHERE t.trip_id = %s
+    """, (trip_id, trip_id))
+    cursor.execute("""
+        INSERT INTO trip_grid_cells (user_id, cell_lat, cell_lon, trip_id)
+        SELECT DISTINCT %s::uuid, floor(latitude / %s::numeric)::int,
+               floor(longitude / %s::numeric)::int, %s::uuid
+        FROM trip_points(%s)
+        ON CONFLICT DO NOTHING
+    """, (user_id, GRID_CELL_DEGREES, GRID_CELL_DEGREES, trip_id, trip_id))
+
+
+def search_trips_in_bbox(conn, user_id: str, bbox: BBox, limit: int,
+                         from_date=None, to_date=None) -> List[tuple]:
+    """
+    completed trips of the user with at least one point inside bbox, newest
+    first. the grid cells and stored bbox prune candidates, only those get
+    their points checked
+    """
+    min_lon, min_lat, max_lon, max_lat = bbox
+    filters = ["t.status = 'COMPLETED'"]
+    cell = GRID_CELL_DEGREES
+    params = [
+        user_id, min_lat, cell, max_lat, cell, min_lon, cell, max_lon, cell,
+        min_lat, max_lat, min_lon, max_lon,
+    ]
+    if from_date is not None:
+        filters.append("t.start_time >= %s")
+        params.append(from_date)
+    if to_date is not None:
+        filters.append("t.start_time < %s")
+        params.append(to_date)
+    where = " AND ".join(filters)
+    with conn.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT t.trip_id, t.start_time, t.end_time, t.total_distance, t.duration, t.average_speed
+            FROM trips t
+            WHERE t.trip_id IN (
+                SELECT trip_id FROM trip_grid_cells
+                -- cells in numeric like index_trip, a float floor can land one cell off
+                WHERE user_id = %s
+                  AND cell_lat BETWEEN floor(%s::numeric / %s::numeric)::int AND floor(%s::numeric / %s::numeric)::int
+                  AND cell_lon BETWEEN floor(%s::numeric / %s::numeric)::int AND floor(%s::numeric / %s::numeric)::int
+            )
+            AND t.max_lat >= %s AND t.min_lat <= %s AND t.max_lon >= %s AND t.min_lon <= %s
+            AND {where}
+            AND EXISTS (
+                SELECT 1 FROM trip_coordinates c
+                WHERE c.trip_id = t.trip_id
+                  AND c.latitude BETWEEN %s AND %s AND c.longitude BETWEEN %s AND %s
+                UNION ALL
+                -- packed trips only get lat/lon summed up, compared in the
+                -- stored 1e-8 degree units so the result matches the rows check
+                SELECT 1 FROM trip_coordinates_packed p
+                CROSS JOIN LATERAL (
+                    SELECT p.lat_base + SUM(d.lat) OVER w AS lat, p.lon_base + SUM(d.lon) OVER w AS lon
+                    FROM unnest(p.lat_deltas, p.lon_deltas) WITH ORDINALITY AS d(lat, lon, n)
+                    WINDOW w AS (ORDER BY d.n)
+                ) x
+                WHERE p.trip_id = t.trip_id AND p.start_time = t.start_time
+                  AND x.lat BETWEEN ceil(%s::numeric * 100000000)::bigint AND floor(%s::numeric * 100000000)::bigint
+                  AND x.lon BETWEEN ceil(%s::numeric * 100000000)::bigint AND floor(%s::numeric * 100000000)::bigint
+            )
+            ORDER BY t.start_time DESC, t.trip_id DESC
+            LIMIT %s
+        """, params + [min_lat, max_lat, min_lon, max_lon] * 2 + [limit])
+        return cursor.fetchall()
+
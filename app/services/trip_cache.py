@@ -0,0 +1,60 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from app.config.settings import settings
+
+
+class TripStateCache:
+    """
+    trip_id -> (owner, status) for trips this worker has seen, with a TTL
+    and LRU bound. owner never changes and status only moves forward so a
+    cached rejection (wrong owner, not recording) is always right. a cached
+    RECORDING is only a hint, the guarded UPDATE on write still checks it
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, trip_id: str) -> Optional[Tuple[str, str]]:
+        with self._lock:
+            entry = self._entries.get(trip_id)
+            if entry is not None:
+                expires_at, owner, status = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(trip_id)
+                    self.hits += 1
+                    return owner, status
+                del self._entries[trip_id]
+            self.misses += 1
+            return None
+
+    def set(self, trip_id: str, owner: str, status: str):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[trip_id] = (time.monotonic() + self.ttl_seconds, owner, status)
+            self._entries.move_to_end(trip_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, trip_id: str):
+        with self._lock:
+            self._entries.pop(trip_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+trip_cache = TripStateCache(settings.TRIP_CACHE_MAX_ENTRIES, settings.TRIP_CACHE_TTL_SECONDS)
@@ -0,0 +1,75 @@
+from datetime import datetime
+from typing import Optional, Tuple
+
+# per user, per day totals of completed trips (user_daily_stats), kept up to
+# date by complete/import/delete in the same transaction as the trip change
+# so GET /trips/stats reads at most one row per day of the period instead
+# of every trip. a trip counts on the day it started
+
+
+def add_trip_to_daily_stats(cursor, user_id: str, start_time: datetime, stats: dict):
+    """add a newly completed trip to its day"""
+    cursor.execute("""
+        INSERT INTO user_daily_stats (user_id, day, trip_count, total_distance, total_duration, max_speed)
+        VALUES (%s, %s::date, 1, %s, %s, %s)
+        ON CONFLICT (user_id, day) DO UPDATE SET
+            trip_count = user_daily_stats.trip_count + 1,
+            total_distance = user_daily_stats.total_distance + EXCLUDED.total_distance,
+            total_duration = user_daily_stats.total_duration + EXCLUDED.total_duration,
+            max_speed = GREATEST(user_daily_stats.max_speed, EXCLUDED.max_speed)
+    """, (
+        user_id, start_time, stats['total_distance'] or 0, stats['duration'] or 0, stats['max_speed'] or 0
+    ))
+
+
+def remove_trip_from_daily_stats(cursor, trip_id: str, user_id: str, start_time: datetime,
+                                 total_distance, duration, max_speed):
+    """
+    take a deleted completed trip back out of its day. sums are just
+    subtracted, the max only has to be looked up again (over that users
+    trips of that one day) when the deleted trip was the fastest
+    """
+    cursor.execute("""
+        UPDATE user_daily_stats SET
+            trip_count = trip_count - 1,
+            total_distance = total_distance - %s,
+            total_duration = total_duration - %s
+        WHERE user_id = %s AND day = %s::date
+        RETURNING trip_count, max_speed
+    """, (total_distance or 0, duration or 0, user_id, start_time))
+    result = cursor.fetchone()
+    if result is None:
+        return
+    trip_count, day_max_speed = result
+    if trip_count <= 0:
+        cursor.execute("""
+            DELETE FROM user_daily_stats WHERE user_id = %s AND day = %s::date
+        """, (user_id, start_time))
+    elif max_speed is not None and max_speed >= day_max_speed:
+        cursor.execute("""
+            UPDATE user_daily_stats SET max_speed = COALESCE((
+                SELECT MAX(max_speed) FROM trips
+                WHERE user_id = %s AND status = 'COMPLETED' AND trip_id <> %s
+                  AND start_time >= %s::date AND start_time < %s::date + 1
+            ), 0)
+            WHERE user_id = %s AND day = %s::date
+        """, (user_id, trip_id, start_time, start_time, user_id, start_time))
+
+
+def fetch_user_stats(conn, user_id: str, period: Optional[str]) -> Tuple[Optional[datetime], tuple]:
+    """
+    totals for the current week/month/year (or everything when period is
+    None), returns (period start, (trip_count, distance, duration, max_speed))
+    """
+    with conn.cursor() as cursor:
+        period_start = None
+        if period is not None:
+            cursor.execute("SELECT date_trunc(%s, CURRENT_DATE)::date", (period,))
+            period_start = cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT COALESCE(SUM(trip_count), 0), COALESCE(SUM(total_distance), 0),
+                   COALESCE(SUM(total_duration), 0), COALESCE(MAX(max_speed), 0)
+            FROM user_daily_stats
+            WHERE user_id = %s AND (%s::date IS NULL OR day >= %s::date)
+        """, (user_id, period_start, period_start))
+        return period_start, cursor.fetchone()
@@ -1,10 +1,103 @@
+import asyncio
+import time
 import httpx
 import logging
-from typing import Optional, Dict
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple
 from app.config.settings import settings
+from app.utils.metrics import WEATHER_LOOKUPS, WEATHER_REQUEST_LATENCY
 
 logger = logging.getLogger(__name__)
 
+# openweathermap api endpoint (using free tier)
+WEATHER_API_URL = "https://api.openweathermap.org/data/2.5/weather"
+
+# lookups inside the same ~5km cell and time bucket share one result
+CACHE_CELL_DEGREES = 0.05
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+class WeatherCache:
+    """TTL cache with an LRU bound, keyed by (lat cell, lon cell, time bucket)"""
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, Dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def key(self, latitude: float, longitude: float) -> Tuple:
+        bucket = int(time.time() // self.ttl_seconds)
+        return (
+            round(float(latitude) / CACHE_CELL_DEGREES),
+            round(float(longitude) / CACHE_CELL_DEGREES),
+            bucket,
+        )
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Tuple, value: Dict):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxEntries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+
+weather_cache = WeatherCache(
+    settings.WEATHER_CACHE_MAX_ENTRIES, settings.WEATHER_CACHE_TTL_SECONDS
+)
+# cache key -> task for lookups currently in flight
+_in_flight: Dict[Tuple, asyncio.Task] = {}
+
+
+async def start_weather_client():
+    """create the shared client, call once on app startup"""
+    global _client
+    if _client is not None:
+        return
+    limits = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+    try:
+        _client = httpx.AsyncClient(timeout=5.0, limits=limits, http2=True)
+    except ImportError:
+        # http2 needs the h2 package, plain keep-alive is still a big win
+        logger.warning("h2 not installed, weather client falling back to HTTP/1.1")
+        _client = httpx.AsyncClient(timeout=5.0, limits=limits)
+
+
+async def close_weather_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def _get_client() -> httpx.AsyncClient:
+    if _client is None:
+        await start_weather_client()
+    return _client
+
+
 async def fetch_current_weather(
     latitude: float,
     longitude: float
@@ -12,14 +105,52 @@ async def fetch_current_weather(
     """
     fetch current wether data from openweathermap api
     returns weather dict or None if servise unavailable
+    results are cached per geo-cell/time bucket and concurrent lookups
+    for the same cell share one request
     """
     if not settings.OPENWEATHERMAP_API_KEY:
         logger.warning("OpenWeatherMap API key not configured")
         return None
 
-    # openweathermap api endpoint (using free tier)
-    url = "https://api.openweathermap.org/data/2.5/weather"
+    key = weather_cache.key(latitude, longitude)
+    cached = weather_cache.get(key)
+    if cached is not None:
+        weather_cache.hits += 1
+        WEATHER_LOOKUPS.inc("hit")
+        return cached
+
+    in_flight = _in_flight.get(key)
+    if in_flight is not None:
+        weather_cache.coalesced += 1
+        WEATHER_LOOKUPS.inc("coalesced")
+        return await asyncio.shield(in_flight)
+
+    weather_cache.misses += 1
+    WEATHER_LOOKUPS.inc("miss")
+    task = asyncio.create_task(_request_weather(latitude, longitude))
+    _in_flight[key] = task
+    task.add_done_callback(lambda t: _on_request_done(key, t))
+    return await asyncio.shield(task)
+
 
+def _on_request_done(key: Tuple, task: asyncio.Task):
+    _in_flight.pop(key, None)
+    if not task.cancelled() and task.exception() is None and task.result():
+        weather_cache.set(key, task.result())
+
+
+async def _request_weather(latitude: float, longitude: float) -> Optional[Dict]:
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        result, outcome = await _call_weather_api(latitude, longitude)
+        return result
+    finally:
+        WEATHER_REQUEST_LATENCY.observe(time.perf_counter() - started, outcome)
+
+
+async def _call_weather_api(latitude: float, longitude: float) -> Tuple[Optional[Dict], str]:
+    """returns (weather or None, outcome) outcome being ok/client_error/error/unavailable"""
     params = {
         "lat": latitude,
         "lon": longitude,
@@ -28,43 +159,42 @@ async def fetch_current_weather(
     }
 
     max_retries = 2
-    timeout = 5.0
+    client = await _get_client()
 
     for attempt in range(max_retries):
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.get(url, params=params)
-
-                if response.status_code == 200:
-                    data = response.json()
-
-                    # get the importent weather data from response
-                    return {
-                        "temperature": data["main"]["temp"],
-                        "conditions": data["weather"][0]["description"],
-                        "wind_speed": data["wind"]["speed"],
-                        "wind_direction": get_wind_direction(data["wind"]["deg"]),
-                        "humidity": data["main"]["humidity"]
-                    }
-
-                elif response.status_code >= 500:
-                    # server error so we retry
-                    logger.warning(f"Weather API server error (attempt {attempt + 1}): {response.status_code}")
-                    continue
-                else:
-                    # client error dont retry
-                    logger.error(f"Weather API client error: {response.status_code}")
-                    return None
+            response = await client.get(WEATHER_API_URL, params=params)
+
+            if response.status_code == 200:
+                data = response.json()
+
+                # get the importent weather data from response
+                return {
+                    "temperature": data["main"]["temp"],
+                    "conditions": data["weather"][0]["description"],
+                    "wind_speed": data["wind"]["speed"],
+                    "wind_direction": get_wind_direction(data["wind"]["deg"]),
+                    "humidity": data["main"]["humidity"]
+                }, "ok"
+
+            elif response.status_code >= 500:
+                # server error so we retry
+                logger.warning(f"Weather API server error (attempt {attempt + 1}): {response.status_code}")
+                continue
+            else:
+                # client error dont retry
+                logger.error(f"Weather API client error: {response.status_code}")
+                return None, "client_error"
 
         except httpx.TimeoutException:
             logger.warning(f"Weather API timeout (attempt {attempt + 1})")
             continue
         except Exception as e:
             logger.error(f"Weather API error: {e}")
-            return None
+            return None, "error"
 
     logger.warning("Weather API unavailable after retries")
-    return None
+    return None, "unavailable"
 
 def get_wind_direction(degrees: float) -> str:
     """convert wind degrees to cardinal direciton like N, NE etc"""
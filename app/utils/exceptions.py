@@ -15,3 +15,18 @@ class WeatherServiceException(Exception):
 
 class NoCoordinatesException(Exception):
     pass
+
+class PoolTimeoutException(Exception):
+    pass
+
+class LiveStatsUnavailableException(Exception):
+    pass
+
+class InvalidCursorException(Exception):
+    pass
+
+class ImportFormatException(Exception):
+    pass
+
+class IngestBufferFullException(Exception):
+    pass
@@ -1,11 +1,22 @@
 import math
 from typing import List, Tuple, Union
-from datetime import datetime
+from datetime import datetime, timedelta
 from dateutil import parser as date_parser
 import logging
+from app.utils.metrics import TRIP_STATISTICS_LATENCY
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, stats fall back to the pure python loop
+    np = None
 
 logger = logging.getLogger(__name__)
 
+# below this many points the numpy setup costs more than the python loop
+VECTORIZE_MIN_POINTS = 32
+
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
 def calculate_haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
     calcualte distance between two coords using haversine formula
@@ -27,19 +38,230 @@ def calculate_haversine_distance(lat1: float, lon1: float, lat2: float, lon2: fl
     return distance  # Returns meters
 
 
+def calculate_initial_bearing(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """initial great circle bearing from point 1 to point 2, in radians"""
+    phi1 = math.radians(float(lat1))
+    phi2 = math.radians(float(lat2))
+    delta_lambda = math.radians(float(lon2) - float(lon1))
+    y = math.sin(delta_lambda) * math.cos(phi2)
+    x = (math.cos(phi1) * math.sin(phi2) -
+         math.sin(phi1) * math.cos(phi2) * math.cos(delta_lambda))
+    return math.atan2(y, x)
+
+
+def calculate_segment_distance(lat: float, lon: float, lat1: float, lon1: float,
+                               lat2: float, lon2: float) -> float:
+    """
+    distance in meters from a point to the segment 1->2
+    cross-track distance when the point projects onto the segment,
+    otherwise haversine distance to the nearer end
+    """
+    R = 6371000
+    d13 = calculate_haversine_distance(lat1, lon1, lat, lon)
+    d12 = calculate_haversine_distance(lat1, lon1, lat2, lon2)
+    if d12 == 0:
+        return d13
+    delta_theta = (calculate_initial_bearing(lat1, lon1, lat, lon) -
+                   calculate_initial_bearing(lat1, lon1, lat2, lon2))
+    if math.cos(delta_theta) < 0:
+        # point is behind the start of the segment
+        return d13
+    cross_track = math.asin(max(-1.0, min(1.0, math.sin(d13 / R) * math.sin(delta_theta))))
+    along_track = math.acos(max(-1.0, min(1.0, math.cos(d13 / R) / math.cos(cross_track)))) * R
+    if along_track > d12:
+        return calculate_haversine_distance(lat2, lon2, lat, lon)
+    return abs(cross_track) * R
+
+
+def _segment_distances_numpy(lats, lons, start: int, end: int):
+    """calculate_segment_distance for every point strictly between start and end"""
+    R = 6371000
+    lat1, lon1, lat2, lon2 = lats[start], lons[start], lats[end], lons[end]
+    plat = lats[start + 1:end]
+    plon = lons[start + 1:end]
+
+    def haversine(la1, lo1, la2, lo2):
+        a = (np.sin(np.radians(la2 - la1) / 2) ** 2 +
+             np.cos(np.radians(la1)) * np.cos(np.radians(la2)) *
+             np.sin(np.radians(lo2 - lo1) / 2) ** 2)
+        return R * (2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)))
+
+    def bearing(la1, lo1, la2, lo2):
+        phi1, phi2 = np.radians(la1), np.radians(la2)
+        delta_lambda = np.radians(lo2 - lo1)
+        y = np.sin(delta_lambda) * np.cos(phi2)
+        x = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(delta_lambda)
+        return np.arctan2(y, x)
+
+    d13 = haversine(lat1, lon1, plat, plon)
+    d12 = calculate_haversine_distance(lat1, lon1, lat2, lon2)
+    if d12 == 0:
+        return d13
+    delta_theta = bearing(lat1, lon1, plat, plon) - bearing(lat1, lon1, lat2, lon2)
+    cross_track = np.arcsin(np.clip(np.sin(d13 / R) * np.sin(delta_theta), -1.0, 1.0))
+    along_track = np.arccos(np.clip(np.cos(d13 / R) / np.cos(cross_track), -1.0, 1.0)) * R
+    dist = np.abs(cross_track) * R
+    dist = np.where(along_track > d12, haversine(lat2, lon2, plat, plon), dist)
+    return np.where(np.cos(delta_theta) < 0, d13, dist)
+
+
+def _douglas_peucker_importance(points: List[Tuple], tolerance_m: float) -> List[float]:
+    """
+    run douglas-peucker once and return each points importance: the smallest
+    split distance on its path down the recursion (inf for the endpoints,
+    0 for points pruned at tolerance_m). the kept set for any tolerance
+    t >= tolerance_m is then exactly the points with importance > t
+    """
+    n = len(points)
+    importance = [0.0] * n
+    importance[0] = importance[-1] = float("inf")
+    if np is not None:
+        lats = np.fromiter((float(p[0]) for p in points), dtype=np.float64, count=n)
+        lons = np.fromiter((float(p[1]) for p in points), dtype=np.float64, count=n)
+    stack = [(0, n - 1, float("inf"))]
+    while stack:
+        start, end, parent_importance = stack.pop()
+        if end - start < 2:
+            continue
+        if np is not None:
+            distances = _segment_distances_numpy(lats, lons, start, end)
+            offset = int(np.argmax(distances))
+            max_dist = float(distances[offset])
+            max_idx = start + 1 + offset
+        else:
+            lat1, lon1 = float(points[start][0]), float(points[start][1])
+            lat2, lon2 = float(points[end][0]), float(points[end][1])
+            max_dist = -1.0
+            max_idx = start
+            for i in range(start + 1, end):
+                dist = calculate_segment_distance(
+                    float(points[i][0]), float(points[i][1]), lat1, lon1, lat2, lon2
+                )
+                if dist > max_dist:
+                    max_dist = dist
+                    max_idx = i
+        if max_dist > tolerance_m:
+            point_importance = min(max_dist, parent_importance)
+            importance[max_idx] = point_importance
+            stack.append((start, max_idx, point_importance))
+            stack.append((max_idx, end, point_importance))
+    return importance
+
+
+def simplify_route(points: List[Tuple], tolerance_m: float) -> List[Tuple]:
+    """
+    douglas-peucker simplification of (lat, lon, ...) tuples
+    keeps first and last point and every point that is further than
+    tolerance_m meters from the simplified line, extra tuple fields are kept as is
+    """
+    if len(points) <= 2 or tolerance_m <= 0:
+        return list(points)
+    importance = _douglas_peucker_importance(points, tolerance_m)
+    return [p for p, imp in zip(points, importance) if imp > tolerance_m]
+
+
+def simplify_route_to_count(points: List[Tuple], max_points: int, tolerance_m: float = 1.0) -> List[Tuple]:
+    """
+    douglas-peucker with the smallest tolerance (>= tolerance_m) that leaves
+    at most max_points points
+    """
+    if len(points) <= 2:
+        return list(points)
+    tolerance_m = max(tolerance_m, 1.0)
+    importance = _douglas_peucker_importance(points, tolerance_m)
+    interior = sorted((imp for imp in importance[1:-1] if imp > tolerance_m), reverse=True)
+    if len(interior) + 2 > max_points:
+        # raise the tolerance to the importance of the first point that doesnt fit
+        tolerance_m = interior[max(max_points - 2, 0)]
+    return [p for p, imp in zip(points, importance) if imp > tolerance_m]
+
+
+# strptime formats we try for non-iso strings before falling back to dateutil
+# (month first like dateutils default, so results dont change)
+KNOWN_TIMESTAMP_FORMATS = [
+    "%Y/%m/%d %H:%M:%S",
+    "%Y/%m/%d %H:%M:%S.%f",
+    "%m/%d/%Y %H:%M:%S",
+    "%m-%d-%Y %H:%M:%S",
+    "%a, %d %b %Y %H:%M:%S %z",
+]
+_MAX_CACHED_SHAPES = 256
+
+# "shape" of a timestamp string (digits masked) -> strptime format that parsed it,
+# None means no known format fits and dateutil is needed
+_format_cache = {}
+
+# how often each parse_timestamp tier was hit
+_parse_tier_counts = {"datetime": 0, "isoformat": 0, "cached_format": 0, "dateutil": 0, "failed": 0}
+
+
+_DIGIT_MASK = str.maketrans("0123456789", "0000000000")
+
+
+def _timestamp_shape(ts: str) -> str:
+    return ts.translate(_DIGIT_MASK)
+
+
+def _parse_with_known_format(ts: str):
+    """try the format that worked for this shape before, learn it if new"""
+    shape = _timestamp_shape(ts)
+    if shape in _format_cache:
+        fmt = _format_cache[shape]
+        if fmt is None:
+            return None
+        try:
+            return datetime.strptime(ts, fmt)
+        except ValueError:
+            return None
+    found = None
+    for fmt in KNOWN_TIMESTAMP_FORMATS:
+        try:
+            parsed = datetime.strptime(ts, fmt)
+        except ValueError:
+            continue
+        found = fmt
+        break
+    if len(_format_cache) < _MAX_CACHED_SHAPES:
+        _format_cache[shape] = found
+    return parsed if found else None
+
+
 def parse_timestamp(ts: Union[str, datetime]) -> datetime:
-    """convert timestmp to datetime obj, handles diferent formats"""
+    """
+    convert timestmp to datetime obj, handles diferent formats
+    cheapest first: datetime passthrough (what psycopg2 returns),
+    fromisoformat, cached strptime formats, dateutil as last resort
+    """
     if isinstance(ts, datetime):
+        _parse_tier_counts["datetime"] += 1
         return ts
     if isinstance(ts, str):
         try:
-            return date_parser.parse(ts)
+            parsed = datetime.fromisoformat(ts)
+            _parse_tier_counts["isoformat"] += 1
+            return parsed
+        except ValueError:
+            pass
+        parsed = _parse_with_known_format(ts)
+        if parsed is not None:
+            _parse_tier_counts["cached_format"] += 1
+            return parsed
+        try:
+            parsed = date_parser.parse(ts)
+            _parse_tier_counts["dateutil"] += 1
+            return parsed
         except Exception as e:
+            _parse_tier_counts["failed"] += 1
             logger.error(f"Failed to parse timestamp '{ts}': {e}")
             raise ValueError(f"Invalid timestamp format: {ts}")
     raise ValueError(f"Unsupported timestamp type: {type(ts)}")
 
 
+def timestamp_parse_stats() -> dict:
+    """counts of which parse_timestamp tier handled each call"""
+    return dict(_parse_tier_counts)
+
+
 def calculate_speed_ms(distance_meters: float, time_seconds: float) -> float:
     """calc speed in m/s given distance and time"""
     if time_seconds <= 0:
@@ -47,50 +269,15 @@ def calculate_speed_ms(distance_meters: float, time_seconds: float) -> float:
     return distance_meters / time_seconds
 
 
-def calculate_trip_statistics(coordinates: List[Tuple]) -> dict:
+def _segment_stats_python(parsed_coords: List[Tuple]) -> Tuple[float, float]:
     """
-    calc trip stats from list of (lat, lon, timestamp) tuples
-    
-    returns dict with:
-        - total_distance: meters
-        - duration: seconds  
-        - average_speed: m/s
-        - max_speed: m/s (uses 3-segmnet moving avg to filter out gps spikes)
+    walk the sorted (lat, lon, datetime) points segment by segment
+    returns (total_distance, max_speed), pure python fallback for the numpy version
     """
-    if len(coordinates) < 2:
-        return {
-            "total_distance": 0.0,
-            "duration": 0,
-            "average_speed": 0.0,
-            "max_speed": 0.0
-        }
-    
     total_distance = 0.0
     max_speed = 0.0
     segment_speeds = []  # store all valid speeds for moving avg later
     
-    # parse all the timestamps first
-    parsed_coords = []
-    for coord in coordinates:
-        lat, lon, ts = coord[0], coord[1], coord[2]
-        try:
-            parsed_ts = parse_timestamp(ts)
-            parsed_coords.append((float(lat), float(lon), parsed_ts))
-        except Exception as e:
-            logger.warning(f"Skipping coordinate with invalid timestamp: {e}")
-            continue
-    
-    if len(parsed_coords) < 2:
-        return {
-            "total_distance": 0.0,
-            "duration": 0,
-            "average_speed": 0.0,
-            "max_speed": 0.0
-        }
-    
-    # sort by timestamp to make sure theyre in right order
-    parsed_coords.sort(key=lambda x: x[2])
-    
     for i in range(len(parsed_coords) - 1):
         lat1, lon1, time1 = parsed_coords[i]
         lat2, lon2, time2 = parsed_coords[i + 1]
@@ -128,6 +315,222 @@ def calculate_trip_statistics(coordinates: List[Tuple]) -> dict:
         # for short trips just use max of availble speeds
         max_speed = max(segment_speeds)
     
+    return total_distance, max_speed
+
+
+def _segment_stats_numpy(parsed_coords: List[Tuple]) -> Tuple[float, float]:
+    """
+    same as _segment_stats_python but over arrays in one pass
+    same formula, filters and summation order. numpys simd sin/cos/atan2 can
+    be an ulp off from libm so the sums may differ in the last bits, far
+    below the 0.01 m the stats are rounded to
+    """
+    n = len(parsed_coords)
+    lats = np.fromiter((c[0] for c in parsed_coords), dtype=np.float64, count=n)
+    lons = np.fromiter((c[1] for c in parsed_coords), dtype=np.float64, count=n)
+    # integer microseconds from the first point, same as timedelta.total_seconds()
+    t0 = parsed_coords[0][2]
+    micros = np.fromiter(
+        ((c[2] - t0) // _ONE_MICROSECOND for c in parsed_coords), dtype=np.int64, count=n
+    )
+    
+    # haversine for every segment at once
+    R = 6371000
+    phi1 = np.radians(lats[:-1])
+    phi2 = np.radians(lats[1:])
+    delta_phi = np.radians(lats[1:] - lats[:-1])
+    delta_lambda = np.radians(lons[1:] - lons[:-1])
+    a = (np.square(np.sin(delta_phi / 2)) +
+         np.cos(phi1) * np.cos(phi2) *
+         np.square(np.sin(delta_lambda / 2)))
+    segment_distances = R * (2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a)))
+    time_diffs = np.diff(micros) / 10**6
+    
+    # same filters as the loop: skip gps noise < 1m and non-positive time diffs
+    valid = ~(segment_distances < 1) & (time_diffs > 0)
+    distances = segment_distances[valid]
+    if distances.size == 0:
+        return 0.0, 0.0
+    # cumsum adds left to right like the loop does (np.sum would reorder)
+    total_distance = float(np.cumsum(distances)[-1])
+    
+    segment_speeds = distances / time_diffs[valid]
+    segment_speeds = segment_speeds[segment_speeds < 20]
+    
+    max_speed = 0.0
+    if segment_speeds.size >= 3:
+        window_avgs = (segment_speeds[:-2] + segment_speeds[1:-1] + segment_speeds[2:]) / 3
+        max_speed = max(max_speed, float(window_avgs.max()))
+    elif segment_speeds.size > 0:
+        max_speed = float(segment_speeds.max())
+    
+    return total_distance, max_speed
+
+
+class TripStatsAccumulator:
+    """
+    running version of calculate_trip_statistics, fed one point at a time
+    so the stats are kept up to date during ingestion instead of recomputed
+    from every row on completion
+
+    gives the same result as calculate_trip_statistics on the same points as
+    long as they arrive in timestamp order. an out of order point clears
+    in_order so the caller knows to fall back to a full recompute
+    """
+
+    def __init__(self):
+        self.point_count = 0
+        self.total_distance = 0.0
+        self.first_ts = None
+        self.last_ts = None
+        self.last_lat = None
+        self.last_lon = None
+        self.recent_speeds = []  # last 2 valid segment speeds, for the 3-segment window
+        self.speed_count = 0
+        self.max_window_speed = 0.0
+        self.max_segment_speed = 0.0
+        self.in_order = True
+
+    def add(self, lat: float, lon: float, ts: datetime):
+        lat, lon = float(lat), float(lon)
+        self.point_count += 1
+        if self.last_ts is None:
+            self.first_ts = ts
+        else:
+            if ts < self.last_ts:
+                self.in_order = False
+            # same filters as the batch loop (gps noise < 1m, bad time diffs, > 20m/s)
+            segment_distance = calculate_haversine_distance(self.last_lat, self.last_lon, lat, lon)
+            time_diff = (ts - self.last_ts).total_seconds()
+            if not segment_distance < 1 and time_diff > 0:
+                self.total_distance += segment_distance
+                segment_speed = calculate_speed_ms(segment_distance, time_diff)
+                if segment_speed < 20:
+                    self._add_speed(segment_speed)
+        self.last_lat, self.last_lon, self.last_ts = lat, lon, ts
+
+    def _add_speed(self, speed: float):
+        window = self.recent_speeds + [speed]
+        if len(window) == 3:
+            window_avg = (window[0] + window[1] + window[2]) / 3
+            self.max_window_speed = max(self.max_window_speed, window_avg)
+        self.recent_speeds = window[-2:]
+        self.speed_count += 1
+        self.max_segment_speed = max(self.max_segment_speed, speed)
+
+    def result(self) -> dict:
+        """same dict as calculate_trip_statistics"""
+        if self.point_count < 2:
+            return {
+                "total_distance": 0.0,
+                "duration": 0,
+                "average_speed": 0.0,
+                "max_speed": 0.0
+            }
+        if self.speed_count >= 3:
+            max_speed = self.max_window_speed
+        else:
+            max_speed = self.max_segment_speed
+        duration = int((self.last_ts - self.first_ts).total_seconds())
+        if duration > 0 and self.total_distance > 0:
+            average_speed = self.total_distance / duration
+        else:
+            average_speed = 0.0
+        return {
+            "total_distance": round(self.total_distance, 2),
+            "duration": duration,
+            "average_speed": round(average_speed, 2),
+            "max_speed": round(max_speed, 2)
+        }
+
+    def to_state(self) -> dict:
+        """json friendly state, stored in trips.running_stats"""
+        return {
+            "point_count": self.point_count,
+            "total_distance": self.total_distance,
+            "first_ts": self.first_ts.isoformat() if self.first_ts else None,
+            "last_ts": self.last_ts.isoformat() if self.last_ts else None,
+            "last_lat": self.last_lat,
+            "last_lon": self.last_lon,
+            "recent_speeds": self.recent_speeds,
+            "speed_count": self.speed_count,
+            "max_window_speed": self.max_window_speed,
+            "max_segment_speed": self.max_segment_speed,
+            "in_order": self.in_order,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict) -> "TripStatsAccumulator":
+        acc = cls()
+        acc.point_count = state["point_count"]
+        acc.total_distance = state["total_distance"]
+        acc.first_ts = datetime.fromisoformat(state["first_ts"]) if state["first_ts"] else None
+        acc.last_ts = datetime.fromisoformat(state["last_ts"]) if state["last_ts"] else None
+        acc.last_lat = state["last_lat"]
+        acc.last_lon = state["last_lon"]
+        acc.recent_speeds = list(state["recent_speeds"])
+        acc.speed_count = state["speed_count"]
+        acc.max_window_speed = state["max_window_speed"]
+        acc.max_segment_speed = state["max_segment_speed"]
+        acc.in_order = state["in_order"]
+        return acc
+
+
+def calculate_trip_statistics(coordinates: List[Tuple]) -> dict:
+    """
+    calc trip stats from list of (lat, lon, timestamp) tuples, timed into
+    the trip_statistics_duration_seconds histogram (see _trip_statistics)
+    """
+    path = "numpy" if np is not None and len(coordinates) >= VECTORIZE_MIN_POINTS else "python"
+    with TRIP_STATISTICS_LATENCY.time(path):
+        return _trip_statistics(coordinates)
+
+
+def _trip_statistics(coordinates: List[Tuple]) -> dict:
+    """
+    calc trip stats from list of (lat, lon, timestamp) tuples
+    
+    returns dict with:
+        - total_distance: meters
+        - duration: seconds  
+        - average_speed: m/s
+        - max_speed: m/s (uses 3-segmnet moving avg to filter out gps spikes)
+    """
+    if len(coordinates) < 2:
+        return {
+            "total_distance": 0.0,
+            "duration": 0,
+            "average_speed": 0.0,
+            "max_speed": 0.0
+        }
+    
+    # parse all the timestamps first
+    parsed_coords = []
+    for coord in coordinates:
+        lat, lon, ts = coord[0], coord[1], coord[2]
+        try:
+            parsed_ts = parse_timestamp(ts)
+            parsed_coords.append((float(lat), float(lon), parsed_ts))
+        except Exception as e:
+            logger.warning(f"Skipping coordinate with invalid timestamp: {e}")
+            continue
+    
+    if len(parsed_coords) < 2:
+        return {
+            "total_distance": 0.0,
+            "duration": 0,
+            "average_speed": 0.0,
+            "max_speed": 0.0
+        }
+    
+    # sort by timestamp to make sure theyre in right order
+    parsed_coords.sort(key=lambda x: x[2])
+    
+    if np is not None and len(parsed_coords) >= VECTORIZE_MIN_POINTS:
+        total_distance, max_speed = _segment_stats_numpy(parsed_coords)
+    else:
+        total_distance, max_speed = _segment_stats_python(parsed_coords)
+    
     # calc duration from first to last timestamp
     start_time = parsed_coords[0][2]
     end_time = parsed_coords[-1][2]
@@ -0,0 +1,54 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Tuple
+from app.utils.exceptions import InvalidCursorException
+
+
+def _time_value(value) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def _distance_value(value) -> Decimal:
+    if isinstance(value, bool):
+        raise ValueError("not a distance")
+    distance = Decimal(value)
+    if not distance.is_finite():
+        raise ValueError("not a distance")
+    return distance
+
+
+# how the sort key of each TripSort comes back out of a cursor, the value
+# goes straight into the keyset WHERE so it has to have the columns type
+_CURSOR_VALUES = {
+    "newest": _time_value,
+    "oldest": _time_value,
+    "longest": _distance_value,
+}
+
+
+def encode_cursor(sort: str, value, trip_id: str) -> str:
+    """opaque keyset cursor: the sort key of the last row plus its trip_id"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+    raw = json.dumps([sort, value, str(trip_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[str, str]:
+    """returns (sort key value, trip_id), raises InvalidCursorException if tampered or for another sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, trip_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise InvalidCursorException("Malformed cursor")
+    if cursor_sort != sort:
+        raise InvalidCursorException("Cursor was issued for a different sort order")
+    try:
+        return _CURSOR_VALUES[sort](value), str(uuid.UUID(trip_id))
+    except (TypeError, ValueError, KeyError, AttributeError, InvalidOperation):
+        raise InvalidCursorException("Malformed cursor")
@@ -0,0 +1,183 @@
+import math
+import struct
+import sys
+from array import array
+from typing import Iterable, List, Optional, Tuple
+
+POLYLINE_MEDIA_TYPE = "application/vnd.bbp.polyline+json"
+BINARY_MEDIA_TYPE = "application/vnd.bbp.route+binary"
+
+# binary layout (little endian):
+#   header  magic "BBPR", version u8, flags u8, reserved u16, point count u32,
+#           start time f64 (unix seconds)
+#   then    latitude float32[n], longitude float32[n], time offset ms int32[n]
+#           (int64[n] if flags & 2, routes spanning more than ~24.8 days),
+#           elevation float32[n] (only if flags & 1, NaN where missing)
+BINARY_MAGIC = b"BBPR"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sBBHId")
+FLAG_ELEVATION = 1
+FLAG_WIDE_OFFSETS = 2
+INT32_MIN, INT32_MAX = -2**31, 2**31 - 1
+
+# (latitude, longitude, epoch milliseconds, elevation)
+RouteRow = Tuple[float, float, int, Optional[float]]
+
+
+def _append_encoded(delta: int, out: list):
+    """zigzag one signed delta and append it as 5 bit chunks"""
+    delta = ~(delta << 1) if delta < 0 else (delta << 1)
+    while delta >= 0x20:
+        out.append(chr((0x20 | (delta & 0x1f)) + 63))
+        delta >>= 5
+    out.append(chr(delta + 63))
+
+
+def encode_polyline_values(values: Iterable[int]) -> str:
+    """google polyline algorithm over a sequence of ints (delta + zigzag + 5 bit chunks)"""
+    out = []
+    previous = 0
+    for value in values:
+        _append_encoded(value - previous, out)
+        previous = value
+    return "".join(out)
+
+
+def _decode_deltas(encoded: str) -> List[int]:
+    """the signed deltas of a polyline string, before summing them up"""
+    deltas = []
+    index = 0
+    while index < len(encoded):
+        result = 0
+        shift = 0
+        while True:
+            b = ord(encoded[index]) - 63
+            index += 1
+            result |= (b & 0x1f) << shift
+            shift += 5
+            if b < 0x20:
+                break
+        deltas.append(~(result >> 1) if result & 1 else (result >> 1))
+    return deltas
+
+
+def _running_sum(deltas: Iterable[int]) -> List[int]:
+    values = []
+    current = 0
+    for delta in deltas:
+        current += delta
+        values.append(current)
+    return values
+
+
+def decode_polyline_values(encoded: str) -> List[int]:
+    """inverse of encode_polyline_values"""
+    return _running_sum(_decode_deltas(encoded))
+
+
+def encode_route_polyline(rows: List[RouteRow], precision: int = 5) -> dict:
+    """
+    polyline payload for a route:
+        polyline   - standard google encoded polyline (lat, lon interleaved)
+        timestamps - delta encoded ms offsets from startTimeMs
+        elevations - delta encoded decimeters, missing values carry the
+                     previous one forward (None if the route has no elevation)
+    """
+    factor = 10 ** precision
+    out = []
+    prev_lat = prev_lon = 0
+    for lat, lon, _, _ in rows:
+        # lat/lon deltas are taken per axis, like googles encoder does
+        lat, lon = round(lat * factor), round(lon * factor)
+        _append_encoded(lat - prev_lat, out)
+        _append_encoded(lon - prev_lon, out)
+        prev_lat, prev_lon = lat, lon
+    start_ms = rows[0][2] if rows else 0
+    has_elevation = any(r[3] is not None for r in rows)
+    elevations = None
+    if has_elevation:
+        last = 0
+        decimeters = []
+        for r in rows:
+            if r[3] is not None:
+                last = round(r[3] * 10)
+            decimeters.append(last)
+        elevations = encode_polyline_values(decimeters)
+    return {
+        "pointCount": len(rows),
+        "precision": precision,
+        "startTimeMs": start_ms,
+        "polyline": "".join(out),
+        "timestamps": encode_polyline_values(r[2] - start_ms for r in rows),
+        "elevations": elevations,
+    }
+
+
+def decode_route_polyline(payload: dict) -> List[RouteRow]:
+    """
+    inverse of encode_route_polyline, lat/lon come back rounded to its precision
+    and missing elevations as the carried forward value
+    """
+    factor = 10 ** payload["precision"]
+    deltas = _decode_deltas(payload["polyline"])
+    lats = _running_sum(deltas[0::2])
+    lons = _running_sum(deltas[1::2])
+    offsets = decode_polyline_values(payload["timestamps"])
+    if payload["elevations"] is not None:
+        elevations = [d / 10 for d in decode_polyline_values(payload["elevations"])]
+    else:
+        elevations = [None] * len(lats)
+    start_ms = payload["startTimeMs"]
+    return [
+        (lats[i] / factor, lons[i] / factor, start_ms + offsets[i], elevations[i])
+        for i in range(payload["pointCount"])
+    ]
+
+
+def encode_route_binary(rows: List[RouteRow]) -> bytes:
+    """packed columnar float32/int32 arrays, see BINARY_HEADER for the layout"""
+    n = len(rows)
+    start_ms = rows[0][2] if rows else 0
+    has_elevation = any(r[3] is not None for r in rows)
+    lats = array("f", (r[0] for r in rows))
+    lons = array("f", (r[1] for r in rows))
+    offset_values = [r[2] - start_ms for r in rows]
+    # int32 ms only reaches ~24.8 days either way, longer ones get int64
+    wide = bool(rows) and not (INT32_MIN <= min(offset_values) and max(offset_values) <= INT32_MAX)
+    offsets = array("q" if wide else "i", offset_values)
+    columns = [lats, lons, offsets]
+    if has_elevation:
+        columns.append(array("f", (r[3] if r[3] is not None else math.nan for r in rows)))
+    flags = (FLAG_ELEVATION if has_elevation else 0) | (FLAG_WIDE_OFFSETS if wide else 0)
+    header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, flags, 0, n, start_ms / 1000.0)
+    parts = [header]
+    for column in columns:
+        if sys.byteorder != "little":
+            column.byteswap()
+        parts.append(column.tobytes())
+    return b"".join(parts)
+
+
+def decode_route_binary(payload: bytes) -> List[RouteRow]:
+    """inverse of encode_route_binary (lat/lon come back as float32 precision)"""
+    magic, version, flags, _, n, start = BINARY_HEADER.unpack_from(payload, 0)
+    if magic != BINARY_MAGIC or version != BINARY_VERSION:
+        raise ValueError("Not a BBP binary route")
+    offset = BINARY_HEADER.size
+    columns = []
+    typecodes = ["f", "f", "q" if flags & FLAG_WIDE_OFFSETS else "i"] + (["f"] if flags & FLAG_ELEVATION else [])
+    for typecode in typecodes:
+        column = array(typecode)
+        size = column.itemsize * n
+        column.frombytes(payload[offset:offset + size])
+        if sys.byteorder != "little":
+            column.byteswap()
+        columns.append(column)
+        offset += size
+    start_ms = round(start * 1000)
+    elevations = columns[3] if len(columns) > 3 else [math.nan] * n
+    return [
+        (columns[0][i], columns[1][i], start_ms + columns[2][i],
+         None if math.isnan(elevations[i]) else elevations[i])
+        for i in range(n)
+    ]
@@ -1,3 +1,7 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
@@ -5,6 +9,63 @@ from app.config.settings import settings
 
 security = HTTPBearer()
 
+
+class TokenCache:
+    """
+    verified token -> user_id, LRU bounded with a TTL that never goes past
+    the tokens own exp claim, so a cached token expires when the token does
+    only tokens that passed jwt.decode are ever stored
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                expires_at, user_id = entry
+                # exp is wall clock so this is too
+                if expires_at > time.time():
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return user_id
+                del self._entries[token]
+            self.misses += 1
+            return None
+
+    def set(self, token: str, user_id: str, exp: Optional[float]):
+        expires_at = time.time() + self.ttl_seconds
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        with self._lock:
+            self._entries[token] = (expires_at, user_id)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+token_cache = TokenCache(settings.JWT_CACHE_MAX_ENTRIES, settings.JWT_CACHE_TTL_SECONDS)
+
+
 def decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(
@@ -20,6 +81,10 @@ def decode_token(token: str) -> dict:
 
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     token = credentials.credentials
+    if settings.JWT_CACHE_MAX_ENTRIES > 0:
+        user_id = token_cache.get(token)
+        if user_id is not None:
+            return user_id
     payload = decode_token(token)
     user_id = payload.get("user_id")
     if not user_id:
@@ -27,4 +92,6 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token payload"
         )
+    if settings.JWT_CACHE_MAX_ENTRIES > 0:
+        token_cache.set(token, user_id, payload.get("exp"))
     return user_id
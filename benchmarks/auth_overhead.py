@@ -0,0 +1,95 @@
+"""
+auth overhead per request with the verified token cache on and off. times
+get_current_user on its own, then requests through a bare fastapi app (same
+dependency, no db) against the same route without auth, so the difference
+is what auth adds to every call. tokens are spread over --users users like
+devices that each keep reusing theirs
+
+    JWT_SECRET_KEY=... python -m benchmarks.auth_overhead [--requests N] [--users N] [--repeat N]
+"""
+import argparse
+import asyncio
+import time
+from fastapi import Depends, FastAPI
+from fastapi.security import HTTPAuthorizationCredentials
+from benchmarks.common import auth_header, best_of, print_table
+from app.config.settings import settings
+from app.utils.security import get_current_user, token_cache
+
+
+def _bare_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/open")
+    async def open_route():
+        return {"ok": True}
+
+    @app.get("/authed")
+    async def authed_route(user_id: str = Depends(get_current_user)):
+        return {"ok": True}
+
+    return app
+
+
+async def _requests_time(client, path: str, headers: list, count: int) -> float:
+    started = time.perf_counter()
+    for i in range(count):
+        response = await client.get(path, headers=headers[i % len(headers)])
+        response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def _per_request(headers: list, count: int, repeat: int) -> dict:
+    import httpx
+    transport = httpx.ASGITransport(app=_bare_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        times = {}
+        for path in ("/open", "/authed"):
+            # warm up, and fills the cache when it is on
+            await _requests_time(client, path, headers, len(headers))
+            times[path] = min([await _requests_time(client, path, headers, count) for _ in range(repeat)])
+        return times
+
+
+def _set_cache(enabled: bool, max_entries: int):
+    settings.JWT_CACHE_MAX_ENTRIES = max_entries if enabled else 0
+    token_cache.clear()
+
+
+def main(count: int, users: int, repeat: int):
+    headers = [auth_header() for _ in range(users)]
+    credentials = [
+        HTTPAuthorizationCredentials(scheme="Bearer", credentials=h["Authorization"].split(" ", 1)[1])
+        for h in headers
+    ]
+    max_entries = settings.JWT_CACHE_MAX_ENTRIES or 10000
+
+    rows = []
+    for enabled in (False, True):
+        _set_cache(enabled, max_entries)
+        for c in credentials:
+            get_current_user(c)
+        direct = best_of(lambda: [get_current_user(credentials[i % users]) for i in range(count)], repeat)
+        times = asyncio.run(_per_request(headers, count, repeat))
+        overhead = (times["/authed"] - times["/open"]) / count
+        rows.append([
+            "on" if enabled else "off",
+            f"{direct / count * 1e6:.1f}",
+            f"{times['/open'] / count * 1e6:.0f}",
+            f"{times['/authed'] / count * 1e6:.0f}",
+            f"{overhead * 1e6:.0f}",
+        ])
+    _set_cache(True, max_entries)
+
+    print(f"{count} requests over {users} tokens, best of {repeat}, in process (no network)")
+    print_table(["cache", "get_current_user us", "no auth us/req", "auth us/req", "auth overhead us/req"], rows)
+    print(f"cache stats after the run: {token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Auth overhead per request with and without the token cache")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.requests, args.users, args.repeat)
@@ -0,0 +1,84 @@
+"""
+POST /trips/{id}/coordinates/batch write path for batch sizes from 10 to 50k
+points, the old one INSERT per point loop against _insert_coordinates_batch
+(one multi-row INSERT, COPY from COPY_THRESHOLD rows up). the bulk side also
+pays for to_db_row and the running stats update, which the old loop didnt do.
+each run is rolled back so the scratch database doesnt grow
+
+    python -m benchmarks.batch_insert [--sizes 10,100,...] [--repeat N] [--loop-max N]
+"""
+import argparse
+import uuid
+from datetime import datetime
+import psycopg2
+from benchmarks.common import best_of, make_points, print_table, require_database_url
+from app.models.trip import CoordinateInput
+from app.routes.trips import _insert_coordinates_batch, _insert_trip
+from app.services.coordinate_store import COPY_THRESHOLD
+
+
+def _insert_loop(conn, trip_id: str, coordinates):
+    """the write path before the bulk engine, kept here as the baseline"""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT COALESCE(MAX(sequence_order), 0) + 1 FROM trip_coordinates WHERE trip_id = %s
+        """, (trip_id,))
+        sequence_order = cursor.fetchone()[0]
+        for coord in coordinates:
+            cursor.execute("""
+                INSERT INTO trip_coordinates
+                (coordinate_id, trip_id, latitude, longitude, timestamp, elevation, sequence_order)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, (
+                str(uuid.uuid4()), trip_id, coord.latitude, coord.longitude,
+                coord.timestamp, coord.elevation, sequence_order
+            ))
+            sequence_order += 1
+
+
+def _timed(conn, write, coordinates, repeat: int) -> float:
+    user_id = str(uuid.uuid4())
+
+    def once():
+        trip_id = str(uuid.uuid4())
+        _insert_trip(conn, trip_id, user_id, datetime(2026, 5, 1, 10))
+        write(conn, trip_id, user_id, coordinates)
+
+    def rolled_back():
+        try:
+            once()
+        finally:
+            conn.rollback()
+
+    return best_of(rolled_back, repeat)
+
+
+def main(sizes, repeat: int, loop_max: int):
+    conn = psycopg2.connect(require_database_url())
+    rows = []
+    try:
+        for size in sizes:
+            coordinates = [CoordinateInput(**point) for point in make_points(size)]
+            bulk = _timed(conn, _insert_coordinates_batch, coordinates, repeat)
+            path = "COPY" if size >= COPY_THRESHOLD else "VALUES"
+            if size <= loop_max:
+                loop = _timed(conn, lambda c, t, u, coords: _insert_loop(c, t, coords), coordinates, repeat)
+                loop_cells = [f"{loop * 1000:.1f}", f"{size / loop:.0f}", f"{loop / bulk:.1f}x"]
+            else:
+                loop_cells = ["-", "-", "-"]
+            rows.append([size, *loop_cells[:2], path, f"{bulk * 1000:.1f}", f"{size / bulk:.0f}", loop_cells[2]])
+    finally:
+        conn.close()
+    print(f"best of {repeat}, one transaction per batch, rolled back")
+    print_table(["points", "loop ms", "loop pts/s", "bulk path", "bulk ms", "bulk pts/s", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-point INSERT loop vs the bulk batch insert")
+    parser.add_argument("--sizes", default="10,100,1000,5000,10000,50000",
+                        help="comma separated batch sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--loop-max", type=int, default=50000,
+                        help="largest batch to also time with the per-point loop")
+    args = parser.parse_args()
+    main([int(size) for size in args.sizes.split(",")], args.repeat, args.loop_max)
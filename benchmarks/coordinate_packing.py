@@ -0,0 +1,115 @@
+"""
+storage size and read latency of one row per point (trip_coordinates)
+against the packed layout (trip_coordinates_packed). writes --trips trips of
+--points points straight into the tables, measures what they added to the
+table and its indexes, times reading each trip through trip_points(), packs
+them all and measures again. the trips are deleted at the end
+
+sizes are the growth of the whole relations, so run it on a quiet scratch
+database, reused free space from earlier deletes makes the row figure low
+
+    python -m benchmarks.coordinate_packing [--trips N] [--points N] [--repeat N]
+"""
+import argparse
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+import psycopg2
+from benchmarks.common import percentile, print_table, require_database_url
+from app.routes.trips import _insert_trip
+from app.services.coordinate_store import pack_trip_coordinates
+
+START = datetime(2026, 5, 1, 10, 0, 0)
+READ_QUERY = """
+    SELECT latitude, longitude, timestamp, elevation
+    FROM trip_points(%s) ORDER BY sequence_order
+"""
+
+
+def _write_trips(conn, trip_count: int, point_count: int) -> list:
+    """(trip_id, start_time) of trip_count trips, a gps like jittery ride each"""
+    user_id = str(uuid.uuid4())
+    trips = []
+    with conn.cursor() as cursor:
+        for k in range(trip_count):
+            trip_id, start = str(uuid.uuid4()), START + timedelta(hours=k)
+            _insert_trip(conn, trip_id, user_id, start)
+            cursor.execute("""
+                INSERT INTO trip_coordinates (trip_id, latitude, longitude, timestamp, elevation, sequence_order)
+                SELECT %s, 45.3 + g * 0.00002 + random() * 0.00001, 9.0 + g * 0.00001 + random() * 0.00001,
+                       %s + g * interval '1 second' + random() * interval '0.9 seconds',
+                       round((120 + sin(g / 40.0) * 15 + random())::numeric, 2), g
+                FROM generate_series(1, %s) AS g
+            """, (trip_id, start, point_count))
+            trips.append((trip_id, start))
+    conn.commit()
+    return trips
+
+
+def _sizes(conn) -> tuple:
+    """bytes of trip_coordinates and of all packed partitions, indexes and toast included"""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT pg_total_relation_size('trip_coordinates'),
+                   COALESCE(SUM(pg_total_relation_size(relid)), 0)
+            FROM pg_partition_tree('trip_coordinates_packed')
+        """)
+        rows, packed = cursor.fetchone()
+    conn.rollback()
+    return rows, int(packed)
+
+
+def _read_latency(conn, trips: list, repeat: int) -> list:
+    """seconds per trip_points() read of every trip, repeat passes"""
+    timings = []
+    with conn.cursor() as cursor:
+        for _ in range(repeat):
+            for trip_id, _ in trips:
+                started = time.perf_counter()
+                cursor.execute(READ_QUERY, (trip_id,))
+                cursor.fetchall()
+                timings.append(time.perf_counter() - started)
+    conn.rollback()
+    return timings
+
+
+def main(trip_count: int, point_count: int, repeat: int):
+    conn = psycopg2.connect(require_database_url())
+    trips = []
+    try:
+        rows_before, packed_before = _sizes(conn)
+        trips = _write_trips(conn, trip_count, point_count)
+        rows_size = _sizes(conn)[0] - rows_before
+        _read_latency(conn, trips, 1)  # warm the cache
+        row_reads = _read_latency(conn, trips, repeat)
+
+        with conn.cursor() as cursor:
+            packed = sum(pack_trip_coordinates(cursor, trip_id, start) for trip_id, start in trips)
+        conn.commit()
+        packed_size = _sizes(conn)[1] - packed_before
+        _read_latency(conn, trips, 1)
+        packed_reads = _read_latency(conn, trips, repeat)
+    finally:
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM trips WHERE trip_id = ANY(%s::uuid[])", ([t[0] for t in trips],))
+        conn.commit()
+        conn.close()
+
+    total_points = trip_count * point_count
+    print(f"{trip_count} trips of {point_count} points, {packed} packed, reads over {repeat} passes")
+    print_table(["layout", "MiB", "bytes/point", "read p50 ms", "read p95 ms"], [
+        [name, f"{size / 2**20:.1f}", f"{size / total_points:.1f}",
+         f"{statistics.median(reads) * 1000:.2f}", f"{percentile(reads, 95) * 1000:.2f}"]
+        for name, size, reads in [("rows", rows_size, row_reads), ("packed", packed_size, packed_reads)]
+    ])
+    print(f"packed is {rows_size / max(packed_size, 1):.1f}x smaller")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Row per point vs packed coordinate storage")
+    parser.add_argument("--trips", type=int, default=200)
+    parser.add_argument("--points", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.trips, args.points, args.repeat)
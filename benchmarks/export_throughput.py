@@ -0,0 +1,60 @@
+"""
+export throughput in MB/s: GET /trips/{id}/export of one long trip per
+format and GET /trips/export (the zip of all of a users trips), read as the
+client gets them. the zip figures are compressed bytes per second
+
+    python -m benchmarks.export_throughput [--points N] [--trips N] [--repeat N]
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from benchmarks.common import app_client, auth_header, create_completed_trip, print_table
+from app.services.export_service import EXPORT_WRITERS
+
+
+async def _timed_download(client, url: str, params: dict, headers: dict, repeat: int):
+    """(fastest seconds, body bytes) of repeat downloads"""
+    best, size = float("inf"), 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        total = 0
+        async with client.stream("GET", url, params=params, headers=headers) as response:
+            response.raise_for_status()
+            async for data in response.aiter_bytes():
+                total += len(data)
+        best, size = min(best, time.perf_counter() - started), total
+    return best, size
+
+
+def _row(label: str, fmt: str, best: float, size: int) -> list:
+    mb = size / 1e6
+    return [label, fmt, f"{mb:.2f}", f"{best * 1000:.0f}", f"{mb / best:.1f}"]
+
+
+async def main(point_count: int, trip_count: int, repeat: int):
+    headers = auth_header(str(uuid.uuid4()))
+    rows = []
+    async with app_client() as client:
+        trip_ids = [await create_completed_trip(client, headers, point_count) for _ in range(trip_count)]
+
+        for fmt in EXPORT_WRITERS:
+            best, size = await _timed_download(
+                client, f"/trips/{trip_ids[0]}/export", {"format": fmt}, headers, repeat
+            )
+            rows.append(_row("one trip", fmt, best, size))
+        for fmt in EXPORT_WRITERS:
+            best, size = await _timed_download(client, "/trips/export", {"format": fmt}, headers, repeat)
+            rows.append(_row(f"zip of {trip_count}", fmt, best, size))
+
+    print(f"{point_count} point trips, fastest of {repeat} downloads, in process (no network)")
+    print_table(["export", "format", "MB", "ms", "MB/s"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export throughput per format, single trip and zip")
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--trips", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.points, args.trips, args.repeat))
@@ -0,0 +1,141 @@
+"""
+import throughput of POST /trips/import in points per second, for a
+generated gpx and geojson file of --points points each. times parsing on its
+own and the whole request through the app (spooling, parsing, COPY, stats),
+and takes the peak python memory of parse + _import_trip with tracemalloc,
+which should stay flat however big the file
+
+    python -m benchmarks.import_throughput [--points N] [--repeat N]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+import psycopg2
+from benchmarks.common import app_client, auth_header, print_table, require_database_url
+from app.routes.trips import _import_trip
+from app.services.enrichment import enrichment_queue
+from app.services.import_service import IMPORT_PARSERS
+
+START = datetime(2026, 5, 1, 10, 0, 0)
+CONTENT_TYPES = {"gpx": "application/gpx+xml", "geojson": "application/geo+json"}
+READ_CHUNK = 1024 * 1024
+
+
+def _ride(n: int):
+    for i in range(n):
+        ts = (START + timedelta(seconds=i)).isoformat() + "Z"
+        yield round(45.0 + i * 0.00005, 7), round(9.0 + i * 0.00003, 7), ts, 100 + i % 50
+
+
+def _write_gpx(path: str, n: int):
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<gpx version="1.1" creator="bench" xmlns="http://www.topografix.com/GPX/1/1">\n'
+                '<trk><name>bench</name><trkseg>\n')
+        for lat, lon, ts, ele in _ride(n):
+            f.write(f'<trkpt lat="{lat}" lon="{lon}"><ele>{ele}</ele><time>{ts}</time></trkpt>\n')
+        f.write("</trkseg></trk>\n</gpx>\n")
+
+
+def _write_geojson(path: str, n: int):
+    # a LineString with a parallel coordTimes array, like most exporters write
+    with open(path, "w") as f:
+        f.write('{"type":"FeatureCollection","features":[{"type":"Feature","geometry":'
+                '{"type":"LineString","coordinates":[')
+        f.write(",".join(f"[{lon},{lat},{ele}]" for lat, lon, _, ele in _ride(n)))
+        f.write(']},"properties":{"coordTimes":[')
+        f.write(",".join(json.dumps(ts) for _, _, ts, _ in _ride(n)))
+        f.write("]}}]}")
+
+
+WRITERS = {"gpx": _write_gpx, "geojson": _write_geojson}
+
+
+def _parse_only(fmt: str, path: str) -> float:
+    started = time.perf_counter()
+    for _ in IMPORT_PARSERS[fmt](path):
+        pass
+    return time.perf_counter() - started
+
+
+def _peak_memory(fmt: str, path: str, database_url: str, user_id: str) -> int:
+    """peak bytes python allocated while parsing and writing the file, like the request does"""
+    conn = psycopg2.connect(database_url)
+    tracemalloc.start()
+    try:
+        _import_trip(conn, str(uuid.uuid4()), user_id, IMPORT_PARSERS[fmt](path))
+        conn.commit()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        conn.close()
+
+
+async def _file_body(path: str):
+    # streamed so the benchmark doesnt hold the file in memory either
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(READ_CHUNK)
+            if not data:
+                break
+            yield data
+
+
+async def _api_import(client, fmt: str, path: str, headers: dict, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.post(
+            "/trips/import", content=_file_body(path),
+            headers={**headers, "Content-Type": CONTENT_TYPES[fmt]}
+        )
+        best = min(best, time.perf_counter() - started)
+        response.raise_for_status()
+        # route work of the import runs after the response, keep it out of the next one
+        await enrichment_queue.drain()
+    return best
+
+
+async def main(point_count: int, repeat: int):
+    database_url = require_database_url()
+    user_id = str(uuid.uuid4())
+    headers = auth_header(user_id)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {}
+        for fmt, write in WRITERS.items():
+            paths[fmt] = os.path.join(tmp, f"ride.{fmt}")
+            write(paths[fmt], point_count)
+        try:
+            async with app_client() as client:
+                api = {fmt: await _api_import(client, fmt, path, headers, repeat) for fmt, path in paths.items()}
+            for fmt, path in paths.items():
+                parse = min(_parse_only(fmt, path) for _ in range(repeat))
+                peak = _peak_memory(fmt, path, database_url, user_id)
+                rows.append([
+                    fmt, f"{os.path.getsize(path) / 1e6:.1f}", f"{point_count / parse:,.0f}",
+                    f"{point_count / api[fmt]:,.0f}", f"{api[fmt] * 1000:.0f}", f"{peak / 2**20:.1f}",
+                ])
+        finally:
+            conn = psycopg2.connect(database_url)
+            with conn.cursor() as cursor:
+                cursor.execute("DELETE FROM trips WHERE user_id = %s", (user_id,))
+            conn.commit()
+            conn.close()
+
+    print(f"{point_count} point files, best of {repeat}, in process (no network)")
+    print_table(["format", "file MB", "parse points/s", "import points/s", "import ms", "peak MiB"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="POST /trips/import points per second and peak memory")
+    parser.add_argument("--points", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.points, args.repeat))
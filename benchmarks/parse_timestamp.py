@@ -0,0 +1,71 @@
+"""
+parse_timestamp on 100k mixed timestamps (datetimes from psycopg2, ISO-8601
+strings, slash/US formats, the odd free form one) against dateutil for every
+string like it worked before. prints the time per call and which tier
+handled how many, and checks both give the same datetimes
+
+    python -m benchmarks.parse_timestamp [--count N] [--repeat N]
+"""
+import argparse
+import random
+from datetime import datetime, timedelta, timezone
+from dateutil import parser as date_parser
+from benchmarks.common import best_of, print_table
+from app.utils.geo_utils import parse_timestamp, timestamp_parse_stats
+
+# share of each input kind, roughly what clients and the db hand us
+MIX = [
+    ("datetime", 0.40, lambda ts: ts),
+    ("iso", 0.30, lambda ts: ts.isoformat()),
+    ("iso utc", 0.15, lambda ts: ts.replace(tzinfo=timezone.utc).isoformat().replace("+00:00", "Z")),
+    ("slashes", 0.08, lambda ts: ts.strftime("%Y/%m/%d %H:%M:%S")),
+    ("us", 0.05, lambda ts: ts.strftime("%m/%d/%Y %H:%M:%S")),
+    ("free form", 0.02, lambda ts: ts.strftime("%B %d %Y %I:%M:%S %p")),
+]
+
+
+def _mixed_timestamps(count: int) -> list:
+    rng = random.Random(42)
+    start = datetime(2026, 5, 1, 10, 0, 0)
+    weights = [kind[1] for kind in MIX]
+    values = []
+    for i in range(count):
+        _, _, render = rng.choices(MIX, weights)[0]
+        values.append(render(start + timedelta(seconds=i, microseconds=rng.randrange(0, 1000000, 1000))))
+    return values
+
+
+def _dateutil_only(value):
+    # the parser before the tiers, datetimes were already passed through
+    if isinstance(value, datetime):
+        return value
+    return date_parser.parse(value)
+
+
+def main(count: int, repeat: int):
+    values = _mixed_timestamps(count)
+    before = timestamp_parse_stats()
+    parsed = [parse_timestamp(v) for v in values]
+    after = timestamp_parse_stats()
+    expected = [_dateutil_only(v) for v in values]
+    mismatches = sum(1 for a, b in zip(parsed, expected) if a != b)
+    if mismatches:
+        raise SystemExit(f"ERROR: {mismatches} timestamps parsed differently than dateutil")
+
+    tiered = best_of(lambda: [parse_timestamp(v) for v in values], repeat)
+    dateutil = best_of(lambda: [_dateutil_only(v) for v in values], repeat)
+    print(f"{count} timestamps, best of {repeat}")
+    print_table(["parser", "total ms", "us per call"], [
+        ["dateutil for every string", f"{dateutil * 1000:.0f}", f"{dateutil / count * 1e6:.2f}"],
+        ["tiered parse_timestamp", f"{tiered * 1000:.0f}", f"{tiered / count * 1e6:.2f}"],
+    ])
+    print(f"speedup {dateutil / tiered:.1f}x")
+    print_table(["tier", "calls"], [[tier, after[tier] - before[tier]] for tier in after])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tiered parse_timestamp vs dateutil on mixed input")
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.count, args.repeat)
@@ -0,0 +1,78 @@
+"""
+payload size and server time of a completed trips route per simplification
+level: the full route, the stored levels (ROUTE_SIMPLIFICATION_LEVELS) and a
+tolerance that isnt stored so it is simplified per request. each one as the
+GET /trips/{id} json detail and as polyline / binary from GET /trips/{id}/route.
+also times the first read of a trip whose stored levels are missing, which
+computes and stores them
+
+    python -m benchmarks.route_levels [--points N] [--repeat N]
+"""
+import argparse
+import asyncio
+import time
+from benchmarks.common import app_client, auth_header, create_completed_trip, print_table
+from app.config.database import db
+from app.services.enrichment import enrichment_queue
+from app.services.route_service import ROUTE_SIMPLIFICATION_LEVELS
+
+REPRESENTATIONS = [
+    ("json", "/trips/{trip_id}", {}),
+    ("polyline", "/trips/{trip_id}/route", {"format": "polyline"}),
+    ("binary", "/trips/{trip_id}/route", {"format": "binary"}),
+]
+
+
+async def _timed_get(client, url: str, params: dict, headers: dict, repeat: int):
+    """(fastest seconds, body bytes) of repeat requests"""
+    best, size = float("inf"), 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get(url, params=params, headers=headers)
+        elapsed = time.perf_counter() - started
+        response.raise_for_status()
+        best, size = min(best, elapsed), len(response.content)
+    return best, size
+
+
+def _drop_stored_levels(conn, trip_id: str):
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM trip_route_simplified WHERE trip_id = %s", (trip_id,))
+
+
+async def main(point_count: int, repeat: int, unstored: float):
+    headers = auth_header()
+    rows = []
+    async with app_client() as client:
+        trip_id = await create_completed_trip(client, headers, point_count)
+        # complete only queues the level work, wait for it so the stored levels are there
+        await enrichment_queue.drain()
+
+        levels = [None, *sorted(ROUTE_SIMPLIFICATION_LEVELS), unstored]
+        for tolerance in levels:
+            label = "full" if tolerance is None else f"{tolerance:g} m"
+            if tolerance is not None and tolerance not in ROUTE_SIMPLIFICATION_LEVELS:
+                label += " (not stored)"
+            for name, path, params in REPRESENTATIONS:
+                params = dict(params, **({"tolerance": tolerance} if tolerance is not None else {}))
+                best, size = await _timed_get(client, path.format(trip_id=trip_id), params, headers, repeat)
+                rows.append([label, name, f"{size / 1024:.1f}", f"{best * 1000:.1f}"])
+
+        await db.run(_drop_stored_levels, trip_id)
+        level = sorted(ROUTE_SIMPLIFICATION_LEVELS)[0]
+        first, _ = await _timed_get(client, f"/trips/{trip_id}/route", {"tolerance": level}, headers, 1)
+        again, _ = await _timed_get(client, f"/trips/{trip_id}/route", {"tolerance": level}, headers, repeat)
+
+    print(f"{point_count} point trip, fastest of {repeat} requests, in process (no network)")
+    print_table(["level", "format", "KiB", "ms"], rows)
+    print(f"levels missing: first read {first * 1000:.1f} ms (computes and stores them), "
+          f"next reads {again * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Route payload size and latency per simplification level")
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--unstored", type=float, default=10, help="a tolerance that isnt precomputed")
+    args = parser.parse_args()
+    asyncio.run(main(args.points, args.repeat, args.unstored))
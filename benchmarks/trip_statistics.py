@@ -0,0 +1,49 @@
+"""
+calculate_trip_statistics segment loop, pure python against numpy, across trip
+sizes around VECTORIZE_MIN_POINTS up to long rides. also checks both give the
+same numbers (to 1e-9 km) on every size it times
+
+    python -m benchmarks.trip_statistics [--sizes 10,63,64,...] [--repeat N]
+"""
+import argparse
+import math
+from datetime import datetime
+from benchmarks.common import best_of, make_points, print_table
+from app.utils import geo_utils
+from app.utils.geo_utils import (
+    VECTORIZE_MIN_POINTS, _segment_stats_numpy, _segment_stats_python, calculate_trip_statistics
+)
+
+
+def main(sizes, repeat: int):
+    if geo_utils.np is None:
+        raise SystemExit("ERROR: numpy not installed, nothing to compare")
+    rows = []
+    for size in sizes:
+        points = [
+            (p["latitude"], p["longitude"], datetime.fromisoformat(p["timestamp"]))
+            for p in make_points(size)
+        ]
+        python = best_of(lambda: _segment_stats_python(points), repeat)
+        vectorized = best_of(lambda: _segment_stats_numpy(points), repeat)
+        expected, got = _segment_stats_python(points), _segment_stats_numpy(points)
+        if not all(math.isclose(a, b, rel_tol=0, abs_tol=1e-6) for a, b in zip(expected, got)):
+            raise SystemExit(f"ERROR: numpy and python results differ for {size} points")
+        # what the request path pays, including sorting and picking the engine
+        full = best_of(lambda: calculate_trip_statistics(points), repeat)
+        engine = "numpy" if size >= VECTORIZE_MIN_POINTS else "python"
+        rows.append([
+            size, f"{python * 1000:.3f}", f"{vectorized * 1000:.3f}",
+            f"{python / vectorized:.1f}x", engine, f"{full * 1000:.3f}",
+        ])
+    print(f"best of {repeat}, VECTORIZE_MIN_POINTS = {VECTORIZE_MIN_POINTS}")
+    print_table(["points", "python ms", "numpy ms", "speedup", "used", "calculate_trip_statistics ms"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Python vs numpy trip statistics")
+    parser.add_argument("--sizes", default="10,32,63,64,128,1000,5000,20000,50000",
+                        help="comma separated trip sizes")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main([int(size) for size in args.sizes.split(",")], args.repeat)
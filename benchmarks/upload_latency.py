@@ -0,0 +1,116 @@
+"""
+latency of concurrent single coordinate uploads through the whole app (routing,
+auth, db pool), with some clients reading trip details at the same time
+
+runs the app in process over httpx's asgi transport, twice: once as it is (db
+work on the db thread pool via db.run) and once with db.run swapped for a
+version that runs the transaction right on the event loop, which is how the
+handlers worked before. prints p50/p95/p99 of the upload requests for both
+
+    python -m benchmarks.upload_latency [--devices N] [--uploads N] [--readers N]
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from benchmarks.common import auth_header, make_points, percentile, print_table, require_database_url
+
+
+async def _blocking_run(func, *args):
+    # the old way, psycopg2 calls straight on the event loop
+    from app.config.database import db
+    return db._run_in_transaction(func, *args)
+
+
+async def _device(client, trip_id: str, headers: dict, points: list, latencies: list):
+    for point in points:
+        started = time.perf_counter()
+        response = await client.post(f"/trips/{trip_id}/coordinates", json=point, headers=headers)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+
+
+async def _reader(client, trip_id: str, headers: dict, stop: asyncio.Event) -> int:
+    reads = 0
+    while not stop.is_set():
+        response = await client.get(f"/trips/{trip_id}", headers=headers)
+        response.raise_for_status()
+        reads += 1
+    return reads
+
+
+async def _run(devices: int, uploads: int, readers: int, history_points: int) -> dict:
+    from app.main import app
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        trips = []
+        for _ in range(devices):
+            headers = auth_header()
+            response = await client.post("/trips", json={"startTime": "2026-05-01T10:00:00"}, headers=headers)
+            response.raise_for_status()
+            trips.append((response.json()["tripId"], headers))
+        # readers fetch a long trip, the slow request that used to stall the others
+        reader_headers = auth_header()
+        response = await client.post("/trips", json={"startTime": "2026-05-01T08:00:00"}, headers=reader_headers)
+        response.raise_for_status()
+        long_trip = response.json()["tripId"]
+        response = await client.post(
+            f"/trips/{long_trip}/coordinates/batch",
+            json={"coordinates": make_points(history_points)}, headers=reader_headers
+        )
+        response.raise_for_status()
+
+        latencies = []
+        stop = asyncio.Event()
+        reader_tasks = [
+            asyncio.create_task(_reader(client, long_trip, reader_headers, stop)) for _ in range(readers)
+        ]
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            _device(client, trip_id, headers, make_points(uploads), latencies)
+            for trip_id, headers in trips
+        ))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        reads = sum(await asyncio.gather(*reader_tasks))
+    return {
+        "latencies": latencies,
+        "elapsed": elapsed,
+        "reads": reads,
+    }
+
+
+async def main(devices: int, uploads: int, readers: int, history_points: int):
+    require_database_url()
+    from app.config.database import db
+    db.initialize()
+    offloaded_run = db.run
+    rows = []
+    try:
+        for mode in ("event loop", "db thread pool"):
+            db.run = _blocking_run if mode == "event loop" else offloaded_run
+            result = await _run(devices, uploads, readers, history_points)
+            latencies = result["latencies"]
+            rows.append([
+                mode, len(latencies),
+                f"{len(latencies) / result['elapsed']:.0f}",
+                f"{percentile(latencies, 50) * 1000:.1f}",
+                f"{percentile(latencies, 95) * 1000:.1f}",
+                f"{percentile(latencies, 99) * 1000:.1f}",
+                result["reads"],
+            ])
+    finally:
+        db.run = offloaded_run
+        db.close_all_connections()
+    print(f"{devices} devices x {uploads} single point uploads, {readers} readers on a {history_points} point trip")
+    print_table(["db calls on", "uploads", "uploads/s", "p50 ms", "p95 ms", "p99 ms", "detail reads"], rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="p99 of concurrent coordinate uploads, blocking vs offloaded db calls")
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--uploads", type=int, default=40, help="single point uploads per device")
+    parser.add_argument("--readers", type=int, default=2, help="clients reading trip detail meanwhile")
+    parser.add_argument("--history-points", type=int, default=5000, help="points in the trip the readers fetch")
+    args = parser.parse_args()
+    asyncio.run(main(args.devices, args.uploads, args.readers, args.history_points))
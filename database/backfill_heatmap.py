@@ -0,0 +1,113 @@
+"""
+count completed trips that are not in the usage heatmap yet (recorded before
+it existed). cutting routes into cells runs in a process pool, this process
+only reads routes and writes the counters, one transaction per batch
+
+    python -m database.backfill_heatmap [--workers N] [--batch-size N]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import psycopg2
+from dotenv import load_dotenv
+from app.services.heatmap import (
+    HEATMAP_TOLERANCE_M, apply_cell_usage, claim_trip_for_heatmap, route_cell_usage
+)
+from app.utils.geo_utils import simplify_route
+
+load_dotenv()
+
+
+def _route_usage(trip_id: str, points: list, simplified: bool):
+    """worker side, trips without a stored simplified route are simplified here"""
+    if not simplified:
+        points = simplify_route(points, HEATMAP_TOLERANCE_M)
+    return trip_id, route_cell_usage(points)
+
+
+def _next_trip_ids(cursor, after, batch_size: int) -> list:
+    cursor.execute("""
+        SELECT trip_id FROM trips
+        WHERE status = 'COMPLETED' AND NOT heatmap_applied
+          AND (%s::uuid IS NULL OR trip_id > %s::uuid)
+        ORDER BY trip_id LIMIT %s
+    """, (after, after, batch_size))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _load_routes(cursor, trip_ids: list) -> list:
+    """(trip_id, points, simplified) for each trip, stored street level route if there is one"""
+    cursor.execute("""
+        SELECT trip_id, points FROM trip_route_simplified
+        WHERE tolerance_m = %s AND trip_id = ANY(%s::uuid[])
+    """, (HEATMAP_TOLERANCE_M, trip_ids))
+    routes = [(trip_id, [tuple(p) for p in points], True) for trip_id, points in cursor.fetchall()]
+    missing = list(set(trip_ids) - {route[0] for route in routes})
+    if missing:
+        cursor.execute("""
+            SELECT t.trip_id, c.latitude::float8, c.longitude::float8, c.timestamp
+            FROM unnest(%s::uuid[]) AS t(trip_id) CROSS JOIN LATERAL trip_points(t.trip_id) c
+            ORDER BY t.trip_id, c.sequence_order
+        """, (missing,))
+        points_by_trip = {}
+        for trip_id, lat, lon, ts in cursor.fetchall():
+            points_by_trip.setdefault(trip_id, []).append((lat, lon, ts))
+        routes.extend((trip_id, points, False) for trip_id, points in points_by_trip.items())
+    return routes
+
+
+def _write_usage(conn, results) -> int:
+    counted = 0
+    with conn.cursor() as cursor:
+        for trip_id, usage in results:
+            # a trip completed meanwhile may have been counted by the service already
+            if claim_trip_for_heatmap(cursor, trip_id):
+                apply_cell_usage(cursor, usage)
+                counted += 1
+    conn.commit()
+    return counted
+
+
+def backfill_heatmap(workers: int, batch_size: int):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        print("ERROR: DATABASE_URL not set in environment variables")
+        return
+
+    conn = psycopg2.connect(database_url)
+    started = time.monotonic()
+    counted = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            after = None
+            results = None
+            while True:
+                with conn.cursor() as cursor:
+                    trip_ids = _next_trip_ids(cursor, after, batch_size)
+                    routes = _load_routes(cursor, trip_ids) if trip_ids else []
+                conn.rollback()  # dont sit idle in a transaction while the workers run
+
+                # workers start on this batch right away, the previous one is
+                # written meanwhile and the next one read on the next loop
+                next_results = pool.map(
+                    _route_usage, *zip(*routes), chunksize=max(1, len(routes) // (workers * 4))
+                ) if routes else []
+                if results is not None:
+                    counted += _write_usage(conn, results)
+                    print(f"{counted} trips counted ({time.monotonic() - started:.1f}s)")
+                if not trip_ids:
+                    break
+                after = trip_ids[-1]
+                results = next_results
+    finally:
+        conn.close()
+    print(f"Heatmap backfill done, {counted} trips in {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add completed trips to the usage heatmap")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    backfill_heatmap(args.workers, args.batch_size)
@@ -35,6 +35,25 @@ CREATE TABLE IF NOT EXISTS trip_coordinates (
     CONSTRAINT valid_longitude CHECK (longitude >= -180 AND longitude <= 180)
 );
 
+-- let bulk inserts skip building a uuid per row (gen_random_uuid is builtin since pg13)
+ALTER TABLE trip_coordinates ALTER COLUMN coordinate_id SET DEFAULT gen_random_uuid();
+
+-- per-trip sequence counter, read under FOR UPDATE and moved on in the same
+-- UPDATE as running_stats on every write (see coordinate_store.reserve_sequence)
+ALTER TABLE trips ADD COLUMN IF NOT EXISTS next_sequence INTEGER NOT NULL DEFAULT 1;
+
+-- backfill the counter for trips recorded before it existed
+UPDATE trips t SET next_sequence = c.max_sequence + 1
+FROM (
+    SELECT trip_id, MAX(sequence_order) AS max_sequence
+    FROM trip_coordinates GROUP BY trip_id
+) c
+WHERE t.trip_id = c.trip_id AND t.next_sequence <= c.max_sequence;
+
+-- running trip statistics kept up to date on every coordinate write
+-- (see TripStatsAccumulator), NULL for trips recorded before it existed
+ALTER TABLE trips ADD COLUMN IF NOT EXISTS running_stats JSONB;
+
 -- TripWeather table
 CREATE TABLE IF NOT EXISTS trip_weather (
     weather_id UUID PRIMARY KEY,
@@ -46,9 +65,158 @@ CREATE TABLE IF NOT EXISTS trip_weather (
     humidity INTEGER
 );
 
+-- Douglas-Peucker simplified routes, precomputed per tolerance (meters) on completion
+-- points is a list of [latitude, longitude, timestamp, elevation]
+CREATE TABLE IF NOT EXISTS trip_route_simplified (
+    trip_id UUID NOT NULL REFERENCES trips(trip_id) ON DELETE CASCADE,
+    tolerance_m INTEGER NOT NULL,
+    point_count INTEGER NOT NULL,
+    points JSONB NOT NULL,
+    PRIMARY KEY (trip_id, tolerance_m)
+);
+
+-- per user, per day totals of completed trips for GET /trips/stats
+-- (see app/services/user_stats.py), a trip counts on the day it started
+CREATE TABLE IF NOT EXISTS user_daily_stats (
+    user_id UUID NOT NULL,
+    day DATE NOT NULL,
+    trip_count INTEGER NOT NULL DEFAULT 0,
+    total_distance NUMERIC(14, 3) NOT NULL DEFAULT 0,
+    total_duration BIGINT NOT NULL DEFAULT 0,
+    max_speed NUMERIC(6, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, day)
+);
+
+-- backfill from completed trips the first time the table is created
+-- (status compared as text, COMPLETED is not in the enum created above)
+INSERT INTO user_daily_stats (user_id, day, trip_count, total_distance, total_duration, max_speed)
+SELECT user_id, start_time::date, COUNT(*), COALESCE(SUM(total_distance), 0),
+       COALESCE(SUM(duration), 0), COALESCE(MAX(max_speed), 0)
+FROM trips
+WHERE status::text = 'COMPLETED' AND NOT EXISTS (SELECT 1 FROM user_daily_stats)
+GROUP BY user_id, start_time::date;
+
+-- bounding box of a completed trip, set with its grid cells on completion
+ALTER TABLE trips ADD COLUMN IF NOT EXISTS min_lat NUMERIC(10, 8);
+ALTER TABLE trips ADD COLUMN IF NOT EXISTS min_lon NUMERIC(11, 8);
+ALTER TABLE trips ADD COLUMN IF NOT EXISTS max_lat NUMERIC(10, 8);
+ALTER TABLE trips ADD COLUMN IF NOT EXISTS max_lon NUMERIC(11, 8);
+
+-- grid index for GET /trips/search, one row per 0.01 degree cell a completed
+-- trip has a point in (GRID_CELL_DEGREES in app/services/spatial_index.py)
+CREATE TABLE IF NOT EXISTS trip_grid_cells (
+    user_id UUID NOT NULL,
+    cell_lat INTEGER NOT NULL,
+    cell_lon INTEGER NOT NULL,
+    trip_id UUID NOT NULL REFERENCES trips(trip_id) ON DELETE CASCADE,
+    PRIMARY KEY (user_id, cell_lat, cell_lon, trip_id)
+);
+
+-- backfill completed trips from before the index existed
+UPDATE trips t SET min_lat = b.min_lat, min_lon = b.min_lon, max_lat = b.max_lat, max_lon = b.max_lon
+FROM (
+    SELECT trip_id, MIN(latitude) AS min_lat, MIN(longitude) AS min_lon,
+           MAX(latitude) AS max_lat, MAX(longitude) AS max_lon
+    FROM trip_coordinates GROUP BY trip_id
+) b
+WHERE t.trip_id = b.trip_id AND t.status::text = 'COMPLETED' AND t.min_lat IS NULL;
+
+INSERT INTO trip_grid_cells (user_id, cell_lat, cell_lon, trip_id)
+SELECT DISTINCT t.user_id, floor(c.latitude / 0.01)::int, floor(c.longitude / 0.01)::int, t.trip_id
+FROM trips t JOIN trip_coordinates c ON c.trip_id = t.trip_id
+WHERE t.status::text = 'COMPLETED'
+  AND NOT EXISTS (SELECT 1 FROM trip_grid_cells g WHERE g.trip_id = t.trip_id)
+ON CONFLICT DO NOTHING;
+
+-- usage heatmap, per geohash cell and level (app/services/heatmap.py)
+-- heatmap_applied marks trips already counted in it
+ALTER TABLE trips ADD COLUMN IF NOT EXISTS heatmap_applied BOOLEAN NOT NULL DEFAULT FALSE;
+
+CREATE TABLE IF NOT EXISTS heatmap_cells (
+    precision SMALLINT NOT NULL,
+    geohash VARCHAR(12) NOT NULL,
+    center_lat DOUBLE PRECISION NOT NULL,
+    center_lon DOUBLE PRECISION NOT NULL,
+    trip_count INTEGER NOT NULL DEFAULT 0,
+    total_distance DOUBLE PRECISION NOT NULL DEFAULT 0,
+    total_duration DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (precision, geohash)
+);
+
+-- packed storage for completed trips (COORDINATE_PACKING_ENABLED), one row per
+-- trip instead of one per point. lat/lon are in 1e-8 degree units (exactly
+-- what NUMERIC(10/11, 8) holds) as a base plus int deltas, time as microsecond
+-- deltas from the first point, elevation in centimeters (NULL if the trip has
+-- none). postgres compresses the arrays, see app/services/coordinate_store.py
+-- partitioned by trip start month, database/pack_coordinates.py creates the
+-- monthly partitions, anything without one lands in the default partition
+CREATE TABLE IF NOT EXISTS trip_coordinates_packed (
+    trip_id UUID NOT NULL REFERENCES trips(trip_id) ON DELETE CASCADE,
+    start_time TIMESTAMP NOT NULL,
+    point_count INTEGER NOT NULL,
+    lat_base BIGINT NOT NULL,
+    lon_base BIGINT NOT NULL,
+    time_base TIMESTAMP NOT NULL,
+    lat_deltas INTEGER[] NOT NULL,
+    lon_deltas INTEGER[] NOT NULL,
+    time_deltas BIGINT[] NOT NULL,
+    elevations INTEGER[],
+    PRIMARY KEY (trip_id, start_time)
+) PARTITION BY RANGE (start_time);
+
+CREATE TABLE IF NOT EXISTS trip_coordinates_packed_default
+    PARTITION OF trip_coordinates_packed DEFAULT;
+
+-- the points of a trip whichever way they are stored, use this instead of
+-- reading trip_coordinates directly and ORDER BY sequence_order where order
+-- matters. plain sql so it gets inlined into the calling query: a trip that
+-- isnt packed reads straight off idx_trip_coordinates_trip_sequence and a
+-- named cursor streams it. each branch is ordered on its own so the callers
+-- ORDER BY is a merge append and not a sort of the whole trip. start_time
+-- comes from a subquery so only its packed partition gets scanned (run time
+-- pruning). deltas are summed as float8, exact for integers this size and
+-- much cheaper than a numeric sum. packed points get sequence_order 1, 2, ...
+-- like trips.next_sequence hands out to uploads and imports
+DROP FUNCTION IF EXISTS trip_points(UUID);
+CREATE FUNCTION trip_points(p_trip_id UUID)
+RETURNS TABLE (
+    latitude NUMERIC, longitude NUMERIC, "timestamp" TIMESTAMP,
+    elevation NUMERIC, sequence_order INTEGER
+)
+LANGUAGE sql STABLE AS $$
+    (SELECT c.latitude, c.longitude, c.timestamp, c.elevation, c.sequence_order
+     FROM trip_coordinates c
+     WHERE c.trip_id = p_trip_id
+     ORDER BY c.sequence_order)
+    UNION ALL
+    (SELECT (d.lat_base + SUM(d.lat) OVER w) * 0.00000001,
+            (d.lon_base + SUM(d.lon) OVER w) * 0.00000001,
+            d.time_base + SUM(d.us::float8) OVER w * interval '1 microsecond',
+            d.ele * 0.01,
+            d.n
+     FROM (
+         SELECT p.lat_base, p.lon_base, p.time_base, u.lat, u.lon, u.us, u.ele, u.n::integer AS n
+         FROM trip_coordinates_packed p
+         CROSS JOIN LATERAL unnest(p.lat_deltas, p.lon_deltas, p.time_deltas, p.elevations)
+             WITH ORDINALITY AS u(lat, lon, us, ele, n)
+         WHERE p.trip_id = p_trip_id
+           AND p.start_time = (SELECT t.start_time FROM trips t WHERE t.trip_id = p_trip_id)
+     ) d
+     WINDOW w AS (ORDER BY d.n)
+     ORDER BY d.n)
+$$;
+
 -- Create indexes for performance
 CREATE INDEX IF NOT EXISTS idx_trips_user_id ON trips(user_id);
 CREATE INDEX IF NOT EXISTS idx_trips_status ON trips(status);
+-- keyset pagination for trip history (GET /trips sort=newest|oldest and sort=longest)
+CREATE INDEX IF NOT EXISTS idx_trips_user_status_start ON trips(user_id, status, start_time DESC, trip_id DESC);
+CREATE INDEX IF NOT EXISTS idx_trips_user_status_distance ON trips(user_id, status, total_distance DESC, trip_id DESC);
 CREATE INDEX IF NOT EXISTS idx_trip_coordinates_trip_id ON trip_coordinates(trip_id);
+CREATE INDEX IF NOT EXISTS idx_trip_coordinates_trip_sequence ON trip_coordinates(trip_id, sequence_order);
 CREATE INDEX IF NOT EXISTS idx_trip_coordinates_timestamp ON trip_coordinates(timestamp);
 CREATE INDEX IF NOT EXISTS idx_trip_weather_trip_id ON trip_weather(trip_id);
+CREATE INDEX IF NOT EXISTS idx_trip_grid_cells_trip_id ON trip_grid_cells(trip_id);
+CREATE INDEX IF NOT EXISTS idx_heatmap_cells_area ON heatmap_cells(precision, center_lat, center_lon);
+-- completed trips still waiting for route/heatmap work, startup recovery (EnrichmentQueue.recover)
+CREATE INDEX IF NOT EXISTS idx_trips_heatmap_pending ON trips(end_time DESC) WHERE NOT heatmap_applied;
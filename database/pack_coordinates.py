@@ -0,0 +1,162 @@
+"""
+move completed trips from one trip_coordinates row per point to the packed
+layout (trip_coordinates_packed, one row per trip), for trips completed before
+COORDINATE_PACKING_ENABLED was turned on. monthly partitions are created
+first, from the oldest trip up to --months-ahead months from now, so new
+trips dont pile up in the default partition, and a trip starting later than
+that gets its month created when it is packed. one transaction per batch, a
+rerun just picks up the trips that are still rows
+
+--unpack goes back to rows (new coordinate ids), turn the setting off first
+
+    python -m database.pack_coordinates [--batch-size N] [--months-ahead N] [--unpack]
+"""
+import argparse
+import os
+import time
+from datetime import date
+import psycopg2
+from dotenv import load_dotenv
+from app.services.coordinate_store import pack_trip_coordinates, unpack_trip_coordinates
+
+load_dotenv()
+
+PARTITION_PREFIX = "trip_coordinates_packed_"
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _ensure_partition(cursor, month: date) -> bool:
+    """
+    the partition of the month month falls in, True if it had to be created.
+    rows already in the default partition for that month are moved into it,
+    postgres refuses the new partition while the default one holds them
+    """
+    month = date(month.year, month.month, 1)
+    following = _add_months(month, 1)
+    name = f"{PARTITION_PREFIX}{month:%Y_%m}"
+    cursor.execute("SELECT to_regclass(%s)", (name,))
+    if cursor.fetchone()[0] is not None:
+        return False
+    cursor.execute("CREATE TEMP TABLE packed_moving (LIKE trip_coordinates_packed)")
+    cursor.execute("""
+        WITH moved AS (
+            DELETE FROM trip_coordinates_packed_default
+            WHERE start_time >= %s AND start_time < %s RETURNING *
+        )
+        INSERT INTO packed_moving SELECT * FROM moved
+    """, (month, following))
+    cursor.execute(f"""
+        CREATE TABLE {name} PARTITION OF trip_coordinates_packed
+        FOR VALUES FROM ('{month}') TO ('{following}')
+    """)
+    cursor.execute("INSERT INTO trip_coordinates_packed SELECT * FROM packed_moving")
+    cursor.execute("DROP TABLE packed_moving")
+    return True
+
+
+def _ensure_partitions(cursor, months_ahead: int) -> int:
+    """one partition per month, returns how many were created"""
+    cursor.execute("SELECT MIN(start_time)::date, CURRENT_DATE FROM trips")
+    oldest, today = cursor.fetchone()
+    month = date((oldest or today).year, (oldest or today).month, 1)
+    last = _add_months(date(today.year, today.month, 1), months_ahead)
+    created = 0
+    while month <= last:
+        created += _ensure_partition(cursor, month)
+        month = _add_months(month, 1)
+    return created
+
+
+def _next_trips(cursor, after, batch_size: int, unpack: bool) -> list:
+    """
+    (trip_id, start_time) of the next batch still to convert, locked so a
+    delete or complete of the same trip waits for this batch
+    """
+    if unpack:
+        stored = "EXISTS (SELECT 1 FROM trip_coordinates_packed p WHERE p.trip_id = t.trip_id AND p.start_time = t.start_time)"
+    else:
+        stored = "t.status = 'COMPLETED' AND EXISTS (SELECT 1 FROM trip_coordinates c WHERE c.trip_id = t.trip_id)"
+    cursor.execute(f"""
+        SELECT t.trip_id, t.start_time FROM trips t
+        WHERE {stored} AND (%s::uuid IS NULL OR t.trip_id > %s::uuid)
+        ORDER BY t.trip_id LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    """, (after, after, batch_size))
+    return cursor.fetchall()
+
+
+def _storage_size(cursor) -> int:
+    """bytes of both layouts including indexes and toast"""
+    cursor.execute("""
+        SELECT pg_total_relation_size('trip_coordinates')
+               + COALESCE(SUM(pg_total_relation_size(relid)), 0)
+        FROM pg_partition_tree('trip_coordinates_packed')
+    """)
+    return int(cursor.fetchone()[0])
+
+
+def pack_coordinates(batch_size: int, months_ahead: int, unpack: bool):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        print("ERROR: DATABASE_URL not set in environment variables")
+        return
+
+    conn = psycopg2.connect(database_url)
+    convert = unpack_trip_coordinates if unpack else pack_trip_coordinates
+    started = time.monotonic()
+    converted = skipped = 0
+    try:
+        with conn.cursor() as cursor:
+            if not unpack:
+                created = _ensure_partitions(cursor, months_ahead)
+                conn.commit()
+                print(f"Created {created} monthly partitions")
+            size_before = _storage_size(cursor)
+        conn.commit()
+
+        after = None
+        while True:
+            with conn.cursor() as cursor:
+                trips = _next_trips(cursor, after, batch_size, unpack)
+                if not trips:
+                    break
+                for trip_id, start_time in trips:
+                    # trips can start past --months-ahead (clock skew,
+                    # imports), their month gets its partition here
+                    if not unpack and _ensure_partition(cursor, start_time):
+                        print(f"Created the {start_time:%Y-%m} partition")
+                    if convert(cursor, trip_id, start_time):
+                        converted += 1
+                    else:
+                        skipped += 1
+            conn.commit()
+            after = trips[-1][0]
+            elapsed = time.monotonic() - started
+            print(f"{converted} trips converted, {skipped} left as they were ({converted / elapsed:.0f} trips/s)")
+
+        # deleted rows only count as free space once vacuumed, the file itself
+        # rarely shrinks but new points reuse it
+        conn.commit()
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("VACUUM ANALYZE trip_coordinates")
+            cursor.execute("VACUUM ANALYZE trip_coordinates_packed")
+            size_after = _storage_size(cursor)
+    finally:
+        conn.close()
+
+    print(f"Done, {converted} trips in {time.monotonic() - started:.1f}s, "
+          f"coordinate storage {size_before / 1048576:.1f} MB -> {size_after / 1048576:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert completed trips to the packed coordinate layout")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--months-ahead", type=int, default=3, help="partitions to create past the current month")
+    parser.add_argument("--unpack", action="store_true", help="convert packed trips back to one row per point")
+    args = parser.parse_args()
+    pack_coordinates(args.batch_size, args.months_ahead, args.unpack)
@@ -0,0 +1,206 @@
+"""
+recompute total_distance/duration/average_speed/max_speed of completed trips
+with the current calculate_trip_statistics, for when its filtering rules
+change. points are streamed with a server side cursor, stats computed in a
+process pool a chunk of trips at a time and changed trips written back with
+one bulk UPDATE per chunk (plus their user_daily_stats days)
+
+progress is checkpointed after every chunk, a rerun resumes after the last
+written trip. --dry-run prints what would change and writes nothing
+
+    python -m database.recompute_stats [--workers N] [--chunk-size N] [--dry-run]
+                                       [--checkpoint FILE] [--restart]
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Optional
+import psycopg2
+from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+from app.utils.geo_utils import calculate_trip_statistics
+
+load_dotenv()
+
+CHECKPOINT_FILE = ".recompute_stats.checkpoint"
+# coordinate rows per round trip of the server side cursor
+STREAM_ITERSIZE = 10000
+STAT_FIELDS = ("total_distance", "duration", "average_speed", "max_speed")
+
+
+def _recompute_chunk(trips: list) -> list:
+    """worker side, [(trip_id, stats)] for [(trip_id, points)]"""
+    return [(trip_id, calculate_trip_statistics(points)) for trip_id, points in trips]
+
+
+def _stream_trips(conn, after: Optional[str]):
+    """(trip_id, [(lat, lon, iso timestamp)]) per completed trip after the checkpoint, by trip_id"""
+    with conn.cursor(name="recompute_stats") as cursor:
+        cursor.itersize = STREAM_ITERSIZE
+        # timestamps as text, this process is the serial part and building and
+        # pickling datetimes here cost more than the stats, workers parse them
+        cursor.execute("""
+            SELECT t.trip_id, c.latitude::float8, c.longitude::float8, c.timestamp::text
+            FROM trips t CROSS JOIN LATERAL trip_points(t.trip_id) c
+            WHERE t.status = 'COMPLETED' AND (%s::uuid IS NULL OR t.trip_id > %s::uuid)
+            ORDER BY t.trip_id, c.sequence_order
+        """, (after, after))
+        trip_id, points = None, []
+        for row_trip_id, lat, lon, ts in cursor:
+            if row_trip_id != trip_id:
+                if points:
+                    yield trip_id, points
+                trip_id, points = row_trip_id, []
+            points.append((lat, lon, ts))
+        if points:
+            yield trip_id, points
+
+
+def _chunks(iterable, size: int):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _stored_stats(cursor, trip_ids: list) -> dict:
+    cursor.execute("""
+        SELECT trip_id, user_id, start_time, total_distance, duration, average_speed, max_speed
+        FROM trips WHERE trip_id = ANY(%s::uuid[])
+    """, (trip_ids,))
+    return {row[0]: row[1:] for row in cursor.fetchall()}
+
+
+def _changes(stored: dict, results: list) -> list:
+    """(trip_id, user_id, start_time, old, new) for trips whose stored stats differ"""
+    changes = []
+    for trip_id, stats in results:
+        if trip_id not in stored:
+            continue  # deleted since it was read
+        user_id, start_time, *old = stored[trip_id]
+        old = tuple(None if v is None else round(float(v), 2) for v in old)
+        new = tuple(stats[field] for field in STAT_FIELDS)
+        if old != new:
+            changes.append((trip_id, user_id, start_time, old, new))
+    return changes
+
+
+def _write_changes(cursor, changes: list):
+    execute_values(cursor, """
+        UPDATE trips t SET total_distance = v.total_distance, duration = v.duration,
+                           average_speed = v.average_speed, max_speed = v.max_speed
+        FROM (VALUES %s) AS v(trip_id, total_distance, duration, average_speed, max_speed)
+        WHERE t.trip_id = v.trip_id
+    """, [(trip_id, *new) for trip_id, _, _, _, new in changes],
+        template="(%s::uuid, %s::numeric, %s::integer, %s::numeric, %s::numeric)", page_size=1000)
+    # the daily rollup of the touched days is summed again from their trips
+    days = sorted({(user_id, start_time.date()) for _, user_id, start_time, _, _ in changes})
+    execute_values(cursor, """
+        UPDATE user_daily_stats d SET total_distance = s.total_distance,
+               total_duration = s.total_duration, max_speed = s.max_speed
+        FROM (
+            SELECT t.user_id, a.day, COALESCE(SUM(t.total_distance), 0) AS total_distance,
+                   COALESCE(SUM(t.duration), 0) AS total_duration, COALESCE(MAX(t.max_speed), 0) AS max_speed
+            FROM (VALUES %s) AS a(user_id, day)
+            JOIN trips t ON t.user_id = a.user_id AND t.status = 'COMPLETED'
+                        AND t.start_time >= a.day AND t.start_time < a.day + 1
+            GROUP BY t.user_id, a.day
+        ) s
+        WHERE d.user_id = s.user_id AND d.day = s.day
+    """, days, template="(%s::uuid, %s::date)", page_size=1000)
+
+
+def _print_diff(changes: list):
+    for trip_id, _, _, old, new in changes:
+        diffs = ", ".join(
+            f"{field} {o} -> {n}" for field, o, n in zip(STAT_FIELDS, old, new) if o != n
+        )
+        print(f"{trip_id}: {diffs}")
+
+
+def _read_checkpoint(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_checkpoint(path: str, trip_id: str):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write(str(trip_id))
+    os.replace(tmp, path)
+
+
+def recompute_stats(workers: int, chunk_size: int, dry_run: bool, checkpoint: str, restart: bool):
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        print("ERROR: DATABASE_URL not set in environment variables")
+        return
+
+    # a dry run diffs every trip and leaves the checkpoint alone
+    after = None if (dry_run or restart) else _read_checkpoint(checkpoint)
+    if after:
+        print(f"Resuming after trip {after}")
+
+    # one conection holds the streaming cursor, the other commits per chunk
+    read_conn = psycopg2.connect(database_url)
+    write_conn = psycopg2.connect(database_url)
+    started = time.monotonic()
+    processed = changed = 0
+
+    def finish(chunk_ids: list, future):
+        nonlocal processed, changed
+        results = future.result()
+        with write_conn.cursor() as cursor:
+            changes = _changes(_stored_stats(cursor, chunk_ids), results)
+            if dry_run:
+                _print_diff(changes)
+            elif changes:
+                _write_changes(cursor, changes)
+        write_conn.commit()
+        if not dry_run:
+            _write_checkpoint(checkpoint, chunk_ids[-1])
+        processed += len(chunk_ids)
+        changed += len(changes)
+        elapsed = time.monotonic() - started
+        print(f"{processed} trips, {changed} changed, {processed / elapsed:.0f} trips/s")
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # a couple of chunks per worker in flight, enough to keep them
+            # busy without reading the whole table ahead
+            pending = deque()
+            for chunk in _chunks(_stream_trips(read_conn, after), chunk_size):
+                pending.append(([trip_id for trip_id, _ in chunk], pool.submit(_recompute_chunk, chunk)))
+                if len(pending) >= workers * 2:
+                    finish(*pending.popleft())
+            while pending:
+                finish(*pending.popleft())
+    finally:
+        read_conn.close()
+        write_conn.close()
+
+    elapsed = time.monotonic() - started
+    rate = processed / elapsed if elapsed > 0 else 0
+    verb = "would change" if dry_run else "changed"
+    print(f"Done, {processed} trips in {elapsed:.1f}s ({rate:.0f} trips/s), {changed} {verb}")
+    if not dry_run and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute stored statistics of completed trips")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=200, help="trips per worker task")
+    parser.add_argument("--dry-run", action="store_true", help="print what would change, write nothing")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE, help="file with the last written trip id")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    args = parser.parse_args()
+    recompute_stats(args.workers, args.chunk_size, args.dry_run, args.checkpoint, args.restart)
@@ -0,0 +1,69 @@
+"""
+db tests run against a throwaway database that pytest-postgresql clones from a
+template with database/init_trips_tables.sql loaded. the server itself is not
+started here, point the standard PGHOST/PGPORT/PGUSER/PGPASSWORD variables at
+one (a unix socket dir works for PGHOST). without a reachable server the db
+tests are skipped, the pure ones still run
+"""
+import os
+from pathlib import Path
+import psycopg
+import psycopg2
+import pytest
+from pytest_postgresql import factories
+
+SCHEMA_FILE = Path(__file__).resolve().parent.parent / "database" / "init_trips_tables.sql"
+
+PG_HOST = os.getenv("PGHOST", "127.0.0.1")
+PG_PORT = os.getenv("PGPORT", "5432")
+PG_USER = os.getenv("PGUSER", "postgres")
+PG_PASSWORD = os.getenv("PGPASSWORD")
+
+
+def load_schema(host, port, user, dbname, password=None, **kwargs):
+    conn = psycopg2.connect(host=host, port=port, user=user, dbname=dbname, password=password)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(SCHEMA_FILE.read_text())
+        conn.commit()
+        # the script creates trip_status without COMPLETED (prod got it
+        # separately), ADD VALUE cant be used in the transaction that adds it
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute("ALTER TYPE trip_status ADD VALUE IF NOT EXISTS 'COMPLETED'")
+    finally:
+        conn.close()
+
+
+postgresql_noproc = factories.postgresql_noproc(
+    host=PG_HOST, port=PG_PORT, user=PG_USER, password=PG_PASSWORD, load=[load_schema]
+)
+postgresql = factories.postgresql("postgresql_noproc")
+
+
+@pytest.fixture(scope="session")
+def postgres_available():
+    try:
+        psycopg.connect(
+            host=PG_HOST, port=PG_PORT, user=PG_USER, password=PG_PASSWORD,
+            dbname="postgres", connect_timeout=3
+        ).close()
+    except psycopg.OperationalError as e:
+        pytest.skip(f"no postgres server at {PG_HOST}:{PG_PORT} ({e})")
+
+
+@pytest.fixture
+def database_url(postgres_available, request) -> str:
+    """dsn of a fresh database with the schema loaded, for psycopg2 connections"""
+    info = request.getfixturevalue("postgresql").info
+    dsn = f"host={info.host} port={info.port} user={info.user} dbname={info.dbname}"
+    if info.password:
+        dsn += f" password={info.password}"
+    return dsn
+
+
+@pytest.fixture
+def pg_conn(database_url):
+    conn = psycopg2.connect(database_url)
+    yield conn
+    conn.close()
@@ -0,0 +1,91 @@
+import uuid
+from datetime import datetime, timedelta
+from app.models.trip import CoordinateInput
+from app.routes.trips import _insert_coordinates_batch, _insert_trip
+from app.services.coordinate_store import pack_trip_coordinates, unpack_trip_coordinates
+from database.pack_coordinates import _ensure_partition
+
+START = datetime(2026, 5, 1, 10, 0, 0)
+POINTS_QUERY = """
+    SELECT latitude, longitude, timestamp, elevation, sequence_order
+    FROM trip_points(%s) ORDER BY sequence_order
+"""
+
+
+def _recorded_trip(conn, start: datetime, count: int) -> str:
+    trip_id, user_id = str(uuid.uuid4()), str(uuid.uuid4())
+    _insert_trip(conn, trip_id, user_id, start)
+    _insert_coordinates_batch(conn, trip_id, user_id, [
+        CoordinateInput(latitude=45.0 + i * 0.0001, longitude=9.0, timestamp=start + timedelta(seconds=i))
+        for i in range(count)
+    ])
+    conn.commit()
+    return trip_id
+
+
+def _partition_of(conn, trip_id: str) -> str:
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT tableoid::regclass::text FROM trip_coordinates_packed WHERE trip_id = %s", (trip_id,))
+        return cursor.fetchone()[0]
+
+
+def _points(conn, trip_id: str) -> list:
+    with conn.cursor() as cursor:
+        cursor.execute(POINTS_QUERY, (trip_id,))
+        return cursor.fetchall()
+
+
+def test_packed_points_keep_their_numbering(pg_conn):
+    trip_id, user_id = str(uuid.uuid4()), str(uuid.uuid4())
+    _insert_trip(pg_conn, trip_id, user_id, START)
+    _insert_coordinates_batch(pg_conn, trip_id, user_id, [
+        CoordinateInput(latitude=45.0 + i * 0.00013, longitude=-9.0 + i * 0.00007,
+                        timestamp=START + timedelta(seconds=i, microseconds=i * 1000),
+                        elevation=None if i % 5 else 100.25 + i)
+        for i in range(250)
+    ])
+    pg_conn.commit()
+    as_rows = _points(pg_conn, trip_id)
+
+    with pg_conn.cursor() as cursor:
+        assert pack_trip_coordinates(cursor, trip_id, START)
+    packed = _points(pg_conn, trip_id)
+    with pg_conn.cursor() as cursor:
+        assert unpack_trip_coordinates(cursor, trip_id, START)
+    unpacked = _points(pg_conn, trip_id)
+
+    assert [p[4] for p in as_rows] == list(range(1, 251))
+    assert packed == as_rows
+    assert unpacked == as_rows
+
+
+def test_trip_points_is_inlined_and_merged_in_order(pg_conn):
+    # plpgsql would hide the index from the callers ORDER BY and materialize the trip
+    with pg_conn.cursor() as cursor:
+        cursor.execute("EXPLAIN " + POINTS_QUERY, (str(uuid.uuid4()),))
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+    assert "Function Scan on trip_points" not in plan
+    assert plan.startswith("Merge Append")
+
+
+def test_partition_created_for_a_trip_past_the_window(pg_conn):
+    # packed on complete before the script ever made its month, so it sits in the default partition
+    start = datetime(2031, 3, 4, 8, 0, 0)
+    early = _recorded_trip(pg_conn, start, 20)
+    with pg_conn.cursor() as cursor:
+        assert pack_trip_coordinates(cursor, early, start)
+    pg_conn.commit()
+    early_points = _points(pg_conn, early)
+    assert _partition_of(pg_conn, early) == "trip_coordinates_packed_default"
+
+    late = _recorded_trip(pg_conn, start + timedelta(days=10), 20)
+    with pg_conn.cursor() as cursor:
+        assert _ensure_partition(cursor, start + timedelta(days=10))
+        assert not _ensure_partition(cursor, start)
+        assert pack_trip_coordinates(cursor, late, start + timedelta(days=10))
+    pg_conn.commit()
+
+    assert _partition_of(pg_conn, early) == "trip_coordinates_packed_2031_03"
+    assert _partition_of(pg_conn, late) == "trip_coordinates_packed_2031_03"
+    assert _points(pg_conn, early) == early_points
+    assert len(_points(pg_conn, late)) == 20
@@ -0,0 +1,74 @@
+import random
+from datetime import datetime, timedelta
+import pytest
+from app.utils import geo_utils
+from app.utils.geo_utils import (
+    VECTORIZE_MIN_POINTS, _segment_stats_numpy, _segment_stats_python, calculate_trip_statistics
+)
+
+START = datetime(2026, 5, 1, 10, 0, 0)
+
+requires_numpy = pytest.mark.skipif(geo_utils.np is None, reason="numpy not installed")
+# numpys simd sin/cos/atan2 may be an ulp off from libm, 1e-9 km is plenty
+PARITY_M = 1e-6
+
+
+def _random_trip(rng: random.Random, n: int) -> list:
+    """
+    sorted (lat, lon, datetime) points with the awkward bits mixed in:
+    repeated positions (gps noise filter), repeated timestamps (zero time
+    diff), sub-second steps and jumps fast enough to hit the speed filter
+    """
+    lat, lon, ts = 45.0 + rng.random(), 9.0 + rng.random(), START
+    points = [(lat, lon, ts)]
+    for _ in range(n - 1):
+        roll = rng.random()
+        if roll < 0.1:
+            pass  # same position again
+        elif roll < 0.15:
+            lat += rng.uniform(-0.01, 0.01)  # gps jump, way over 20 m/s
+            lon += rng.uniform(-0.01, 0.01)
+        else:
+            lat += rng.uniform(-0.0001, 0.0001)
+            lon += rng.uniform(-0.0001, 0.0001)
+        step = rng.random()
+        if step < 0.1:
+            delta = timedelta(0)
+        elif step < 0.2:
+            delta = timedelta(microseconds=rng.randrange(1, 1000000))
+        else:
+            delta = timedelta(seconds=rng.randrange(1, 10))
+        ts += delta
+        points.append((round(lat, 8), round(lon, 8), ts))
+    return points
+
+
+@requires_numpy
+@pytest.mark.parametrize("n", [2, 3, 4, 5, VECTORIZE_MIN_POINTS - 1, VECTORIZE_MIN_POINTS,
+                               VECTORIZE_MIN_POINTS + 1, 500, 5000])
+def test_numpy_segment_stats_match_python(n):
+    rng = random.Random(n)
+    for _ in range(20):
+        points = _random_trip(rng, n)
+        assert _segment_stats_numpy(points) == pytest.approx(_segment_stats_python(points), rel=0, abs=PARITY_M)
+
+
+@requires_numpy
+def test_segment_stats_with_only_duplicates_and_zero_time_diffs():
+    standing = [(45.0, 9.0, START)] * 100
+    assert _segment_stats_numpy(standing) == _segment_stats_python(standing) == (0.0, 0.0)
+    same_time = [(45.0 + i * 0.001, 9.0, START) for i in range(100)]
+    assert _segment_stats_numpy(same_time) == _segment_stats_python(same_time) == (0.0, 0.0)
+
+
+@requires_numpy
+@pytest.mark.parametrize("n", [VECTORIZE_MIN_POINTS - 1, VECTORIZE_MIN_POINTS, 2000])
+def test_trip_statistics_same_with_and_without_numpy(n, monkeypatch):
+    rng = random.Random(1000 + n)
+    points = _random_trip(rng, n)
+    # timestamps as strings and shuffled, like rows coming from a client
+    coordinates = [(lat, lon, ts.isoformat()) for lat, lon, ts in points]
+    rng.shuffle(coordinates)
+    vectorized = calculate_trip_statistics(coordinates)
+    monkeypatch.setattr(geo_utils, "np", None)
+    assert calculate_trip_statistics(coordinates) == pytest.approx(vectorized, rel=0, abs=PARITY_M)
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from app.config.database import db
+from app.config.settings import settings
+from app.routes.trips import _insert_trip
+from app.services import ingest_buffer as ingest_buffer_module
+from app.services.coordinate_store import to_db_row
+from app.services.ingest_buffer import IngestBuffer
+from app.utils.exceptions import IngestBufferFullException
+
+START = datetime(2026, 5, 1, 10, 0, 0)
+
+
+@pytest.fixture
+def app_db(database_url, monkeypatch):
+    """the app wide db pool on the test database"""
+    monkeypatch.setattr(settings, "DATABASE_URL", database_url)
+    monkeypatch.setattr(settings, "DB_POOL_MIN_SIZE", 1)
+    db.initialize()
+    yield db
+    db.close_all_connections()
+
+
+@pytest.fixture
+def slow_writes(monkeypatch):
+    """slows every buffered write down and records how many overlapped"""
+    real_write = ingest_buffer_module._write_buffered_points
+    lock = threading.Lock()
+    seen = {"active": 0, "most": 0, "fail": 0}
+
+    def write(conn, *args):
+        with lock:
+            seen["active"] += 1
+            seen["most"] = max(seen["most"], seen["active"])
+            fail = seen["fail"] > 0
+            seen["fail"] -= fail
+        try:
+            time.sleep(0.05)
+            if fail:
+                raise RuntimeError("db went away")
+            return real_write(conn, *args)
+        finally:
+            with lock:
+                seen["active"] -= 1
+
+    monkeypatch.setattr(ingest_buffer_module, "_write_buffered_points", write)
+    return seen
+
+
+def _recording_trip(conn):
+    trip_id, user_id = str(uuid.uuid4()), str(uuid.uuid4())
+    _insert_trip(conn, trip_id, user_id, START)
+    conn.commit()
+    return trip_id, user_id
+
+
+def _point(i: int):
+    return to_db_row(45.0 + i * 0.0001, 9.0, START + timedelta(seconds=i), None), str(uuid.uuid4())
+
+
+def _sequences(conn, trip_id: str) -> list:
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT sequence_order FROM trip_coordinates WHERE trip_id = %s ORDER BY sequence_order", (trip_id,))
+        return [row[0] for row in cursor.fetchall()]
+
+
+def test_one_flush_per_trip_at_a_time(pg_conn, app_db, slow_writes):
+    trip_id, user_id = _recording_trip(pg_conn)
+    buffer = IngestBuffer(max_points=1000, max_latency=60, max_total=10000)
+
+    async def scenario():
+        for i in range(5):
+            await buffer.add(trip_id, user_id, *_point(i))
+        first = asyncio.create_task(buffer.flush_trip(trip_id))
+        await asyncio.sleep(0.01)
+        # a discard and new points while the first write is still running
+        # must not get a second lock next to the one that is held
+        buffer.discard(trip_id)
+        flushes = []
+        for i in range(5, 10):
+            await buffer.add(trip_id, user_id, *_point(i))
+            flushes.append(asyncio.create_task(buffer.flush_trip(trip_id)))
+        await asyncio.gather(first, *flushes)
+        return buffer.stats()
+
+    stats = asyncio.run(scenario())
+
+    assert slow_writes["most"] == 1
+    assert stats["bufferedPoints"] == 0 and stats["bufferedTrips"] == 0
+    assert _sequences(pg_conn, trip_id) == list(range(1, 11))
+
+
+def test_failed_background_flush_is_logged_and_kept(pg_conn, app_db, slow_writes, caplog):
+    trip_id, user_id = _recording_trip(pg_conn)
+    buffer = IngestBuffer(max_points=3, max_latency=60, max_total=10000)
+    slow_writes["fail"] = 1
+
+    async def scenario():
+        # the third point schedules a flush in the background, that one fails
+        for i in range(3):
+            await buffer.add(trip_id, user_id, *_point(i))
+        await asyncio.wait(list(buffer._tasks))
+        kept = buffer.stats()["bufferedPoints"]
+        await buffer.flush_trip(trip_id)
+        return kept
+
+    with caplog.at_level(logging.ERROR, logger=ingest_buffer_module.__name__):
+        kept = asyncio.run(scenario())
+
+    assert kept == 3
+    assert any("Background flush failed" in r.getMessage() for r in caplog.records)
+    assert _sequences(pg_conn, trip_id) == [1, 2, 3]
+
+
+def test_full_buffer_turns_points_away_while_flushes_fail(pg_conn, app_db, slow_writes):
+    trip_id, user_id = _recording_trip(pg_conn)
+    buffer = IngestBuffer(max_points=1000, max_latency=60, max_total=3)
+    slow_writes["fail"] = 100
+
+    async def scenario():
+        for i in range(3):
+            await buffer.add(trip_id, user_id, *_point(i))
+        with pytest.raises(IngestBufferFullException):
+            await buffer.add(trip_id, user_id, *_point(3))
+        kept = buffer.stats()["bufferedPoints"]
+        # db is back, the flush the next point waits for gets through
+        slow_writes["fail"] = 0
+        await buffer.add(trip_id, user_id, *_point(3))
+        await buffer.flush_trip(trip_id)
+        return kept
+
+    kept = asyncio.run(scenario())
+
+    assert kept == 3
+    assert _sequences(pg_conn, trip_id) == [1, 2, 3, 4]
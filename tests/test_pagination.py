@@ -0,0 +1,41 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from app.utils.exceptions import InvalidCursorException
+from app.utils.pagination import decode_cursor, encode_cursor
+
+TRIP_ID = str(uuid.uuid4())
+
+
+def _raw_cursor(*parts) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(parts)).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("sort, value", [
+    ("newest", datetime(2026, 5, 1, 10, 0, 0, 123456)),
+    ("oldest", datetime(2026, 5, 1, 10, 0, 0)),
+    ("longest", Decimal("12345.67")),
+])
+def test_cursor_round_trip(sort, value):
+    assert decode_cursor(encode_cursor(sort, value, TRIP_ID), sort) == (value, TRIP_ID)
+
+
+@pytest.mark.parametrize("sort, cursor", [
+    ("newest", _raw_cursor("newest", "abc", TRIP_ID)),
+    ("oldest", _raw_cursor("oldest", 12, TRIP_ID)),
+    ("newest", _raw_cursor("newest", None, TRIP_ID)),
+    ("longest", _raw_cursor("longest", "abc", TRIP_ID)),
+    ("longest", _raw_cursor("longest", "NaN", TRIP_ID)),
+    ("longest", _raw_cursor("longest", True, TRIP_ID)),
+    ("longest", _raw_cursor("longest", [1], TRIP_ID)),
+    ("newest", _raw_cursor("newest", "2026-05-01T10:00:00", "not-a-uuid")),
+    ("newest", _raw_cursor("newest", "2026-05-01T10:00:00")),
+    ("newest", "!!!"),
+    ("longest", encode_cursor("newest", datetime(2026, 5, 1), TRIP_ID)),
+])
+def test_tampered_cursor_is_rejected(sort, cursor):
+    with pytest.raises(InvalidCursorException):
+        decode_cursor(cursor, sort)
@@ -0,0 +1,132 @@
+import math
+import random
+import struct
+import pytest
+from app.utils.route_encoding import (
+    BINARY_HEADER, FLAG_WIDE_OFFSETS, decode_polyline_values, decode_route_binary, decode_route_polyline,
+    encode_polyline_values, encode_route_binary, encode_route_polyline
+)
+
+START_MS = 1777629600000  # 2026-05-01T10:00:00Z
+
+
+def _float32(value: float) -> float:
+    return struct.unpack("<f", struct.pack("<f", value))[0]
+
+
+def _route(n: int, seed: int, lat0: float = 45.0, lon0: float = 9.0, elevation: bool = True) -> list:
+    rng = random.Random(seed)
+    rows = []
+    lat, lon, ts = lat0, lon0, START_MS
+    for _ in range(n):
+        ele = round(rng.uniform(-20, 3000), 2) if elevation and rng.random() > 0.1 else None
+        rows.append((round(lat, 8), round(lon, 8), ts, ele))
+        lat = max(-90.0, min(90.0, lat + rng.uniform(-0.001, 0.001)))
+        lon = max(-180.0, min(180.0, lon + rng.uniform(-0.001, 0.001)))
+        ts += rng.choice([0, 1, 250, 1000, 5000])
+    return rows
+
+
+EDGE_ROUTES = {
+    "southern_western": _route(200, 1, lat0=-33.86785, lon0=-151.20732),
+    "crosses_equator_and_meridian": [
+        (0.00001, -0.00001, START_MS, None), (-0.00001, 0.00001, START_MS + 1000, None),
+        (-0.00002, 0.00002, START_MS + 2000, None),
+    ],
+    "extreme_jumps": [
+        (-90.0, -180.0, START_MS, -400.0), (90.0, 180.0, START_MS + 1, 8848.86),
+        (-89.99999, 179.99999, START_MS + 2, None), (0.0, 0.0, START_MS + 3, 0.0),
+    ],
+    "single_point": [(45.12345678, -9.87654321, START_MS, 12.5)],
+    "no_elevation": _route(50, 2, elevation=False),
+    "long": _route(5000, 3),
+    # past the ~24.8 days int32 milliseconds can hold, and a point from before the start
+    "spans_weeks": [
+        (45.0, 9.0, START_MS, 100.0), (45.001, 9.001, START_MS - 5000, None),
+        (45.002, 9.002, START_MS + 2**31 - 1, 101.0), (45.003, 9.003, START_MS + 30 * 86400000, 102.0),
+    ],
+}
+
+
+@pytest.mark.parametrize("values", [
+    [], [0], [1, -1, 0], [2**31 - 1, -2**31, 0], list(range(-500, 500, 7)),
+    [random.Random(4).randint(-10**12, 10**12) for _ in range(300)],
+])
+def test_polyline_values_round_trip(values):
+    assert decode_polyline_values(encode_polyline_values(values)) == values
+
+
+@pytest.mark.parametrize("name", sorted(EDGE_ROUTES))
+@pytest.mark.parametrize("precision", [5, 6])
+def test_route_polyline_round_trip(name, precision):
+    rows = EDGE_ROUTES[name]
+    decoded = decode_route_polyline(encode_route_polyline(rows, precision))
+
+    assert len(decoded) == len(rows)
+    tolerance = 0.5 / 10 ** precision + 1e-12
+    last_elevation = 0
+    has_elevation = any(r[3] is not None for r in rows)
+    for (lat, lon, ts, ele), (dlat, dlon, dts, dele) in zip(rows, decoded):
+        assert abs(dlat - lat) <= tolerance
+        assert abs(dlon - lon) <= tolerance
+        assert dts == ts
+        if not has_elevation:
+            assert dele is None
+            continue
+        if ele is not None:
+            last_elevation = round(ele * 10) / 10
+        # decimeters, a missing value repeats the previous one
+        assert dele == last_elevation
+
+
+@pytest.mark.parametrize("name", sorted(EDGE_ROUTES))
+def test_route_binary_round_trip(name):
+    rows = EDGE_ROUTES[name]
+    decoded = decode_route_binary(encode_route_binary(rows))
+
+    assert len(decoded) == len(rows)
+    for (lat, lon, ts, ele), (dlat, dlon, dts, dele) in zip(rows, decoded):
+        assert dlat == _float32(lat)
+        assert dlon == _float32(lon)
+        assert dts == ts
+        assert dele == (_float32(ele) if ele is not None else None)
+
+
+def test_binary_float32_precision_is_enough_for_gps():
+    rows = _route(1000, 5, lat0=-89.9, lon0=-179.9)
+    for (lat, lon, _, _), (dlat, dlon, _, _) in zip(rows, decode_route_binary(encode_route_binary(rows))):
+        # float32 keeps ~7 significant digits, under 1.5 m anywhere on earth
+        assert abs(dlat - lat) < 1e-5
+        assert abs(dlon - lon) < 1.5e-5
+
+
+def test_empty_route_round_trips():
+    assert decode_route_polyline(encode_route_polyline([])) == []
+    payload = encode_route_binary([])
+    assert len(payload) == BINARY_HEADER.size
+    assert decode_route_binary(payload) == []
+
+
+def test_binary_rejects_other_payloads():
+    payload = bytearray(encode_route_binary(EDGE_ROUTES["single_point"]))
+    payload[:4] = b"NOPE"
+    with pytest.raises(ValueError):
+        decode_route_binary(bytes(payload))
+
+
+def test_binary_missing_elevation_is_nan_on_the_wire():
+    rows = [(45.0, 9.0, START_MS, 100.0), (45.1, 9.1, START_MS + 1000, None)]
+    payload = encode_route_binary(rows)
+    # header, lat, lon, offset columns, then elevations
+    elevations = struct.unpack_from("<2f", payload, BINARY_HEADER.size + 3 * 4 * len(rows))
+    assert elevations[0] == 100.0 and math.isnan(elevations[1])
+
+
+def test_binary_offsets_widen_only_when_needed():
+    short = encode_route_binary(EDGE_ROUTES["long"])
+    weeks = encode_route_binary(EDGE_ROUTES["spans_weeks"])
+    assert not BINARY_HEADER.unpack_from(short, 0)[2] & FLAG_WIDE_OFFSETS
+    assert BINARY_HEADER.unpack_from(weeks, 0)[2] & FLAG_WIDE_OFFSETS
+    # int32 offsets for the long route, int64 for the one spanning weeks
+    assert len(short) == BINARY_HEADER.size + 4 * 4 * len(EDGE_ROUTES["long"])
+    assert len(weeks) == BINARY_HEADER.size + (4 + 4 + 8 + 4) * len(EDGE_ROUTES["spans_weeks"])
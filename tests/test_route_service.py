@@ -0,0 +1,80 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from app.config.database import db
+from app.config.settings import settings
+from app.models.trip import CoordinateInput
+from app.routes.trips import _complete_trip, _insert_coordinates_batch, _insert_trip
+from app.services.enrichment import EnrichmentQueue
+from app.services.route_service import ROUTE_SIMPLIFICATION_LEVELS, fetch_simplified_route
+from app.utils.geo_utils import simplify_route
+
+START = datetime(2026, 5, 1, 10, 0, 0)
+
+
+def _recorded_trip(conn, n: int = 300):
+    trip_id, user_id = str(uuid.uuid4()), str(uuid.uuid4())
+    _insert_trip(conn, trip_id, user_id, START)
+    _insert_coordinates_batch(conn, trip_id, user_id, [
+        CoordinateInput(latitude=45.0 + i * 0.0001, longitude=9.0 + (i % 40) * 0.0002,
+                        timestamp=START + timedelta(seconds=i), elevation=100)
+        for i in range(n)
+    ])
+    conn.commit()
+    return trip_id, user_id
+
+
+def test_missing_levels_are_stored_on_first_read(pg_conn):
+    trip_id, user_id = _recorded_trip(pg_conn)
+    with pg_conn.cursor() as cursor:
+        # still recording, nothing to store yet
+        assert fetch_simplified_route(cursor, trip_id, 5) is None
+    # completed but the enrichment job never ran (process restarted)
+    _complete_trip(pg_conn, trip_id, user_id, START + timedelta(hours=1))
+    pg_conn.commit()
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT latitude, longitude, timestamp, elevation FROM trip_coordinates
+            WHERE trip_id = %s ORDER BY sequence_order
+        """, (trip_id,))
+        coordinates = cursor.fetchall()
+        route = fetch_simplified_route(cursor, trip_id, 20)
+        cursor.execute("SELECT tolerance_m, point_count FROM trip_route_simplified WHERE trip_id = %s", (trip_id,))
+        stored = dict(cursor.fetchall())
+        again = fetch_simplified_route(cursor, trip_id, 20)
+
+    expected = simplify_route(coordinates, 20)
+    assert [(lat, lon) for lat, lon, _, _ in route] == [(float(r[0]), float(r[1])) for r in expected]
+    assert stored == {t: len(simplify_route(coordinates, t)) for t in ROUTE_SIMPLIFICATION_LEVELS}
+    assert again == route
+
+
+def test_startup_recovers_route_work_lost_with_the_queue(pg_conn, database_url, monkeypatch):
+    trip_id, user_id = _recorded_trip(pg_conn)
+    # completed, then the process died before the queued job ran
+    _complete_trip(pg_conn, trip_id, user_id, START + timedelta(hours=1))
+    pg_conn.commit()
+
+    monkeypatch.setattr(settings, "DATABASE_URL", database_url)
+    monkeypatch.setattr(settings, "DB_POOL_MIN_SIZE", 1)
+    db.initialize()
+    try:
+        async def restart():
+            queue = EnrichmentQueue()
+            queue.recover(10)
+            await queue.drain()
+            # a second start finds nothing left to do
+            queue.recover(10)
+            await queue.drain()
+        asyncio.run(restart())
+    finally:
+        db.close_all_connections()
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT heatmap_applied FROM trips WHERE trip_id = %s", (trip_id,))
+        assert cursor.fetchone()[0] is True
+        cursor.execute("SELECT tolerance_m FROM trip_route_simplified WHERE trip_id = %s", (trip_id,))
+        assert {row[0] for row in cursor.fetchall()} == set(ROUTE_SIMPLIFICATION_LEVELS)
+        cursor.execute("SELECT COALESCE(SUM(trip_count), 0) FROM heatmap_cells")
+        assert cursor.fetchone()[0] > 0
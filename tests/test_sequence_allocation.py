@@ -0,0 +1,101 @@
+import random
+import threading
+import uuid
+from datetime import datetime, timedelta
+import psycopg2
+from app.models.trip import CoordinateInput
+from app.routes.trips import _import_trip, _insert_coordinate, _insert_coordinates_batch, _insert_trip
+from app.services.coordinate_store import COPY_THRESHOLD
+from app.services.import_service import IMPORT_CHUNK_SIZE
+
+START = datetime(2026, 5, 1, 10, 0, 0)
+
+
+def _batch(marker: int, size: int):
+    # elevation tags every point with the batch it came in
+    return [
+        CoordinateInput(
+            latitude=45.0 + i * 0.0001, longitude=9.0 + marker * 0.001,
+            timestamp=START + timedelta(seconds=marker * 100000 + i), elevation=marker
+        )
+        for i in range(size)
+    ]
+
+
+def test_parallel_uploads_get_contiguous_unique_sequences(database_url, pg_conn):
+    trip_id, user_id = str(uuid.uuid4()), str(uuid.uuid4())
+    _insert_trip(pg_conn, trip_id, user_id, START)
+    pg_conn.commit()
+
+    rng = random.Random(7)
+    sizes = [rng.choice([1, 2, 7, 50, 300]) for _ in range(60)] + [COPY_THRESHOLD + 5]
+    workers = 12
+    start_together = threading.Barrier(workers)
+    errors = []
+
+    def device(conn, markers):
+        start_together.wait()
+        try:
+            for marker in markers:
+                if sizes[marker] == 1:
+                    _insert_coordinate(conn, trip_id, user_id, _batch(marker, 1)[0])
+                else:
+                    _insert_coordinates_batch(conn, trip_id, user_id, _batch(marker, sizes[marker]))
+                conn.commit()
+        except Exception as e:
+            errors.append(e)
+
+    connections = [psycopg2.connect(database_url) for _ in range(workers)]
+    try:
+        threads = [
+            threading.Thread(target=device, args=(conn, range(i, len(sizes), workers)))
+            for i, conn in enumerate(connections)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        for conn in connections:
+            conn.close()
+    assert errors == []
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT elevation::int, sequence_order FROM trip_coordinates
+            WHERE trip_id = %s ORDER BY sequence_order
+        """, (trip_id,))
+        rows = cursor.fetchall()
+        cursor.execute("SELECT next_sequence FROM trips WHERE trip_id = %s", (trip_id,))
+        next_sequence = cursor.fetchone()[0]
+
+    total = sum(sizes)
+    sequences = [sequence for _, sequence in rows]
+    assert sequences == list(range(1, total + 1))
+    assert next_sequence == total + 1
+    by_batch = {}
+    for marker, sequence in rows:
+        by_batch.setdefault(marker, []).append(sequence)
+    assert sorted(by_batch) == list(range(len(sizes)))
+    for marker, batch_sequences in by_batch.items():
+        # each upload got one unbroken range of its own
+        assert len(batch_sequences) == sizes[marker]
+        assert batch_sequences == list(range(batch_sequences[0], batch_sequences[0] + sizes[marker]))
+
+
+def test_imported_trip_is_numbered_like_uploads(pg_conn):
+    trip_id, user_id = str(uuid.uuid4()), str(uuid.uuid4())
+    n = IMPORT_CHUNK_SIZE + 3
+    points = [(45.0 + i * 0.0001, 9.0, START + timedelta(seconds=i), None) for i in range(n)]
+
+    result = _import_trip(pg_conn, trip_id, user_id, iter(points))
+    pg_conn.commit()
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT sequence_order FROM trip_coordinates WHERE trip_id = %s ORDER BY sequence_order", (trip_id,))
+        sequences = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT next_sequence FROM trips WHERE trip_id = %s", (trip_id,))
+        next_sequence = cursor.fetchone()[0]
+    assert result["point_count"] == n
+    assert sequences == list(range(1, n + 1))
+    assert next_sequence == n + 1
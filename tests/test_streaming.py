@@ -0,0 +1,134 @@
+import asyncio
+import io
+import tracemalloc
+import uuid
+import zipfile
+from datetime import datetime, timedelta
+import pytest
+from app.config.database import Database
+from app.config.settings import settings
+from app.routes.trips import _fetch_export_trips, _insert_trip, _ndjson_body
+from app.services.export_service import COORDINATES_STREAM_QUERY, CsvWriter, export_trips_zip
+from app.utils.exceptions import PoolTimeoutException
+
+STREAM_ROWS = 500_000
+
+
+@pytest.fixture
+def database(database_url, monkeypatch):
+    """a Database of its own on the test database, closed after the test"""
+    monkeypatch.setattr(settings, "DATABASE_URL", database_url)
+    monkeypatch.setattr(settings, "DB_POOL_MIN_SIZE", 1)
+    database = Database()
+    yield database
+    database.close_all_connections()
+
+
+def _trip_with_rows(conn, count: int, user_id: str = None, start: datetime = datetime(2026, 5, 1, 10, 0, 0)) -> str:
+    trip_id = str(uuid.uuid4())
+    _insert_trip(conn, trip_id, user_id or str(uuid.uuid4()), start)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO trip_coordinates (trip_id, latitude, longitude, timestamp, elevation, sequence_order)
+            SELECT %s, 45 + n * 0.000001, 9 + n * 0.000001,
+                   TIMESTAMP '2026-05-01 10:00:00' + n * INTERVAL '1 second', n %% 500, n
+            FROM generate_series(1, %s) AS n
+            """,
+            (trip_id, count)
+        )
+    conn.commit()
+    return trip_id
+
+
+def test_stream_memory_stays_flat(pg_conn, database):
+    trip_id = _trip_with_rows(pg_conn, STREAM_ROWS)
+    database.initialize()
+
+    async def consume():
+        stream = await database.stream(COORDINATES_STREAM_QUERY, (trip_id,))
+        lines = body_bytes = 0
+        async for chunk in _ndjson_body(stream):
+            lines += chunk.count("\n")
+            body_bytes += len(chunk)
+        return lines, body_bytes
+
+    tracemalloc.start()
+    try:
+        lines, body_bytes = asyncio.run(consume())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert lines == STREAM_ROWS
+    # one itersize chunk of rows and its text at a time, not the whole body
+    assert peak < 16 * 1024 * 1024
+    assert peak < body_bytes / 10
+
+
+def test_streams_are_capped_and_leave_the_pool_alone(pg_conn, database, monkeypatch):
+    trip_id = _trip_with_rows(pg_conn, 10)
+    monkeypatch.setattr(settings, "DB_STREAM_MAX_CONCURRENT", 2)
+    monkeypatch.setattr(settings, "DB_POOL_MAX_SIZE", 4)
+    monkeypatch.setattr(settings, "DB_POOL_CHECKOUT_TIMEOUT_SECONDS", 0.2)
+    database.initialize()
+
+    def count_points(conn):
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM trip_points(%s)", (trip_id,))
+            return cursor.fetchone()[0]
+
+    async def scenario():
+        # slow clients that never read, they hold their slot until closed
+        held = [await database.stream(COORDINATES_STREAM_QUERY, (trip_id,)) for _ in range(2)]
+        assert database.pool_stats()["openStreams"] == 2
+        with pytest.raises(PoolTimeoutException):
+            await database.stream(COORDINATES_STREAM_QUERY, (trip_id,))
+        # the rest of the pool still serves normal requests
+        counts = await asyncio.gather(*(database.run(count_points) for _ in range(2)))
+
+        held[0].close()
+        # the slot comes back once the close ran on the db thread
+        reopened = await database.stream(COORDINATES_STREAM_QUERY, (trip_id,))
+        rows = [row async for chunk in reopened.chunks() for row in chunk]
+        held[1].close()
+        await asyncio.sleep(0.1)
+        return counts, len(rows), database.pool_stats()["openStreams"]
+
+    counts, streamed, still_open = asyncio.run(scenario())
+
+    assert counts == [10, 10]
+    assert streamed == 10
+    assert still_open == 0
+
+
+def test_zip_export_reads_every_trip_through_one_stream(pg_conn, database, monkeypatch):
+    user_id = str(uuid.uuid4())
+    sizes = [3, 2500, 7]
+    start = datetime(2026, 5, 1, 10, 0, 0)
+    trip_ids = [_trip_with_rows(pg_conn, n, user_id, start + timedelta(days=i)) for i, n in enumerate(sizes)]
+    monkeypatch.setattr(settings, "DB_STREAM_MAX_CONCURRENT", 1)
+    database.initialize()
+
+    async def export():
+        stream = await database.stream(None, prepare=lambda conn: _fetch_export_trips(conn, user_id))
+        parts, most_open = [], 0
+        async for data in export_trips_zip(stream.prepared, CsvWriter, stream):
+            parts.append(data)
+            most_open = max(most_open, database.pool_stats()["openStreams"])
+        await asyncio.sleep(0.1)
+        return b"".join(parts), most_open, database.pool_stats()["openStreams"]
+
+    payload, most_open, still_open = asyncio.run(export())
+
+    # with a single slot every trip after the first would time out if it took its own
+    assert most_open == 1
+    assert still_open == 0
+    with zipfile.ZipFile(io.BytesIO(payload)) as archive:
+        names = archive.namelist()
+        assert len(names) == len(sizes)
+        for name, trip_id, n in zip(names, trip_ids, sizes):
+            assert trip_id in name
+            lines = archive.read(name).decode().splitlines()
+            assert len(lines) == n + 1
+            assert all(line.startswith(trip_id) for line in lines[1:])
@@ -0,0 +1,100 @@
+import json
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.models.trip import CoordinateInput
+from app.routes.trips import _complete_trip, _insert_coordinates_batch, _insert_trip
+from app.services.coordinate_store import to_db_row
+from app.utils.geo_utils import TripStatsAccumulator, calculate_trip_statistics
+
+START = datetime(2026, 5, 1, 10, 0, 0, tzinfo=timezone.utc)
+ZONES = [timezone.utc, timezone(timedelta(hours=2)), timezone(timedelta(hours=-5, minutes=-30))]
+
+
+def _ride(n: int, seed: int, zones=(timezone.utc,)) -> list:
+    """(lat, lon, iso timestamp) points in time order, each written in one of zones"""
+    rng = random.Random(seed)
+    lat, lon, ts = 45.0, 9.0, START
+    points = []
+    for _ in range(n):
+        points.append((round(lat, 8), round(lon, 8), ts.astimezone(rng.choice(zones)).isoformat()))
+        lat += rng.uniform(-0.0001, 0.0001) if rng.random() > 0.05 else 0.0
+        lon += rng.uniform(-0.0001, 0.0001)
+        ts += timedelta(seconds=rng.choice([0, 1, 1, 2, 5]), microseconds=rng.randrange(0, 1000000, 1000))
+    return points
+
+
+def _accumulate(points, chunk_size: int) -> TripStatsAccumulator:
+    """feed the points like uploads do, state through json between chunks like trips.running_stats"""
+    state = TripStatsAccumulator().to_state()
+    for i in range(0, len(points), chunk_size):
+        acc = TripStatsAccumulator.from_state(json.loads(json.dumps(state)))
+        for lat, lon, ts in points[i:i + chunk_size]:
+            row = to_db_row(lat, lon, datetime.fromisoformat(ts), None)
+            acc.add(row[0], row[1], row[2])
+        state = acc.to_state()
+    return TripStatsAccumulator.from_state(state)
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 4, 64, 2000])
+@pytest.mark.parametrize("chunk_size", [1, 7, 500])
+def test_in_order_points_match_full_recompute(n, chunk_size):
+    points = _ride(n, seed=n)
+    acc = _accumulate(points, chunk_size)
+    assert acc.in_order
+    assert acc.point_count == n
+    assert acc.result() == calculate_trip_statistics(points)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_mixed_timezones_match_full_recompute(seed):
+    points = _ride(500, seed=seed, zones=ZONES)
+    acc = _accumulate(points, 13)
+    assert acc.in_order
+    assert acc.result() == calculate_trip_statistics(points)
+
+
+def test_out_of_order_points_are_flagged():
+    points = _ride(300, seed=3)
+    points[100], points[200] = points[200], points[100]
+    assert not _accumulate(points, 10).in_order
+
+
+def _upload(conn, points, chunk_size: int):
+    trip_id, user_id = str(uuid.uuid4()), str(uuid.uuid4())
+    _insert_trip(conn, trip_id, user_id, START.replace(tzinfo=None))
+    for i in range(0, len(points), chunk_size):
+        chunk = [CoordinateInput(latitude=lat, longitude=lon, timestamp=ts) for lat, lon, ts in points[i:i + chunk_size]]
+        _insert_coordinates_batch(conn, trip_id, user_id, chunk)
+    conn.commit()
+    return trip_id, user_id
+
+
+@pytest.mark.parametrize("case", ["in_order", "out_of_order", "mixed_timezones"])
+def test_completed_trip_stats_match_full_recompute(pg_conn, case):
+    points = _ride(400, seed=11, zones=ZONES if case == "mixed_timezones" else (timezone.utc,))
+    if case == "out_of_order":
+        points[50], points[300] = points[300], points[50]
+    trip_id, user_id = _upload(pg_conn, points, 37)
+
+    stats, midpoint = _complete_trip(pg_conn, trip_id, user_id, START.replace(tzinfo=None) + timedelta(hours=2))
+    pg_conn.commit()
+
+    assert stats == calculate_trip_statistics(points)
+    # upload order, whichever path computed the stats
+    assert midpoint == (points[200][0], points[200][1])
+
+
+def test_complete_with_sequence_gap_still_finds_midpoint(pg_conn):
+    points = _ride(50, seed=5)
+    trip_id, user_id = _upload(pg_conn, points, 50)
+    with pg_conn.cursor() as cursor:
+        # gaps like a failed upload leaves behind, point count no longer matches the numbering
+        cursor.execute("UPDATE trip_coordinates SET sequence_order = sequence_order * 3 WHERE trip_id = %s", (trip_id,))
+    pg_conn.commit()
+
+    stats, midpoint = _complete_trip(pg_conn, trip_id, user_id, START.replace(tzinfo=None) + timedelta(hours=1))
+
+    assert stats == calculate_trip_statistics(points)
+    assert midpoint == (points[25][0], points[25][1])